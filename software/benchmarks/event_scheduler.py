@@ -0,0 +1,178 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+"""Compare the departure EventScheduler with an APScheduler BackgroundScheduler.
+
+Run it from the software directory:
+
+    PYTHONPATH=src python benchmarks/event_scheduler.py --events 5000
+
+It measures scheduling new events, rescheduling all of them with new times
+(like a schedule update does) and dispatching events which are due.
+"""
+
+# ruff: noqa: T201, INP001
+
+import argparse
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from BudapestMetroDisplay.event_scheduler import EventScheduler
+
+
+def noop(*_args: object) -> None:
+    """Do nothing, the scheduled callback in the schedule benchmarks."""
+
+
+def run_dates(count: int) -> list[datetime]:
+    """Return random run dates in the next hour."""
+    now = datetime.now()
+    return [now + timedelta(seconds=random.uniform(600, 3600)) for _ in range(count)]
+
+
+def create_apscheduler() -> BackgroundScheduler:
+    """Create the APScheduler instance the same way the departures used it."""
+    scheduler = BackgroundScheduler(
+        jobstores={"default": MemoryJobStore()},
+        job_defaults={
+            "max_instances": 10,
+            "coalesce": False,
+            "misfire_grace_time": 15,
+        },
+    )
+    scheduler.start()
+    return scheduler
+
+
+def bench_apscheduler(count: int, dispatch_count: int) -> dict[str, float]:
+    """Measure the APScheduler BackgroundScheduler."""
+    scheduler = create_apscheduler()
+    results: dict[str, float] = {}
+
+    for name in ("schedule", "reschedule"):
+        dates = run_dates(count)
+        start = time.perf_counter()
+        for i, run_date in enumerate(dates):
+            scheduler.add_job(
+                noop,
+                trigger="date",
+                run_date=run_date,
+                args=[i],
+                id=f"event_{i}",
+                replace_existing=True,
+            )
+        results[name] = time.perf_counter() - start
+
+    scheduler.remove_all_jobs()
+    results["dispatch"] = measure_dispatch(
+        dispatch_count,
+        lambda i, func, run_date: scheduler.add_job(
+            func,
+            trigger="date",
+            run_date=run_date,
+            id=f"due_{i}",
+            replace_existing=True,
+        ),
+    )
+    scheduler.shutdown()
+    return results
+
+
+def bench_event_scheduler(count: int, dispatch_count: int) -> dict[str, float]:
+    """Measure the EventScheduler."""
+    scheduler = EventScheduler(misfire_grace_time=15)
+    scheduler.start()
+    results: dict[str, float] = {}
+
+    for name in ("schedule", "reschedule"):
+        dates = run_dates(count)
+        start = time.perf_counter()
+        for i, run_date in enumerate(dates):
+            scheduler.add_event(f"event_{i}", noop, run_date, (i,))
+        results[name] = time.perf_counter() - start
+
+    for job in scheduler.get_jobs():
+        scheduler.remove_event(job.id)
+    results["dispatch"] = measure_dispatch(
+        dispatch_count,
+        lambda i, func, run_date: scheduler.add_event(f"due_{i}", func, run_date),
+    )
+    scheduler.shutdown()
+    return results
+
+
+def measure_dispatch(
+    count: int,
+    add: Callable[[int, Callable[[], None], datetime], object],
+) -> float:
+    """Schedule events which are due immediately and wait until all of them ran."""
+    done = threading.Event()
+    remaining = [count]
+    lock = threading.Lock()
+
+    def callback() -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+
+    run_date = datetime.now()
+    start = time.perf_counter()
+    for i in range(count):
+        add(i, callback, run_date)
+    done.wait()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--dispatch", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.getLogger("apscheduler").setLevel(logging.ERROR)
+    random.seed(0)
+
+    results = {
+        "APScheduler": bench_apscheduler(args.events, args.dispatch),
+        "EventScheduler": bench_event_scheduler(args.events, args.dispatch),
+    }
+
+    print(f"{'':16}{'schedule':>14}{'reschedule':>14}{'dispatch':>14}")
+    for name, result in results.items():
+        print(
+            f"{name:16}"
+            f"{args.events / result['schedule']:>10.0f} e/s"
+            f"{args.events / result['reschedule']:>10.0f} e/s"
+            f"{args.dispatch / result['dispatch']:>10.0f} e/s",
+        )
+
+
+if __name__ == "__main__":
+    main()
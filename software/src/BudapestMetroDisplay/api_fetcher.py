@@ -0,0 +1,306 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, NamedTuple
+from urllib.parse import urlsplit
+
+import requests
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop
+    from collections.abc import Callable, Coroutine, Mapping, Sequence
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+def async_available() -> bool:
+    """Return whether the aiohttp package is available for the async mode."""
+    return aiohttp is not None
+
+
+def query_items(params: Mapping[str, Any]) -> list[tuple[str, str]]:
+    """Convert request parameters to a list of query items.
+
+    List values are repeated for every item, like requests does,
+    e.g. {"stopId": ["A", "B"]} becomes [("stopId", "A"), ("stopId", "B")].
+    """
+    items: list[tuple[str, str]] = []
+    for name, value in params.items():
+        values = value if isinstance(value, list | tuple) else (value,)
+        items.extend((name, str(v)) for v in values)
+    return items
+
+
+class FetchResult(NamedTuple):
+    """The status code, the headers and the body of an HTTP response."""
+
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str]
+
+
+class PollJob:
+    """An API update scheduled in an AsyncFetcher.
+
+    The id, args and next_run_time attributes match the ones of an APScheduler Job,
+    so the jobs can be listed the same way.
+    """
+
+    __slots__ = ("args", "func", "handle", "id", "next_run_time")
+
+    def __init__(
+        self,
+        job_id: str,
+        func: Callable[..., Coroutine[Any, Any, None]],
+        run_date: datetime,
+        args: Sequence[Any],
+    ) -> None:
+        """Create a job.
+
+        :param job_id: Unique ID of the job
+        :param func: The coroutine function to run at the scheduled time
+        :param run_date: The time to run the job
+        :param args: Positional arguments of the function
+        """
+        self.id: str = job_id
+        self.func: Callable[..., Coroutine[Any, Any, None]] = func
+        self.args: tuple[Any, ...] = tuple(args)
+        self.next_run_time: datetime = run_date
+        self.handle: asyncio.TimerHandle | None = None
+
+
+class HostRateLimiter:
+    """Space out the start of the requests sent to the same host."""
+
+    def __init__(self, rate: float) -> None:
+        """Create a rate limiter.
+
+        :param rate: Maximum number of requests started per second per host
+        """
+        self.interval: float = 1 / rate
+        self._next_slot: dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        """Wait until a request can be started to the host."""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncFetcher:
+    """Run the API updates as tasks on one asyncio event loop.
+
+    The jobs are scheduled with the timers of the event loop, and the requests
+    share one aiohttp session. The number of requests in progress is limited
+    by a semaphore, and the requests to the same host are spaced out
+    by a rate limiter, so many routes can be updated without a thread for each.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        rate_limit: float,
+        timeout: tuple[float, float],
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        """Create a fetcher, which has to be started with start().
+
+        :param max_concurrency: Maximum number of requests in progress
+        :param rate_limit: Maximum number of requests started per second per host
+        :param timeout: Connect and read timeouts of the requests in seconds
+        :param headers: Headers sent with every request
+        """
+        if aiohttp is None:
+            msg = "The aiohttp package is required for the async API updates"
+            raise RuntimeError(msg)
+
+        self.max_concurrency: int = max_concurrency
+        self.timeout: tuple[float, float] = timeout
+        self.headers: dict[str, str] = dict(headers or {})
+
+        self._loop: AbstractEventLoop | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = HostRateLimiter(rate_limit)
+        self._jobs: dict[str, PollJob] = {}
+        self._jobs_lock = threading.Lock()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def start(self, loop: AbstractEventLoop) -> None:
+        """Start running the jobs on the event loop.
+
+        :param loop: A running event loop, e.g. from start_background_loop
+        """
+        self._loop = loop
+
+    def shutdown(self) -> None:
+        """Cancel the pending jobs and close the HTTP session."""
+        if self._loop is None:
+            return
+
+        future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+        try:
+            future.result(timeout=5)
+        except TimeoutError:
+            logger.warning("Timeout when closing the API update tasks")
+
+    def add_job(
+        self,
+        job_id: str,
+        func: Callable[..., Coroutine[Any, Any, None]],
+        run_date: datetime,
+        args: Sequence[Any] = (),
+    ) -> None:
+        """Schedule a job, replacing the existing job with the same ID.
+
+        Can be called from any thread.
+
+        :param job_id: Unique ID of the job
+        :param func: The coroutine function to run at the scheduled time
+        :param run_date: The time to run the job
+        :param args: Positional arguments of the function
+        """
+        if self._loop is None:
+            msg = "The async fetcher is not started"
+            raise RuntimeError(msg)
+
+        job = PollJob(job_id, func, run_date, args)
+        self._loop.call_soon_threadsafe(self._schedule, job)
+
+    def get_jobs(self) -> list[PollJob]:
+        """Return the pending jobs, sorted by their run time."""
+        with self._jobs_lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.next_run_time)
+
+    async def get(
+        self,
+        url: str,
+        params: Mapping[str, Any],
+        headers: Mapping[str, str] | None = None,
+    ) -> FetchResult:
+        """Send a GET request and read the whole response.
+
+        The errors are raised as requests exceptions,
+        so they can be handled the same way as the ones of the blocking requests.
+
+        :param url: The URL of the request
+        :param params: The query parameters, list values are repeated
+        :param headers: Extra headers of the request
+        :return: The status code, the headers and the body of the response
+        """
+        await self._rate_limiter.acquire(urlsplit(url).netloc)
+
+        async with self._semaphore:
+            try:
+                session = self._get_session()
+                async with session.get(
+                    url,
+                    params=query_items(params),
+                    headers=headers,
+                ) as response:
+                    return FetchResult(
+                        response.status,
+                        await response.read(),
+                        response.headers,
+                    )
+            except TimeoutError as e:
+                raise requests.exceptions.ReadTimeout(str(e)) from e
+            except aiohttp.ClientConnectionError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            except aiohttp.ClientError as e:
+                raise requests.exceptions.RequestException(str(e)) from e
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, it is created in the event loop on first use."""
+        if self._session is None or self._session.closed:
+            connect_timeout, read_timeout = self.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=connect_timeout,
+                    sock_read=read_timeout,
+                ),
+                headers=self.headers,
+            )
+        return self._session
+
+    def _schedule(self, job: PollJob) -> None:
+        """Add a job to the event loop timers, must run in the event loop."""
+        loop = asyncio.get_running_loop()
+
+        with self._jobs_lock:
+            existing = self._jobs.get(job.id)
+            if existing is not None and existing.handle is not None:
+                existing.handle.cancel()
+            self._jobs[job.id] = job
+
+        delay = max(0.0, (job.next_run_time - datetime.now()).total_seconds())
+        job.handle = loop.call_at(loop.time() + delay, self._spawn, job)
+
+    def _spawn(self, job: PollJob) -> None:
+        """Start the task of a due job, must run in the event loop."""
+        with self._jobs_lock:
+            if self._jobs.get(job.id) is job:
+                del self._jobs[job.id]
+
+        task = asyncio.get_running_loop().create_task(self._run(job), name=job.id)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: PollJob) -> None:
+        """Run a job and log its errors."""
+        try:
+            await job.func(*job.args)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Error when running API update {job.id}")
+
+    async def _close(self) -> None:
+        """Cancel the jobs and the running tasks, and close the session."""
+        with self._jobs_lock:
+            for job in self._jobs.values():
+                if job.handle is not None:
+                    job.handle.cancel()
+            self._jobs.clear()
+
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
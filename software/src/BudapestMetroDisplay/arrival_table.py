@@ -0,0 +1,155 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Container, Iterable, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Arrivals moving at most this many seconds are not rescheduled,
+# it is above the random spread of the arrival times (±3 seconds)
+MOVE_THRESHOLD: float = 10
+
+
+class AppliedArrival(NamedTuple):
+    """An arrival as it was scheduled."""
+
+    when: float
+    dwell: int
+    predicted: bool = False
+    timetable: bool = False  # Scheduled from the offline timetable
+
+
+class ArrivalTable:
+    """The arrivals of a route which were last applied to the scheduler.
+
+    A new response of the route is compared with the table, so only
+    the new arrivals, the arrivals which moved more than the threshold,
+    and the arrivals which disappeared have to be applied to the scheduler.
+    The lock has to be held while a delta is computed and applied,
+    so the updates of the same route don't interleave.
+    """
+
+    def __init__(self, threshold: float = MOVE_THRESHOLD) -> None:
+        """Create an empty table.
+
+        :param threshold: Arrivals moving at most this many seconds are unchanged
+        """
+        self.threshold: float = threshold
+        self.lock = threading.Lock()
+        self._arrivals: dict[str, AppliedArrival] = {}
+
+    def __len__(self) -> int:
+        """Return the number of arrivals in the table."""
+        return len(self._arrivals)
+
+    def is_applied(
+        self,
+        arrival_id: str,
+        when: float,
+        dwell: int,
+        *,
+        timetable: bool = False,
+    ) -> bool:
+        """Check whether an arrival is already scheduled close enough to a time.
+
+        :param arrival_id: The ID of the arrival event
+        :param when: The new timestamp of the arrival
+        :param dwell: The new dwell time of the arrival in seconds
+        :param timetable: Whether the new arrival is from the offline timetable
+        :return: True if the scheduled arrival doesn't have to be changed
+        """
+        applied = self._arrivals.get(arrival_id)
+        return (
+            applied is not None
+            and applied.dwell == dwell
+            and applied.timetable == timetable
+            and abs(applied.when - when) <= self.threshold
+        )
+
+    def is_predicted(self, arrival_id: str) -> bool:
+        """Check whether an arrival is scheduled by a realtime prediction."""
+        applied = self._arrivals.get(arrival_id)
+        return applied is not None and applied.predicted
+
+    def is_timetable(self, arrival_id: str) -> bool:
+        """Check whether an arrival is scheduled from the offline timetable."""
+        applied = self._arrivals.get(arrival_id)
+        return applied is not None and applied.timetable
+
+    def missing(
+        self,
+        seen: Container[str],
+        until: float,
+        *,
+        keep_predicted: bool = False,
+    ) -> list[str]:
+        """Return the arrivals departing up to a time which are not in a new response.
+
+        The time window of the API requests applies to the departure times,
+        so a vehicle departing after the window can arrive within it.
+
+        :param seen: The IDs of the arrivals in the new response
+        :param until: Only the arrivals departing up to this timestamp are returned
+        :param keep_predicted: Don't return the arrivals of realtime predictions
+        :return: The IDs of the disappeared arrivals
+        """
+        return [
+            arrival_id
+            for arrival_id, applied in self._arrivals.items()
+            if arrival_id not in seen
+            and applied.when + applied.dwell <= until
+            and not (keep_predicted and applied.predicted)
+        ]
+
+    def apply(
+        self,
+        changed: Mapping[str, AppliedArrival],
+        removed: Iterable[str],
+        now: float,
+    ) -> None:
+        """Record a delta which was applied to the scheduler.
+
+        The arrivals which are already due are dropped,
+        the scheduler has run or is running them.
+
+        :param changed: The new and moved arrivals by their ID
+        :param removed: The IDs of the cancelled arrivals
+        :param now: The current timestamp
+        """
+        for arrival_id in removed:
+            self._arrivals.pop(arrival_id, None)
+        self._arrivals.update(changed)
+        self._arrivals = {
+            arrival_id: applied
+            for arrival_id, applied in self._arrivals.items()
+            if applied.when > now
+        }
+
+    def clear(self) -> None:
+        """Forget the arrivals, the next response is applied in full."""
+        self._arrivals.clear()
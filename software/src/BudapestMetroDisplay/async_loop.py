@@ -0,0 +1,46 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import threading
+from asyncio import AbstractEventLoop
+
+
+def run_background_loop(loop: AbstractEventLoop) -> None:
+    """Run the asyncio loop."""
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def start_background_loop() -> AbstractEventLoop:
+    """Start a background thread for the asyncio tasks of the application.
+
+    The loop is shared by the ESPHome connection and the async API updates.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(
+        target=run_background_loop,
+        args=(loop,),
+        daemon=True,
+        name="Asyncio thread",
+    ).start()
+    return loop
@@ -20,19 +20,43 @@
 #  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 #  OTHER DEALINGS IN THE SOFTWARE.
 
+import asyncio
 import logging
+import threading
+from collections.abc import Hashable, Iterable, Iterator, Mapping
 from datetime import datetime, time, timedelta
-from random import randint
 from typing import Any
+from urllib.parse import urlencode
 
 import requests
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
+from requests.adapters import HTTPAdapter
 
-from BudapestMetroDisplay import aps_helpers
+from BudapestMetroDisplay import clock
 from BudapestMetroDisplay._version import __version__
+from BudapestMetroDisplay.api_fetcher import (
+    AsyncFetcher,
+    FetchResult,
+    async_available,
+    query_items,
+)
+from BudapestMetroDisplay.arrival_table import AppliedArrival, ArrivalTable
+from BudapestMetroDisplay.bkk_response import (
+    STREAM_CHUNK_SIZE,
+    ApiResponse,
+    StreamingApiResponse,
+    decode_stop_times,
+    streaming_available,
+)
 from BudapestMetroDisplay.config import settings
+from BudapestMetroDisplay.event_scheduler import EventScheduler, ScheduledEvent
+from BudapestMetroDisplay.gtfs import Timetable
 from BudapestMetroDisplay.model import Route, StopId
+from BudapestMetroDisplay.polling import AdaptiveCadence
+from BudapestMetroDisplay.query_planner import QueryBatch, plan_batches, split_by_route
+from BudapestMetroDisplay.recording import Recorder
+from BudapestMetroDisplay.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 # Set the logging level for urllib3 to INFO
@@ -40,6 +64,14 @@ logging.getLogger("urllib3").setLevel(logging.INFO)
 # Set the logging level for requests to INFO
 logging.getLogger("requests").setLevel(logging.INFO)
 
+# The longest time between REALTIME updates,
+# their requests cover two times this from the current time
+REALTIME_MAX_INTERVAL: int = (
+    max(settings.bkk.api_update_realtime, settings.bkk.api_update_realtime_max)
+    if settings.bkk.api_adaptive_polling
+    else settings.bkk.api_update_realtime
+)
+
 # Define the API request parameters for the different schedule updates
 API_SCHEDULE_PARAMETERS: dict[str, dict[str, Any]] = {
     "REGULAR": {
@@ -50,25 +82,74 @@ API_SCHEDULE_PARAMETERS: dict[str, dict[str, Any]] = {
     },
     "REALTIME": {
         "minutesBefore": 0,
-        "minutesAfter": round(settings.bkk.api_update_realtime * 2 / 60),
+        "minutesAfter": round(REALTIME_MAX_INTERVAL * 2 / 60),
         "limit": 100,
         "nextSchedule": timedelta(seconds=settings.bkk.api_update_realtime),
     },
 }
 
+
+# Headers sent with every API request
+API_HEADERS: dict[str, str] = {
+    "Accept": "application/json",
+    "User-Agent": f"BudapestMetroDisplay/{__version__}",
+}
+
+
+def create_session() -> requests.Session:
+    """Create the HTTP session shared by all API requests.
+
+    The session keeps the connections to the API server alive between the updates,
+    so the TCP and TLS handshakes are not repeated for every request.
+
+    :return: A requests Session with a connection pool for the API server
+    """
+    session = requests.Session()
+    session.headers.update(API_HEADERS)
+
+    adapter = HTTPAdapter(
+        pool_connections=1,  # All requests go to the same host
+        pool_maxsize=settings.bkk.api_pool_size,
+        pool_block=False,  # Open a temporary connection if the pool is full
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+# Shared HTTP session for the API requests
+http_session: requests.Session = create_session()
+# Connect and read timeouts for the API requests
+API_TIMEOUT: tuple[float, float] = (
+    settings.bkk.api_connect_timeout,
+    settings.bkk.api_read_timeout,
+)
+
+# Whether to parse the schedule responses incrementally
+API_STREAMING: bool = settings.bkk.api_streaming and streaming_available()
+if settings.bkk.api_streaming and not API_STREAMING:
+    logger.warning(
+        "Streaming API responses are enabled, but the ijson package is not "
+        "installed, the responses will be parsed as a whole",
+    )
+
+# Whether to run the API updates on an asyncio event loop
+API_ASYNC: bool = settings.bkk.api_async and async_available()
+if settings.bkk.api_async and not API_ASYNC:
+    logger.warning(
+        "Async API updates are enabled, but the aiohttp package is not "
+        "installed, the API updates will run in a thread pool",
+    )
+
 # Set the minimum log level for APScheduler
 logging.getLogger("apscheduler.executors.default").setLevel(logging.WARNING)
 logging.getLogger("apscheduler.scheduler").setLevel(logging.WARNING)
 
-# Initialize APScheduler with a persistent job store
-# for scheduling the arrival and departure updates
-departure_scheduler: BackgroundScheduler = BackgroundScheduler(
-    jobstores={"default": MemoryJobStore()},  # Use in-memory job storage
-    job_defaults={
-        "max_instances": 10,  # allow up to 10 concurrent instances
-        "coalesce": False,  # don't merge missed runs
-        "misfire_grace_time": 15,  # no limit for late jobs
-    },
+# Initialize the event scheduler for the vehicle arrivals and departures
+departure_scheduler: EventScheduler = EventScheduler(
+    name="Departure scheduler",
+    misfire_grace_time=15,  # skip events that are late more than 15 seconds
 )
 departure_scheduler.start()
 
@@ -81,19 +162,172 @@ api_update_scheduler: BackgroundScheduler = BackgroundScheduler(
         "misfire_grace_time": None,  # no limit for late jobs
     },
 )
-api_update_scheduler.start()
+
+# In async mode the API updates run on the event loop started by main
+api_fetcher: AsyncFetcher | None = None
+if API_ASYNC:
+    api_fetcher = AsyncFetcher(
+        max_concurrency=settings.bkk.api_max_concurrency,
+        rate_limit=settings.bkk.api_rate_limit,
+        timeout=API_TIMEOUT,
+        headers=API_HEADERS,
+    )
+else:
+    api_update_scheduler.start()
+
+# Adapts the REALTIME update interval of each route to its predictions
+realtime_cadence: AdaptiveCadence | None = None
+if settings.bkk.api_adaptive_polling:
+    realtime_cadence = AdaptiveCadence(
+        settings.bkk.api_update_realtime,
+        settings.bkk.api_update_realtime_min,
+        REALTIME_MAX_INTERVAL,
+    )
+
+# The arrivals last applied to the departure scheduler by route ID
+arrival_tables: dict[str, ArrivalTable] = {}
+arrival_tables_lock = threading.Lock()
+
+# Detects the responses which are the same as the last processed one,
+# they are processed again at least as often as the regular updates
+response_cache: ResponseCache | None = None
+if settings.bkk.api_response_cache:
+    response_cache = ResponseCache(max_age=settings.bkk.api_update_regular)
+
+# The offline timetable loaded by main, it replaces the REGULAR API requests
+# of the routes it covers
+timetable: Timetable | None = None
+
+# Records the raw API responses when started by main with --record,
+# see the replay module
+recorder: Recorder | None = None
+
+# The batch of each route by schedule type, see plan_query_batches
+query_batches: dict[str, dict[str, QueryBatch]] = {
+    schedule_type: {} for schedule_type in API_SCHEDULE_PARAMETERS
+}
+
+
+def plan_query_batches(routes: list[Route], schedule_type: str) -> list[QueryBatch]:
+    """Group the routes into batches whose schedules are requested together.
+
+    If batching is disabled, every route gets a batch of its own.
+
+    :param routes: The routes to update
+    :param schedule_type: REGULAR or REALTIME
+    :return: The batches, with the routes in their original order
+    """
+    route_limit: int = API_SCHEDULE_PARAMETERS[schedule_type]["limit"]
+
+    if settings.bkk.api_batch_routes:
+        # The length of a request URL without the stopIds
+        url, params = schedule_request(QueryBatch([], route_limit), schedule_type)
+        params.pop("stopId")
+        params["includeReferences"] = "routes,alerts,trips"
+        base_length = len(url) + 1 + len(urlencode(params, doseq=True))
+
+        batches = plan_batches(routes, route_limit, base_length)
+    else:
+        batches = [QueryBatch([route], route_limit) for route in routes]
+
+    for batch in batches:
+        for route in batch.routes:
+            query_batches[schedule_type][route.route_id] = batch
+
+    logger.debug(
+        f"Planned {len(batches)} {schedule_type} requests for {len(routes)} routes: "
+        f"{', '.join(batch.name for batch in batches)}",
+    )
+
+    return batches
+
+
+def get_query_batch(route: Route, schedule_type: str) -> QueryBatch:
+    """Return the batch of a route, a batch of its own if it wasn't planned."""
+    batch = query_batches[schedule_type].get(route.route_id)
+    if batch is None:
+        batch = QueryBatch([route], API_SCHEDULE_PARAMETERS[schedule_type]["limit"])
+        query_batches[schedule_type][route.route_id] = batch
+    return batch
+
+
+def add_schedule_update_job(
+    batch: QueryBatch,
+    schedule_type: str,
+    job_time: datetime,
+) -> None:
+    """Schedule the next schedule update of a batch of routes.
+
+    If a job for the same update exists, it will be replaced with the new time.
+
+    :param batch: The routes we want to update
+    :param schedule_type: REGULAR or REALTIME
+    :param job_time: The time of the update
+    """
+    job_id: str = f"{batch.name}_{schedule_type}"  # job reference id
+
+    if api_fetcher is not None:
+        api_fetcher.add_job(
+            job_id,
+            fetch_schedule_for_batch_async,
+            job_time,
+            (batch, schedule_type),
+        )
+        return
+
+    api_update_scheduler.add_job(
+        fetch_schedule_for_batch,
+        trigger="date",
+        run_date=job_time,
+        args=[batch, schedule_type],
+        id=job_id,
+        replace_existing=True,
+    )
+
+
+def add_alert_update_job(route: Route, job_time: datetime) -> None:
+    """Schedule the next alert update of a route.
+
+    If a job for the same update exists, it will be replaced with the new time.
+
+    :param route: A Route object we want to update
+    :param job_time: The time of the update
+    """
+    job_id: str = f"{route.route_id}_ALERTS"  # job reference id
+
+    if api_fetcher is not None:
+        api_fetcher.add_job(job_id, fetch_alerts_for_route_async, job_time, (route,))
+        return
+
+    api_update_scheduler.add_job(
+        fetch_alerts_for_route,
+        trigger="date",
+        run_date=job_time,
+        args=[route],
+        id=job_id,
+        replace_existing=True,
+    )
+
+
+def get_api_update_jobs() -> list[Any]:
+    """Return the pending API update jobs, sorted by their run time."""
+    if api_fetcher is not None:
+        return api_fetcher.get_jobs()
+    return api_update_scheduler.get_jobs()  # type: ignore[no-any-return]
 
 
 def create_schedule_updates(
-    route: Route,
+    route: Route | QueryBatch,
     schedule_type: str,
     delay: int = 0,
 ) -> None:
     """Create jobs to update the data for the provided route.
 
-    The method puts the jobs in APScheduler, which later will make the API calls.
+    The method puts the jobs in the API update scheduler,
+    which later will make the API calls.
+    A route is updated together with the other routes of its batch.
 
-    :param route: A Route object we want to update
+    :param route: A Route or a QueryBatch we want to update
     :param schedule_type: REGULAR or REALTIME
     :param delay: An extra delay in seconds for the start of the job
     affects the API update parameters
@@ -104,23 +338,20 @@ def create_schedule_updates(
         logger.error(f"Invalid schedule type request: {schedule_type}")
         return
 
+    batch = (
+        route
+        if isinstance(route, QueryBatch)
+        else get_query_batch(route, schedule_type)
+    )
+
     logger.info(
         f"Starting updating the {schedule_type} schedules for route {route.name}.",
     )
 
-    job_time: datetime = datetime.now() + timedelta(seconds=delay)  # job start time
-    job_id: str = f"{route.name}_{schedule_type}"  # job reference id
+    job_time: datetime = clock.now() + timedelta(seconds=delay)  # job start time
 
     # Add the job to the scheduler
-    api_update_scheduler.add_job(
-        fetch_schedule_for_route,
-        trigger="date",
-        run_date=job_time,
-        args=[route, schedule_type],
-        id=job_id,
-        replace_existing=True,
-        # If the job exists, it will be replaced with the new time
-    )
+    add_schedule_update_job(batch, schedule_type, job_time)
 
     logger.debug(
         f"Scheduling {schedule_type} API updates for route "
@@ -129,180 +360,702 @@ def create_schedule_updates(
 
 
 def create_alert_updates(route: Route, delay: int = 0) -> None:
-    """Create jobs in APScheduler to update the alerts for the provided route.
+    """Create jobs in the API update scheduler to update the alerts for the route.
 
-    The method puts the job in APScheduler, which later will make the API calls.
+    The method puts the job in the API update scheduler,
+    which later will make the API calls.
 
     :param route: A Route object we want to update
     :param delay: An extra delay in seconds for the start of the job
     affects the API update parameters
     """
     # Store the current time when we started the update process
-    start_time = datetime.now()
+    start_time = clock.now()
 
     logger.info(f"Starting updating the alerts for route {route.name}")
 
     job_time: datetime = start_time + timedelta(seconds=delay)  # job start time
-    job_id: str = f"{route.route_id}_ALERTS"  # job reference id
 
     # Add the job to the scheduler
-    api_update_scheduler.add_job(
-        fetch_alerts_for_route,
-        trigger="date",
-        run_date=job_time,
-        args=[route],
-        id=job_id,
-        replace_existing=True,
-        # If the job exists, it will be replaced with the new time
-    )
+    add_alert_update_job(route, job_time)
 
     logger.debug(
         f"Scheduling alerts API updates for route {route.name} at {job_time!s}.",
     )
 
 
-def fetch_schedule_for_route(
-    route: Route,
+def schedule_request(
+    batch: QueryBatch,
     schedule_type: str,
-) -> None:
-    """Send API request to fetch the schedule for the selected stops.
+) -> tuple[str, dict[str, str | int | list[str]]]:
+    """Return the URL and the parameters of a schedule update request.
 
-    Callback function for the APScheduler jobs.
-    Makes an arrivals-and-departures-for-stop API request to the BKK OpenData server
-    for the selected stops.
-
-    :param route: A Route object we want to get the schedules for
+    :param batch: The routes we want to get the schedules for
     :param schedule_type: REGULAR or REALTIME, affects the API update parameters
+    :return: The URL and the query parameters of the request
+    """
+    url: str = f"{settings.bkk.api_base_url}arrivals-and-departures-for-stop"
+
+    # Get schedule data for all stops in the stop set
+    params: dict[str, str | int | list[str]] = {
+        "stopId": batch.stop_ids,
+        "minutesBefore": API_SCHEDULE_PARAMETERS[schedule_type]["minutesBefore"],
+        "minutesAfter": API_SCHEDULE_PARAMETERS[schedule_type]["minutesAfter"],
+        "limit": batch.limit,
+        "onlyDepartures": "false",
+        "appVersion": f"BudapestMetroDisplay {__version__}",
+        "version": "4",
+        # The trips are needed to split the stop times of a batch to the routes
+        "includeReferences": (
+            "routes,alerts" if batch.is_single else "routes,alerts,trips"
+        ),
+        "key": settings.bkk.api_key,
+    }
+
+    return url, params
+
+
+def alert_request(route: Route) -> tuple[str, dict[str, str | int]]:
+    """Return the URL and the parameters of an alert update request.
+
+    :param route: A Route object we want to update
+    :return: The URL and the query parameters of the request
+    """
+    url: str = f"{settings.bkk.api_base_url}route-details"
+
+    params: dict[str, str | int] = {
+        "routeId": route.route_id,
+        "appVersion": f"BudapestMetroDisplay {__version__}",
+        "version": "4",
+        "includeReferences": "alerts",
+        "key": settings.bkk.api_key,
+    }
+
+    return url, params
+
+
+def next_schedule_update_time(
+    schedule_type: str,
+    route: Route | None = None,
+) -> datetime:
+    """Calculate the time of the next schedule update according to the configuration.
+
+    :param schedule_type: REGULAR or REALTIME
+    :param route: The Route to update, its REALTIME update interval is adapted
+        to its data if adaptive polling is enabled
+    :return: The time of the next update
     """
-    # Calculate the next schedule time
     if schedule_type == "REALTIME" and (
-        time(0, 30) <= datetime.now().time() <= time(4, 0)
+        time(0, 30) <= clock.now().time() <= time(4, 0)
     ):
         # When the current time is between 00:30 and 04:00,
         # schedule the next REALTIME update for 04:00
-        job_time = datetime.combine(datetime.today(), time(4, 0))
+        return datetime.combine(clock.now().date(), time(4, 0))
+
+    if (
+        schedule_type == "REALTIME"
+        and realtime_cadence is not None
+        and route is not None
+    ):
+        return clock.now() + timedelta(
+            seconds=realtime_cadence.interval(route.route_id),
+        )
+
+    # Otherwise schedule the next update according to the configuration
+    return clock.now() + API_SCHEDULE_PARAMETERS[schedule_type]["nextSchedule"]
+
+
+def adjust_schedule_update_time(
+    route: Route,
+    schedule_type: str,
+    job_time: datetime,
+    latest_departure_time: int,
+) -> datetime:
+    """Adjust the time of the next schedule update after a successful update.
+
+    If there were no departures, or the last departure we stored is before
+    the next update, the next update is brought forward.
+
+    :param route: The Route that was updated
+    :param schedule_type: REGULAR or REALTIME
+    :param job_time: The time of the next update according to the configuration
+    :param latest_departure_time: Timestamp of the latest departure in the data,
+        -1 if there were no valid departures
+    :return: The time of the next update
+    """
+    if schedule_type != "REALTIME" and latest_departure_time == -1:
+        job_time = clock.now() + timedelta(minutes=1)
+        logger.debug(
+            f"There were no departures during {schedule_type} schedule update "
+            f"for route {route.name}. "
+            f"Next update scheduled for {job_time!s}",
+        )
+    elif (
+        schedule_type != "REALTIME"
+        and datetime.fromtimestamp(latest_departure_time) < job_time
+    ):
+        job_time = datetime.fromtimestamp(latest_departure_time) - timedelta(
+            minutes=5,
+        )
+        if job_time < clock.now():
+            job_time = clock.now() + timedelta(minutes=5)
+
+        logger.debug(
+            f"The calculated next {schedule_type} schedule update "
+            f"for route {route.name} is later than the last departure "
+            f"we stored, so next update time was adjusted accordingly. "
+            f"Next update scheduled for {job_time!s}",
+        )
     else:
-        # Otherwise schedule the next update according to the configuration
-        job_time = (
-            datetime.now() + API_SCHEDULE_PARAMETERS[schedule_type]["nextSchedule"]
+        message: str = (
+            f"Successfully updated {schedule_type} schedules for route "
+            f"{route.name}. Next update scheduled for {job_time!s}"
+        )
+
+        if schedule_type == "REGULAR":
+            logger.debug(message)
+        else:
+            logger.trace(message)  # type: ignore[attr-defined]
+
+    return job_time
+
+
+def failed_update_time(subject: str, status_code: int) -> datetime:
+    """Log an unsuccessful HTTP response and return the time of the retry.
+
+    :param subject: What was updated, e.g. "REALTIME schedules for route H5"
+    :param status_code: The HTTP status code of the response
+    :return: The time of the next update
+    """
+    # Reschedule the failed action for 1 minute later
+    job_time = clock.now() + timedelta(minutes=1)
+
+    logger.error(
+        f"Failed to update {subject}: HTTP {status_code}. "
+        f"Rescheduled for {job_time!s}.",
+    )
+
+    return job_time
+
+
+def request_error_update_time(
+    error: requests.exceptions.RequestException,
+    subject: str,
+) -> datetime:
+    """Log an error of an API request and return the time of the retry.
+
+    :param error: The error raised by the request or the decoding of the response
+    :param subject: What was updated, e.g. "REALTIME schedules for route H5"
+    :return: The time of the next update
+    """
+    if isinstance(error, requests.exceptions.JSONDecodeError):
+        job_time = clock.now() + timedelta(minutes=1)
+        message = (
+            f"The response did not contain valid JSON data when updating {subject}."
+        )
+    elif isinstance(error, requests.exceptions.InvalidJSONError):
+        job_time = clock.now() + timedelta(minutes=1)
+        message = f"The response contained invalid JSON data when updating {subject}."
+    elif isinstance(error, requests.exceptions.ReadTimeout):
+        job_time = clock.now() + timedelta(minutes=1)
+        message = f"Timeout occurred when updating {subject}."
+    elif isinstance(error, requests.exceptions.ConnectionError):
+        job_time = clock.now() + timedelta(minutes=5)
+        message = f"Connection error when updating {subject}."
+    else:
+        job_time = clock.now() + timedelta(minutes=1)
+        message = f"Error when updating {subject}."
+
+    logger.warning(f"{message} Rescheduled for {job_time!s}.")
+    logger.warning(error)
+
+    return job_time
+
+
+def request_key(url: str, params: Mapping[str, Any]) -> Hashable:
+    """Return the key of a request in the response cache."""
+    return url, tuple(query_items(params))
+
+
+def conditional_headers(key: Hashable) -> dict[str, str]:
+    """Return the headers for a conditional request, if the cache is enabled."""
+    if response_cache is None:
+        return {}
+    return response_cache.conditional_headers(key)
+
+
+def unchanged_result(
+    key: Hashable,
+    status_code: int,
+    content: bytes | None,
+) -> tuple[bool, Any]:
+    """Check whether a response is the same as the last processed one.
+
+    :param key: The key of the request
+    :param status_code: The HTTP status code of the response
+    :param content: The body of the response, None if it is streamed
+    :return: Whether the response is unchanged,
+        and the result of its last processing if it is
+    """
+    if response_cache is None:
+        return False, None
+    entry = response_cache.lookup(key, status_code, content)
+    if entry is None:
+        return False, None
+    return True, entry.result
+
+
+def store_response(
+    key: Hashable,
+    headers: Mapping[str, str],
+    content: bytes | None,
+    result: Any,
+) -> None:
+    """Store a processed response in the cache, if the cache is enabled."""
+    if response_cache is not None:
+        response_cache.store(key, headers, content, result)
+
+
+def fetch_schedule_for_batch(
+    batch: QueryBatch,
+    schedule_type: str,
+) -> None:
+    """Send API request to fetch the schedule for the stops of a batch of routes.
+
+    Callback function for the APScheduler jobs.
+    Makes an arrivals-and-departures-for-stop API request to the BKK OpenData server
+    for the stops of the routes.
+
+    :param batch: The routes we want to get the schedules for
+    :param schedule_type: REGULAR or REALTIME, affects the API update parameters
+    """
+    if uses_timetable(batch, schedule_type):
+        timetable_job_time = update_from_timetable(batch)
+        if timetable_job_time is not None:
+            add_schedule_update_job(batch, schedule_type, timetable_job_time)
+            return
+
+    subject = f"{schedule_type} schedules for route {batch.name}"
+
+    url, params = schedule_request(batch, schedule_type)
+    cache_key = request_key(url, params)
+    # Stream the response when the schedule interval of the route is already known,
+    # because the interval is only calculated at the end of a streamed response.
+    # The response of a batch has to be split, so it can't be streamed
+    # A recorded response must be read as a whole.
+    use_streaming: bool = (
+        recorder is None
+        and API_STREAMING
+        and batch.is_single
+        and (schedule_type != "REGULAR" or batch.routes[0].schedule_interval != -1)
+    )
+
+    try:
+        response = http_session.get(
+            url,
+            params=params,
+            headers=conditional_headers(cache_key),
+            timeout=API_TIMEOUT,
+            stream=use_streaming,
+        )
+
+        try:
+            if response.status_code in {200, 304}:
+                if use_streaming:
+                    # Only the validators can be checked before reading the body
+                    unchanged, latest_departure_times = unchanged_result(
+                        cache_key,
+                        response.status_code,
+                        None,
+                    )
+                    if unchanged:
+                        log_unchanged_schedules(batch, schedule_type)
+                    else:
+                        latest_departure_times = {
+                            batch.routes[0].route_id: process_schedule_response(
+                                response,
+                                batch.routes[0],
+                                schedule_type,
+                                streaming=True,
+                            ),
+                        }
+                        store_response(
+                            cache_key,
+                            response.headers,
+                            None,
+                            latest_departure_times,
+                        )
+                else:
+                    latest_departure_times = process_batch_content(
+                        batch,
+                        schedule_type,
+                        cache_key,
+                        response,
+                    )
+                job_time = adjust_batch_update_time(
+                    batch,
+                    schedule_type,
+                    latest_departure_times,
+                )
+            else:
+                job_time = failed_update_time(subject, response.status_code)
+        finally:
+            # Release the connection of a streamed response
+            response.close()
+    except requests.exceptions.RequestException as e:
+        job_time = request_error_update_time(e, subject)
+
+    add_schedule_update_job(batch, schedule_type, job_time)
+
+
+async def fetch_schedule_for_batch_async(
+    batch: QueryBatch,
+    schedule_type: str,
+) -> None:
+    """Send API request to fetch the schedule for the stops of a batch of routes.
+
+    Coroutine for the AsyncFetcher jobs, see fetch_schedule_for_batch.
+    The response is read as a whole, it is not streamed.
+    Only the request runs on the event loop, the processing runs in a worker
+    thread, so it doesn't block the other tasks of the loop (e.g. ESPHome).
+
+    :param batch: The routes we want to get the schedules for
+    :param schedule_type: REGULAR or REALTIME, affects the API update parameters
+    """
+    if uses_timetable(batch, schedule_type):
+        timetable_job_time = await asyncio.to_thread(update_from_timetable, batch)
+        if timetable_job_time is not None:
+            add_schedule_update_job(batch, schedule_type, timetable_job_time)
+            return
+
+    subject = f"{schedule_type} schedules for route {batch.name}"
+
+    url, params = schedule_request(batch, schedule_type)
+    cache_key = request_key(url, params)
+
+    try:
+        response = await api_fetcher.get(  # type: ignore[union-attr]
+            url,
+            params,
+            conditional_headers(cache_key),
+        )
+
+        if response.status_code in {200, 304}:
+            job_time = await asyncio.to_thread(
+                process_batch_update,
+                batch,
+                schedule_type,
+                cache_key,
+                response,
+            )
+        else:
+            job_time = failed_update_time(subject, response.status_code)
+    except requests.exceptions.RequestException as e:
+        job_time = request_error_update_time(e, subject)
+
+    add_schedule_update_job(batch, schedule_type, job_time)
+
+
+def process_batch_update(
+    batch: QueryBatch,
+    schedule_type: str,
+    cache_key: Hashable,
+    response: FetchResult,
+) -> datetime:
+    """Process a schedule response and calculate the time of the next update.
+
+    :param batch: The routes that the schedule data belongs to
+    :param schedule_type: REGULAR or REALTIME
+    :param cache_key: The key of the request in the response cache
+    :param response: The response with status code 200 or 304
+    :return: The time of the next update
+    """
+    latest_departure_times = process_batch_content(
+        batch,
+        schedule_type,
+        cache_key,
+        response,
+    )
+    return adjust_batch_update_time(batch, schedule_type, latest_departure_times)
+
+
+def uses_timetable(batch: QueryBatch, schedule_type: str) -> bool:
+    """Check whether the schedules of a batch come from the offline timetable.
+
+    Only the REGULAR schedules are replaced, only while the calendar of the
+    feed reaches the current day, and only if the timetable covers every route
+    of the batch. The routes with stops out of service because of an alert
+    are updated from the API, which knows when the service is restored.
+    """
+    return (
+        timetable is not None
+        and schedule_type == "REGULAR"
+        and timetable.is_valid(clock.now().date())
+        and all(
+            timetable.covers(route)
+            and all(sid.in_service for sid in route.get_stop_ids())
+            for route in batch.routes
         )
+    )
+
+
+def update_from_timetable(batch: QueryBatch) -> datetime | None:
+    """Schedule the arrivals of a batch of routes from the offline timetable.
+
+    The scheduled arrivals replace the REGULAR API updates, the arrivals
+    of the realtime predictions are kept, so the REALTIME updates
+    are applied on top of the timetable.
+
+    :param batch: The routes to update
+    :return: The time of the next update, None if the timetable has no
+        stop times for a route, so the batch has to be updated from the API
+    """
+    if timetable is None:
+        msg = "The offline timetable is not loaded"
+        raise RuntimeError(msg)
+
+    now = clock.now()
+    window = schedule_window("REGULAR")
+    api_responses = {
+        route.route_id: timetable.schedule_response(route, now, now + window)
+        for route in batch.routes
+    }
+    if not all(api_response.stop_times for api_response in api_responses.values()):
+        logger.debug(
+            f"No stop times in the timetable for route {batch.name}, "
+            f"updating the schedules from the API",
+        )
+        return None
+
+    latest_departure_times: dict[str, int] = {}
+    for route in batch.routes:
+        api_response = api_responses[route.route_id]
+        calculate_schedule_interval(api_response, route)
+        latest_departure_times[route.route_id] = process_schedule(
+            api_response,
+            route,
+            window=window,
+            from_timetable=True,
+        )
+
+    logger.debug(f"Updated the schedules for route {batch.name} from the timetable")
+    return adjust_batch_update_time(batch, "REGULAR", latest_departure_times)
+
+
+def process_batch_content(
+    batch: QueryBatch,
+    schedule_type: str,
+    cache_key: Hashable,
+    response: requests.Response | FetchResult,
+) -> dict[str, int]:
+    """Process the body of a schedule response, unless it is unchanged.
+
+    :param batch: The routes that the schedule data belongs to
+    :param schedule_type: REGULAR or REALTIME
+    :param cache_key: The key of the request in the response cache
+    :param response: The response with status code 200 or 304
+    :return: Timestamp of the latest departure by route ID
+    """
+    record_response(schedule_type, batch.routes, response)
+    unchanged, latest_departure_times = unchanged_result(
+        cache_key,
+        response.status_code,
+        response.content,
+    )
+    if unchanged:
+        log_unchanged_schedules(batch, schedule_type)
+        return latest_departure_times  # type: ignore[no-any-return]
+
+    # Decode the response only once for all the processing steps
+    latest_departure_times = process_batch_data(
+        ApiResponse.from_content(response.content),
+        batch,
+        schedule_type,
+    )
+    store_response(
+        cache_key,
+        response.headers,
+        response.content,
+        latest_departure_times,
+    )
+    return latest_departure_times
+
+
+def record_response(
+    record_type: str,
+    routes: Iterable[Route],
+    response: requests.Response | FetchResult,
+) -> None:
+    """Add a response with a body to the recording, if the responses are recorded.
+
+    :param record_type: REGULAR, REALTIME or ALERTS
+    :param routes: The routes the request was made for
+    :param response: The response with status code 200 or 304
+    """
+    if recorder is not None and response.status_code == 200:
+        recorder.record(
+            clock.now().timestamp(),
+            record_type,
+            [route.route_id for route in routes],
+            response.content,
+        )
+
+
+def log_unchanged_schedules(batch: QueryBatch, schedule_type: str) -> None:
+    """Handle a schedule response which is the same as the last processed one.
+
+    The arrivals are already scheduled, so the response is not processed,
+    only the adaptive cadence learns that the predictions didn't move.
+    """
+    logger.trace(  # type: ignore[attr-defined]
+        f"The {schedule_type} schedules for route {batch.name} didn't change "
+        f"since the last update, skipping",
+    )
+
+    cadence = schedule_cadence(schedule_type)
+    if cadence is not None:
+        now = clock.now().timestamp()
+        for route in batch.routes:
+            cadence.repeat(route.route_id, now)
+
+
+def adjust_batch_update_time(
+    batch: QueryBatch,
+    schedule_type: str,
+    latest_departure_times: dict[str, int],
+) -> datetime:
+    """Calculate the time of the next schedule update of a batch of routes.
+
+    The routes are updated together, so the soonest update needed
+    by any of the routes is used, see adjust_schedule_update_time.
+
+    :param batch: The routes that were updated
+    :param schedule_type: REGULAR or REALTIME
+    :param latest_departure_times: Timestamp of the latest departure by route ID
+    :return: The time of the next update
+    """
+    return min(
+        adjust_schedule_update_time(
+            route,
+            schedule_type,
+            next_schedule_update_time(schedule_type, route),
+            latest_departure_times.get(route.route_id, -1),
+        )
+        for route in batch.routes
+    )
+
+
+def schedule_window(schedule_type: str) -> timedelta:
+    """Return the time range a schedule update request covers from now on."""
+    return timedelta(minutes=API_SCHEDULE_PARAMETERS[schedule_type]["minutesAfter"])
+
+
+def schedule_cadence(schedule_type: str) -> AdaptiveCadence | None:
+    """Return the adaptive cadence of a schedule type, None if it is not adaptive."""
+    return realtime_cadence if schedule_type == "REALTIME" else None
+
+
+def process_schedule_response(
+    response: requests.Response,
+    route: Route,
+    schedule_type: str,
+    *,
+    streaming: bool = False,
+) -> int:
+    """Decode and process a successful arrivals-and-departures-for-stop response.
 
-    url: str = f"{settings.bkk.api_base_url}arrivals-and-departures-for-stop"
+    :param response: The HTTP response from the API server
+    :param route: The Route that the schedule data belongs to
+    :param schedule_type: REGULAR or REALTIME
+    :param streaming: Whether to parse the response incrementally,
+        the response must be requested with stream=True
+    :return: Timestamp of the latest departure in the data provided,
+        -1 if there are no valid departures
+    """
+    if streaming:
+        streaming_response = StreamingApiResponse(
+            response.iter_content(STREAM_CHUNK_SIZE),
+        )
+        interval = ScheduleInterval() if schedule_type == "REGULAR" else None
+
+        latest_departure_time: int = process_schedule(
+            streaming_response,
+            route,
+            interval,
+            schedule_window(schedule_type),
+            schedule_cadence(schedule_type),
+        )
+        streaming_response.close()
 
-    headers: dict[str, str] = {"Accept": "application/json"}
+        # Recalculate schedule intervals for REGULAR updates
+        if interval is not None:
+            interval.store(route)
 
-    # Get schedule data for all stops in the stop set
-    params: dict[str, str | int | list[str]] = {
-        "stopId": [s.stop_id for s in route.get_stop_ids()],
-        "minutesBefore": API_SCHEDULE_PARAMETERS[schedule_type]["minutesBefore"],
-        "minutesAfter": API_SCHEDULE_PARAMETERS[schedule_type]["minutesAfter"],
-        "limit": API_SCHEDULE_PARAMETERS[schedule_type]["limit"],
-        "onlyDepartures": "false",
-        "appVersion": f"BudapestMetroDisplay {__version__}",
-        "version": "4",
-        "includeReferences": "routes,alerts",
-        "key": settings.bkk.api_key,
-    }
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=5)
+        return latest_departure_time
 
-        if response.status_code == 200:
-            # Recalculate schedule intervals for REGULAR updates
-            if schedule_type == "REGULAR":
-                calculate_schedule_interval((response.json()), route)
+    # Decode the response only once for all the processing steps
+    return process_schedule_data(
+        ApiResponse.from_response(response),
+        route,
+        schedule_type,
+    )
 
-            latest_departure_time: int = process_schedule(response.json(), route)
 
-            if schedule_type != "REALTIME" and latest_departure_time == -1:
-                job_time = datetime.now() + timedelta(minutes=1)
-                logger.debug(
-                    f"There were no departures during {schedule_type} schedule update "
-                    f"for route {route.name}. "
-                    f"Next update scheduled for {job_time!s}",
-                )
-            elif (
-                schedule_type != "REALTIME"
-                and datetime.fromtimestamp(latest_departure_time) < job_time
-            ):
-                job_time = datetime.fromtimestamp(latest_departure_time) - timedelta(
-                    minutes=5,
-                )
-                if job_time < datetime.now():
-                    job_time = datetime.now() + timedelta(minutes=5)
-
-                logger.debug(
-                    f"The calculated next {schedule_type} schedule update "
-                    f"for route {route.name} is later than the last departure "
-                    f"we stored, so next update time was adjusted accordingly. "
-                    f"Next update scheduled for {job_time!s}",
-                )
-            else:
-                message: str = (
-                    f"Successfully updated {schedule_type} schedules for route "
-                    f"{route.name}. Next update scheduled for {job_time!s}"
-                )
+def process_batch_data(
+    api_response: ApiResponse,
+    batch: QueryBatch,
+    schedule_type: str,
+) -> dict[str, int]:
+    """Process a decoded response for the stops of a batch of routes.
 
-                if schedule_type == "REGULAR":
-                    logger.debug(message)
-                else:
-                    logger.trace(message)  # type: ignore[attr-defined]
-        else:
-            # Reschedule the failed action for 1 minute later
-            job_time = datetime.now() + timedelta(minutes=1)
+    The stop times of a batch with multiple routes are split by route,
+    and each route is processed on its own.
 
-            logger.error(
-                f"Failed to update {schedule_type} schedules for route "
-                f"{route.name}: {response.status_code}. "
-                f"Rescheduled for {job_time!s}.",
-            )
-    except requests.exceptions.JSONDecodeError as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            "The response did not contain valid JSON data when updating "
-            f"{schedule_type} schedules for route {route.name}. "
-            f"Rescheduled for {job_time!s}.",
-        )
-        logger.warning(e)
-    except requests.exceptions.InvalidJSONError as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            "The response contained invalid JSON data when updating "
-            f"{schedule_type} schedules for route {route.name}. "
-            f"Rescheduled for {job_time!s}.",
-        )
-        logger.warning(e)
-    except requests.exceptions.ReadTimeout as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            f"Timeout occurred when updating {schedule_type} schedules for route "
-            f"{route.name}. Rescheduled for {job_time!s}.",
-        )
-        logger.warning(e)
-    except requests.exceptions.ConnectionError as e:
-        job_time = datetime.now() + timedelta(minutes=5)
-        logger.warning(
-            f"Connection error when updating {schedule_type} schedules for route "
-            f"{route.name}. Rescheduled for {job_time!s}.",
-        )
-        logger.warning(e)
-    except requests.exceptions.RequestException as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            f"Error when updating {schedule_type} schedules for route {route.name}."
-            f"Rescheduled for {job_time!s}.",
+    :param api_response: Decoded response from the BKK OpenData API
+    :param batch: The routes that the schedule data belongs to
+    :param schedule_type: REGULAR or REALTIME
+    :return: Timestamp of the latest departure by route ID,
+        -1 if there are no valid departures for a route
+    """
+    if batch.is_single:
+        route = batch.routes[0]
+        return {
+            route.route_id: process_schedule_data(api_response, route, schedule_type),
+        }
+
+    route_responses = split_by_route(api_response, batch.routes)
+    return {
+        route.route_id: process_schedule_data(
+            route_responses[route.route_id],
+            route,
+            schedule_type,
         )
-        logger.warning(e)
+        for route in batch.routes
+    }
 
-    job_id: str = f"{route.name}_{schedule_type}"
 
-    api_update_scheduler.add_job(
-        fetch_schedule_for_route,
-        trigger="date",
-        run_date=job_time,
-        args=[route, schedule_type],
-        id=job_id,
-        replace_existing=True,
-        # If the job exists, it will be replaced with the new time
+def process_schedule_data(
+    api_response: ApiResponse,
+    route: Route,
+    schedule_type: str,
+) -> int:
+    """Process a decoded arrivals-and-departures-for-stop response.
+
+    :param api_response: Decoded response from the BKK OpenData API
+    :param route: The Route that the schedule data belongs to
+    :param schedule_type: REGULAR or REALTIME
+    :return: Timestamp of the latest departure in the data provided,
+        -1 if there are no valid departures
+    """
+    # Recalculate schedule intervals for REGULAR updates
+    if schedule_type == "REGULAR":
+        calculate_schedule_interval(api_response, route)
+
+    return process_schedule(
+        api_response,
+        route,
+        window=schedule_window(schedule_type),
+        cadence=schedule_cadence(schedule_type),
     )
 
 
@@ -316,128 +1069,238 @@ def fetch_alerts_for_route(route: Route) -> None:
     :param route: A Route object we want to update
     """
     # Calculate the next schedule time
-    job_time = datetime.now() + timedelta(seconds=settings.bkk.api_update_alerts)
+    job_time = clock.now() + timedelta(seconds=settings.bkk.api_update_alerts)
+    subject = f"alerts for route {route.name}"
 
-    url: str = f"{settings.bkk.api_base_url}route-details"
+    url, params = alert_request(route)
+    cache_key = request_key(url, params)
 
-    headers: dict[str, str] = {"Accept": "application/json"}
+    try:
+        response = http_session.get(
+            url,
+            params=params,
+            headers=conditional_headers(cache_key),
+            timeout=API_TIMEOUT,
+        )
 
-    params: dict[str, str | int] = {
-        "routeId": route.route_id,
-        "appVersion": f"BudapestMetroDisplay {__version__}",
-        "version": "4",
-        "includeReferences": "alerts",
-        "key": settings.bkk.api_key,
-    }
+        if response.status_code in {200, 304}:
+            process_alert_content(
+                route,
+                cache_key,
+                response,
+            )
+
+            logger.debug(
+                f"Successfully updated alerts for route {route.name}. "
+                f"Next update scheduled for {job_time!s}",
+            )
+        else:
+            job_time = failed_update_time(subject, response.status_code)
+    except requests.exceptions.RequestException as e:
+        job_time = request_error_update_time(e, subject)
+
+    add_alert_update_job(route, job_time)
+
+
+async def fetch_alerts_for_route_async(route: Route) -> None:
+    """Send an API request to fetch the alerts for a selected route.
+
+    Coroutine for the AsyncFetcher jobs, see fetch_alerts_for_route.
+    The response is processed in a worker thread, see
+    fetch_schedule_for_batch_async.
+
+    :param route: A Route object we want to update
+    """
+    # Calculate the next schedule time
+    job_time = clock.now() + timedelta(seconds=settings.bkk.api_update_alerts)
+    subject = f"alerts for route {route.name}"
+
+    url, params = alert_request(route)
+    cache_key = request_key(url, params)
 
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=5)
+        response = await api_fetcher.get(  # type: ignore[union-attr]
+            url,
+            params,
+            conditional_headers(cache_key),
+        )
 
-        if response.status_code == 200:
-            process_alerts(response.json(), route, is_alert_only=True)
+        if response.status_code in {200, 304}:
+            await asyncio.to_thread(
+                process_alert_content,
+                route,
+                cache_key,
+                response,
+            )
 
             logger.debug(
                 f"Successfully updated alerts for route {route.name}. "
                 f"Next update scheduled for {job_time!s}",
             )
         else:
-            # Reschedule the failed action for 1 minute later
-            job_time = datetime.now() + timedelta(minutes=1)
+            job_time = failed_update_time(subject, response.status_code)
+    except requests.exceptions.RequestException as e:
+        job_time = request_error_update_time(e, subject)
 
-            logger.error(
-                f"Failed to update alerts for route {route.name}, "
-                f" HTTP {response.status_code}. "
-                f"Rescheduled for {job_time!s}.",
-            )
-    except requests.exceptions.JSONDecodeError as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            "The response did not contain valid JSON data when updating "
-            f"alerts for route {route.name}. "
-            f"Next update scheduled for {job_time!s}",
-        )
-        logger.warning(e)
-    except requests.exceptions.InvalidJSONError as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            "The response contained invalid JSON data when updating "
-            f"alerts for route {route.name}. "
-            f"Next update scheduled for {job_time!s}",
-        )
-        logger.warning(e)
-    except requests.exceptions.ReadTimeout as e:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.warning(
-            f"Timeout occurred when updating alerts for route {route.name}. "
-            f"Next update scheduled for {job_time!s}",
-        )
-        logger.warning(e)
-    except requests.exceptions.ConnectionError:
-        job_time = datetime.now() + timedelta(minutes=5)
-        logger.exception(
-            f"Connection error when updating alerts for route {route.name}. "
-            f"Next update scheduled for {job_time!s}",
-        )
-    except requests.exceptions.RequestException:
-        job_time = datetime.now() + timedelta(minutes=1)
-        logger.exception(
-            f"Error when updating alerts for route {route.name}. "
-            f"Next update scheduled for {job_time!s}",
-        )
+    add_alert_update_job(route, job_time)
 
-    job_id: str = f"{route.route_id}_ALERTS"
 
-    api_update_scheduler.add_job(
-        fetch_alerts_for_route,
-        trigger="date",
-        run_date=job_time,
-        args=[route],
-        id=job_id,
-        replace_existing=True,
-        # If the job exists, it will be replaced with the new time
+def process_alert_content(
+    route: Route,
+    cache_key: Hashable,
+    response: requests.Response | FetchResult,
+) -> None:
+    """Process the body of an alert response, it is only decoded if it changed.
+
+    The alerts of an unchanged response are processed again from the cache,
+    because whether a NO_SERVICE alert applies to a stop also depends on
+    its pending arrivals, which change as the vehicles depart.
+
+    :param route: The Route that the alert data belongs to
+    :param cache_key: The key of the request in the response cache
+    :param response: The response with status code 200 or 304
+    """
+    record_response("ALERTS", [route], response)
+    unchanged, api_response = unchanged_result(
+        cache_key,
+        response.status_code,
+        response.content,
     )
+    if unchanged:
+        logger.trace(  # type: ignore[attr-defined]
+            f"The alerts for route {route.name} didn't change "
+            f"since the last update, using the decoded response",
+        )
+    else:
+        api_response = ApiResponse.from_content(response.content)
+        store_response(cache_key, response.headers, response.content, api_response)
+
+    process_alerts(api_response, route, is_alert_only=True)
+
+
+class ScheduleInterval:
+    """Calculate the average time between consecutive departures of a Route.
+
+    The stop times are added one by one, and only the ones with the same stopId
+    and stopHeadsign as the first stop time are used for the calculation.
+    """
+
+    __slots__ = ("count", "deltas", "field", "last_time", "stop_headsign", "stop_id")
+
+    def __init__(self) -> None:
+        """Create an empty calculation."""
+        self.count: int = 0
+        self.deltas: list[int] = []
+        # The necessary data from the first stop time
+        self.stop_id: str = ""
+        self.stop_headsign: str = ""
+        self.field: str = "arrivalTime"
+        self.last_time: int = 0
+
+    def add(self, stop_time: Any) -> None:
+        """Add a TransitScheduleStopTime to the calculation."""
+        self.count += 1
+
+        if self.count == 1:
+            self.stop_id = stop_time.get("stopId", "")
+            self.stop_headsign = stop_time.get("stopHeadsign", "")
+            if stop_time.get("departureTime") is not None:
+                self.field = "departureTime"
+            self.last_time = stop_time.get(self.field, 0)
+            return
+
+        # Check if the stopId and stopHeadsign are the same as the first one
+        if (
+            stop_time.get("stopId") != self.stop_id
+            or stop_time.get("stopHeadsign") != self.stop_headsign
+        ):
+            return
+
+        current_time: int = stop_time.get(self.field, 0)
+        self.deltas.append(current_time - self.last_time)
+        self.last_time = current_time
+
+    def observe(self, stop_times: Iterable[Any]) -> Iterator[Any]:
+        """Add the stop times to the calculation while passing them through."""
+        for stop_time in stop_times:
+            self.add(stop_time)
+            yield stop_time
+
+    def store(self, route: Route) -> None:
+        """Store the calculated schedule interval in the Route.
+
+        :param route: The Route that the stop times belong to
+        """
+        if self.count < 2:
+            logger.debug(
+                f"Not enough schedule data found when updating "
+                f"schedule intervals for route {route.name}",
+            )
+            return
+
+        avg = sum(self.deltas) / len(self.deltas) / 60 if self.deltas else -1
+
+        # Store result
+        with route.lock:
+            route.schedule_interval = avg
+
+        logger.debug(
+            f"Recalculated departure delay for route {route.name}, "
+            f"schedule interval: {avg:.1f} min, "
+            f"delay: {calculate_departure_delay(route)} sec",
+        )
 
 
-def process_schedule(json_response: Any, route: Route) -> int:
+def process_schedule(  # noqa: PLR0913
+    api_response: ApiResponse,
+    route: Route,
+    interval: ScheduleInterval | None = None,
+    window: timedelta | None = None,
+    cadence: AdaptiveCadence | None = None,
+    *,
+    from_timetable: bool = False,
+) -> int:
     """Process the API response and store the departures.
 
     Processes the ArrivalsAndDeparturesForStopOTPMethodResponse API response
     from the arrivals-and-departures-for-stop method.
     As a result, stores the retrieved departures in an APScheduler instance
     which will control the vehicle_present status of the StopIds.
+    Only the arrivals which are new, moved more than the threshold
+    of the ArrivalTable, or disappeared since the previous update
+    of the Route are applied to the scheduler.
 
-    :param json_response: JSON return data from the BKK OpenData API
+    :param api_response: Decoded response from the BKK OpenData API
     :param route: The Route that the schedule data belongs to
+    :param interval: If provided, the stop times are also added to it
+        to calculate the schedule interval in the same pass
+    :param window: The time range the request covered from now on,
+        the scheduled arrivals of the Route within it which are missing from
+        the response are cancelled. None means no arrivals are cancelled.
+    :param cadence: If provided, the arrivals are passed to it
+        to adapt the update interval of the Route
+    :param from_timetable: If True, the stop times come from the offline
+        timetable: the arrivals scheduled by realtime predictions are neither
+        moved nor cancelled, the service state of the stops is left to the alerts
+        and the API, and the arrivals don't hide the NO_SERVICE alerts
     :return: Timestamp of the latest departure in the data provided,
         -1 if there are no valid departures
     """
     # Check if JSON looks valid
-    if (
-        not json_response
-        or "data" not in json_response
-        or "entry" not in json_response["data"]
-    ):
+    entry = api_response.entry
+    if entry is None:
         logger.error(
             f"No valid schedule data in API response for route {route.name}",
         )
         return -1
 
     # Check if we exceeded the query limit
-    if json_response["data"].get("limitExceeded", "false") == "true":
+    if api_response.limit_exceeded:
         logger.warning(f"Query limit is exceeded when updating route {route.name}")
 
     # Get routeId
-    if (
-        "routeIds" in json_response["data"]["entry"]
-        and len(json_response["data"]["entry"]["routeIds"]) > 0
-    ):
-        route_id: str = json_response["data"]["entry"].get("routeIds", [])[0]
-    elif (
-        "routes" in json_response["data"]["references"]
-        and len(json_response["data"]["references"]["routes"]) > 0
-    ):
-        route_id = next(json_response["data"]["references"]["routes"].keys())
-    else:
+    route_id = api_response.route_id
+    if route_id is None:
         logger.warning(
             f"No route IDs found or the list is empty when updating route {route.name}",
         )
@@ -452,190 +1315,218 @@ def process_schedule(json_response: Any, route: Route) -> int:
         return -1
 
     # Get stopId when there is only one stop in the response
-    stop_id_global: str = json_response["data"]["entry"].get("stopId", None)
-
-    # Get stopTimes from TransitArrivalsAndDepartures
-    stop_times = json_response["data"]["entry"].get("stopTimes", [])
-    if len(stop_times) == 0:
-        logger.trace(  # type: ignore[attr-defined]
-            f"No schedule data found when updating route {route.name}",
-        )
+    stop_id_global: str | None = entry.get("stopId", None)
 
     latest_departure_time: int = -1
-
-    with route.lock:
-        stop_ids_list: list[str] = [s.stop_id for s in route.get_stop_ids()]
-
-    # Iterate through the TransitScheduleStopTimes in the TransitArrivalsAndDepartures
-    for stop_time in stop_times:
-        trip_id: str = stop_time.get("tripId")
-
-        # Get stopId when the response contains schedules for multiple stops
-        stop_id = stop_time.get("stopId") if "stopId" in stop_time else stop_id_global
-
-        # Check if we are interested in the provided stopId
-        if stop_id not in stop_ids_list:
-            logger.debug(
-                f"Got update for stop ID {stop_id}, route {route.name}, "
-                f"but we don't need that, skipping",
-            )
-            continue
-
-        route_departure_delay: int = calculate_departure_delay(route)
-
-        # Get the predicted or scheduled departure and arrival times
-        # CASE #1: Both arrival and departure time available as predicted
-        # [middle stop with realtime data]
-        arrival_time: int
-        delay: int
-        if (
-            "predictedArrivalTime" in stop_time
-            and "predictedDepartureTime" in stop_time
-            and not stop_time.get("uncertain", False)
+    record_count: int = 0
+    now: datetime = clock.now()
+    # The new and moved arrivals of the Route, which are applied in one batch
+    arrivals: list[ScheduledEvent] = []
+    changed: dict[str, AppliedArrival] = {}
+    # The IDs of the upcoming arrivals in the response
+    seen: set[str] = set()
+    soonest_arrival: float | None = None
+    # The predicted arrival times by arrival ID for the adaptive polling
+    predictions: dict[str, int] = {}
+
+    stop_times: Iterable[Any] = api_response.iter_stop_times()
+    if interval is not None:
+        stop_times = interval.observe(stop_times)
+
+    # Only the differences from the arrivals applied by the previous updates
+    # are applied, so the updates of the Route can't interleave
+    table = arrival_table(route.route_id)
+    with table.lock:
+        # Iterate through the decoded TransitScheduleStopTimes
+        # in the TransitArrivalsAndDepartures
+        for record in decode_stop_times(
+            stop_times,
+            route,
+            stop_id_global,
+            calculate_departure_delay(route),
         ):
-            # Arrival time is different from the departure,
-            # let's use the difference between them for the departure delay
-            if stop_time.get("predictedArrivalTime") != stop_time.get(
-                "predictedDepartureTime",
-            ):
-                arrival_time = stop_time.get("predictedArrivalTime") + randint(-3, 3)
-                delay = stop_time.get("predictedDepartureTime") - stop_time.get(
-                    "predictedArrivalTime",
-                )
-            # Arrival time is the same as the departure,
-            # use predefined delay for departure delay
-            else:
-                arrival_time = (
-                    stop_time.get(
-                        "predictedDepartureTime",
-                    )
-                    - route_departure_delay
-                    + randint(-3, 3)
-                )
-                delay = route_departure_delay
-        # CASE #2: Only predicted arrival time is available
-        # [end stop with realtime data]
-        # Use the predefined delay for departure delay
-        elif "predictedArrivalTime" in stop_time and not stop_time.get(
-            "uncertain",
-            False,
-        ):
-            arrival_time = (
-                stop_time.get(
-                    "predictedArrivalTime",
-                )
-                - route_departure_delay
-                + randint(-3, 3)
-            )
-            delay = route_departure_delay
-        # CASE #3: Only predicted departure time is available
-        # [start stop with realtime data]
-        # Use the predefined delay for departure delay
-        elif "predictedDepartureTime" in stop_time and not stop_time.get(
-            "uncertain",
-            False,
-        ):
-            arrival_time = (
-                stop_time.get(
-                    "predictedDepartureTime",
-                )
-                - route_departure_delay
-                + randint(-3, 3)
-            )
-            delay = route_departure_delay
-        # CASE #4: Both arrival and departure time available as scheduled time
-        # [middle stop, no realtime data]
-        elif "arrivalTime" in stop_time and "departureTime" in stop_time:
-            # Arrival time is different from the departure,
-            # let's use the difference between them for the departure delay
-            if stop_time.get("arrivalTime") != stop_time.get("departureTime"):
-                arrival_time = stop_time.get("arrivalTime") + randint(-3, 3)
-                delay = stop_time.get("departureTime") - stop_time.get("arrivalTime")
-            # Arrival time is the same as the departure,
-            # use predefined delay for departure delay
-            else:
-                arrival_time = (
-                    stop_time.get("departureTime")
-                    - route_departure_delay
-                    + randint(-3, 3)
-                )
-                delay = route_departure_delay
-        # CASE #5: Only scheduled arrival time is available
-        # [end stop with no realtime data]
-        # Use the predefined delay for departure delay
-        elif "arrivalTime" in stop_time:
-            arrival_time = (
-                stop_time.get("arrivalTime") - route_departure_delay + randint(-3, 3)
-            )
-            delay = route_departure_delay
-        # CASE #6: Only scheduled departure time is available
-        # [start stop with no realtime data]
-        # Use the predefined delay for departure delay
-        elif "departureTime" in stop_time:
-            arrival_time = (
-                stop_time.get("departureTime") - route_departure_delay + randint(-3, 3)
-            )
-            delay = route_departure_delay
-        # CASE #7: No valid time data is available
-        else:
-            logger.debug(
-                f"No valid arrival/departure time found "
-                f"when updating stop {stop_id}, route {route.name}",
-            )
-            continue
+            record_count += 1
+            sid = record.sid
 
-        # We processed valid schedule data for this stop,
-        # that means that the stop is operational
-        sid = route.get_stop_id(stop_id)
-        if sid is not None:
-            with sid.stop.lock:
-                sid.in_service = True
+            # We processed valid schedule data for this stop,
+            # that means that the stop is operational
+            if not from_timetable:
+                with sid.stop.lock:
+                    sid.in_service = True
 
             # Schedule the action before the departure."""
-            job_id: str = f"{stop_id}+{trip_id}_arrival"
-            job_time: datetime = datetime.fromtimestamp(arrival_time)
-
-            latest_departure_time = max(latest_departure_time, arrival_time)
-
-            if job_time > datetime.now():
-                departure_scheduler.add_job(
-                    vehicle_arrival,
-                    trigger="date",
-                    run_date=job_time,
-                    args=[sid, trip_id, job_time, delay],
-                    id=job_id,
-                    replace_existing=True,
-                    # If the job exists, it will be replaced with the new time
-                )
+            job_id: str = f"{sid.stop_id}+{record.trip_id}_arrival"
+
+            latest_departure_time = max(latest_departure_time, record.arrival)
+
+            if record.arrival > now.timestamp():
+                seen.add(job_id)
+                if soonest_arrival is None or record.arrival < soonest_arrival:
+                    soonest_arrival = record.arrival
+                if cadence is not None and record.predicted:
+                    predictions[job_id] = record.arrival
+
+                # Keep the scheduled arrival if it didn't move enough,
+                # or if the timetable would override a prediction
+                if table.is_applied(
+                    job_id,
+                    record.arrival,
+                    record.dwell,
+                    timetable=from_timetable,
+                ) or (from_timetable and table.is_predicted(job_id)):
+                    continue
 
-                logger.trace(  # type: ignore[attr-defined]
-                    f"Scheduled action for departure: stop_id={stop_id}, "
-                    f"trip_id={trip_id}, route {route.name}, "
-                    f"departure_time={datetime.fromtimestamp(arrival_time)!s}",
+                changed[job_id] = AppliedArrival(
+                    record.arrival,
+                    record.dwell,
+                    record.predicted,
+                    from_timetable,
+                )
+                arrivals.append(
+                    arrival_event(sid, record.trip_id, record.arrival, record.dwell),
                 )
             else:
                 logger.trace(  # type: ignore[attr-defined]
-                    f"Action for departure: stop_id={stop_id}, trip_id={trip_id}, "
-                    f"route {route.name}, "
-                    f"departure_time={datetime.fromtimestamp(arrival_time)!s} "
+                    f"Action for departure: stop_id={sid.stop_id}, "
+                    f"trip_id={record.trip_id}, route {route.name}, "
+                    f"departure_time={datetime.fromtimestamp(record.arrival)!s} "
                     f"was in the past, skipping",
                 )
-        else:
-            logger.warning(
-                "Invalid stop ID found when processing schedule data: "
-                f"stop_id={stop_id}, route {route.name}",
+
+        if record_count == 0:
+            logger.trace(  # type: ignore[attr-defined]
+                f"No schedule data found when updating route {route.name}",
             )
 
+        # Apply the changes of the arrivals in one transaction.
+        # The missing arrivals are only cancelled if the response wasn't truncated,
+        # and it had schedule data at all
+        removed: list[str] = []
+        if window is not None and record_count > 0 and not api_response.limit_exceeded:
+            removed = table.missing(
+                seen,
+                (now + window).timestamp(),
+                keep_predicted=from_timetable,
+            )
+        update = departure_scheduler.apply_delta(route.route_id, arrivals, removed)
+        table.apply(changed, removed, now.timestamp())
+
+    logger.trace(  # type: ignore[attr-defined]
+        f"Scheduled arrivals for route {route.name}: {update.inserted} new, "
+        f"{update.moved} moved, "
+        f"{len(seen) - len(arrivals) + update.unchanged} unchanged, "
+        f"{update.cancelled} cancelled",
+    )
+
+    if cadence is not None:
+        update_interval = cadence.observe(
+            route.route_id,
+            predictions,
+            soonest_arrival,
+            now.timestamp(),
+        )
+        drift = cadence.drift(route.route_id)
+        logger.trace(  # type: ignore[attr-defined]
+            f"Update interval for route {route.name}: {update_interval:.0f} sec, "
+            f"prediction drift: {'-' if drift is None else f'{drift:.0f} sec'}",
+        )
+
     # Check if there are any active alerts in the response and process them
-    alerts = json_response["data"]["entry"].get("alertIds", [])
+    alerts = entry.get("alertIds", [])
     if len(alerts) > 0:
-        process_alerts(json_response, route)
+        process_alerts(api_response, route)
 
     return latest_departure_time
 
 
+def arrival_event(
+    sid: StopId,
+    trip_id: str,
+    arrival: float,
+    dwell: int,
+) -> ScheduledEvent:
+    """Create the event of a vehicle arrival.
+
+    :param sid: The StopId the vehicle arrives to
+    :param trip_id: tripId from the BKK OpenData API
+    :param arrival: Timestamp of the arrival
+    :param dwell: Time in seconds between the arrival and the departure
+    :return: The event, its ID is unique for the StopId and the trip
+    """
+    job_time: datetime = datetime.fromtimestamp(arrival)
+    return ScheduledEvent(
+        f"{sid.stop_id}+{trip_id}_arrival",
+        vehicle_arrival,
+        job_time,
+        (sid, trip_id, job_time, dwell),
+        key=sid.stop_id,
+    )
+
+
+def restore_arrivals(
+    route: Route,
+    arrivals: Iterable[tuple[StopId, str, float, int]],
+) -> int:
+    """Schedule previously known arrivals of a Route, e.g. from a snapshot.
+
+    The arrivals are also added to the ArrivalTable of the Route,
+    so the next update only applies its differences from them.
+
+    :param route: The Route the arrivals belong to
+    :param arrivals: StopId, tripId, arrival timestamp and dwell time
+        of the arrivals
+    :return: The number of scheduled arrivals
+    """
+    now = clock.now().timestamp()
+    events: list[ScheduledEvent] = []
+    changed: dict[str, AppliedArrival] = {}
+    for sid, trip_id, arrival, dwell in arrivals:
+        if arrival <= now:
+            continue
+        event = arrival_event(sid, trip_id, arrival, dwell)
+        events.append(event)
+        changed[event.id] = AppliedArrival(arrival, dwell)
+
+    table = arrival_table(route.route_id)
+    with table.lock:
+        departure_scheduler.apply_delta(route.route_id, events)
+        table.apply(changed, [], now)
+    return len(events)
+
+
+def arrival_table(route_id: str) -> ArrivalTable:
+    """Return the table of the arrivals applied to the scheduler for a route.
+
+    :param route_id: The route ID of the Route
+    :return: The table of the route, created at the first update
+    """
+    with arrival_tables_lock:
+        table = arrival_tables.get(route_id)
+        if table is None:
+            table = arrival_tables[route_id] = ArrivalTable()
+        return table
+
+
+def has_pending_arrival(stop_id: StopId) -> bool:
+    """Check whether there is a scheduled vehicle arrival for a StopId.
+
+    The arrivals are looked up from the index of the departure scheduler,
+    without scanning every scheduled event. The arrivals scheduled from
+    the offline timetable are not counted, they don't know about the alerts.
+
+    :param stop_id: The StopId to check
+    :return: True if there is at least one pending arrival for the StopId
+    """
+    with arrival_tables_lock:
+        table = arrival_tables.get(stop_id.stop.route.route_id)
+    return any(
+        table is None or not table.is_timetable(event.id)
+        for event in departure_scheduler.get_events(stop_id.stop_id)
+    )
+
+
 def process_alerts(
-    json_response: Any,
+    api_response: ApiResponse,
     route: Route,
     *,
     is_alert_only: bool = False,
@@ -647,34 +1538,27 @@ def process_alerts(
     It checks time between the schedules for each route
     and updates the ACTION_DELAY dictionary accordingly.
 
-    :param json_response: JSON return data from the BKK OpenData API
+    :param api_response: Decoded response from the BKK OpenData API
     :param route: The Route that the alert data belongs to
     :param is_alert_only: If True, the API data comes from an alert-only update,
         not a regular schedule update
     :return:
     """
     # Check if JSON looks valid
-    if (
-        not json_response
-        or "data" not in json_response
-        or "references" not in json_response["data"]
-        or "alerts" not in json_response["data"]["references"]
-    ):
+    alerts = api_response.alerts
+    if alerts is None:
         logger.error(f"No valid alerts data in API response for route {route.name}")
         return
 
-    alerts = json_response["data"]["references"].get("alerts")
     if len(alerts) == 0:
         logger.trace(  # type: ignore[attr-defined]
             f"No alert data found when updating route {route.name}",
         )
 
-    stop_ids_list: list[str] = [s.stop_id for s in route.get_stop_ids()]
-
     # Iterate through the TransitScheduleStopTimes in the TransitArrivalsAndDepartures
     for alert_details in alerts.values():
         # If the start time of the alert is in the future, return False
-        if alert_details["start"] > datetime.now().timestamp():
+        if alert_details["start"] > clock.now().timestamp():
             continue
 
         # Iterate the TransitAlertRoutes in the TransitAlert
@@ -695,46 +1579,34 @@ def process_alerts(
             # Iterate through stopIds in the TransitAlertRoute
             for stop_id in alert_route.get("stopIds", []):
                 # Check if we are interested in the stopId
-                if stop_id not in stop_ids_list:
+                sid = route.get_stop_id(stop_id)
+                if sid is None:
                     continue
 
-                sid = route.get_stop_id(stop_id)
-                if sid is not None:
-                    with sid.stop.lock:
-                        # Check whether the stop is operational now
-                        if sid.in_service:
-                            # Check if we have a schedule for this stop_id,
-                            # because if we have, then the stop is not out of service
-                            soonest_job = aps_helpers.find_soonest_job_by_argument(
-                                departure_scheduler,
-                                stop_id,
-                                0,
+                with sid.stop.lock:
+                    # Check whether the stop is operational now
+                    if sid.in_service:
+                        # Check if we have a schedule for this stop_id,
+                        # because if we have, then the stop is not out of service
+                        if has_pending_arrival(sid):
+                            # We found at least one schedule for this stop,
+                            # so we'll ignore the NO_SERVICE alert
+                            logger.debug(
+                                f"Found NO_SERVICE alert {alert_details['id']} "
+                                f"for {sid.stop.name}, route {route.name}, "
+                                f"but there are active schedules for that stop, "
+                                f"so we'll ignore that",
                             )
-
-                            if soonest_job is not None:
-                                # We found at least one schedule for this stop,
-                                # so we'll ignore the NO_SERVICE alert
-                                logger.debug(
-                                    f"Found NO_SERVICE alert {alert_details['id']} "
-                                    f"for {sid.stop.name}, route {route.name}, "
-                                    f"but there are active schedules for that stop, "
-                                    f"so we'll ignore that",
-                                )
-                            else:
-                                # No schedule found for this stop,
-                                # so we'll process the NO_SERVICE alert
-                                logger.debug(
-                                    f"Found NO_SERVICE alert {alert_details['id']} "
-                                    f"for {sid.stop.name}, route {route.name}",
-                                )
-                                # Set the operation state of this StopId
-                                sid.in_service = False
-                                is_alert_found = True
-                else:
-                    logger.warning(
-                        "Invalid stop ID found when processing alerts: "
-                        f"stop_id={stop_id}, route {route.name}",
-                    )
+                        else:
+                            # No schedule found for this stop,
+                            # so we'll process the NO_SERVICE alert
+                            logger.debug(
+                                f"Found NO_SERVICE alert {alert_details['id']} "
+                                f"for {sid.stop.name}, route {route.name}",
+                            )
+                            # Set the operation state of this StopId
+                            sid.in_service = False
+                            is_alert_found = True
 
             # Update the regular schedule data for the route
             # because of the active alert
@@ -760,7 +1632,7 @@ def vehicle_arrival(
     :param delay: The amount of time needs to be elapsed in seconds
         between the turn-on and turn-off action
     """
-    if job_time < datetime.now() - timedelta(seconds=20):
+    if job_time < clock.now() - timedelta(seconds=20):
         logger.trace(  # type: ignore[attr-defined]
             "Action trigger time is in the past, skipping",
         )
@@ -778,14 +1650,12 @@ def vehicle_arrival(
     job_time_departure = job_time + timedelta(seconds=delay)
     job_id: str = f"{stop_id.stop_id}+{trip_id}_departure"
 
-    departure_scheduler.add_job(
+    # If the event exists, it will be replaced with the new time
+    departure_scheduler.add_event(
+        job_id,
         vehicle_departure,
-        trigger="date",
-        run_date=job_time_departure,
-        args=[stop_id, trip_id, job_time_departure],
-        id=job_id,
-        replace_existing=True,
-        # If the job exists, it will be replaced with the new time
+        job_time_departure,
+        (stop_id, trip_id, job_time_departure),
     )
 
 
@@ -803,7 +1673,7 @@ def vehicle_departure(
     :param trip_id: tripId from the BKK OpenData API
     :param job_time: The time this job was scheduled in APScheduler
     """
-    if job_time < datetime.now() - timedelta(seconds=20):
+    if job_time < clock.now() - timedelta(seconds=20):
         logger.trace(  # type: ignore[attr-defined]
             "Action trigger time is in the past, skipping",
         )
@@ -819,7 +1689,7 @@ def vehicle_departure(
         stop_id.vehicle_present = False
 
 
-def calculate_schedule_interval(json_response: Any, route: Route) -> None:
+def calculate_schedule_interval(api_response: ApiResponse, route: Route) -> None:
     """Process API response to determine the interval between schedules for a route.
 
     Process the ArrivalsAndDeparturesForStopOTPMethodResponse API response
@@ -827,16 +1697,12 @@ def calculate_schedule_interval(json_response: Any, route: Route) -> None:
     It checks time between the schedules for each route
     and updates the Route's schedule_interval property accordingly.
 
-    :param json_response: JSON return data from the BKK OpenData API
+    :param api_response: Decoded response from the BKK OpenData API
     :param route: The Route that the schedule data belongs to
     :return:
     """
     # Check if JSON looks valid
-    if (
-        not json_response
-        or "data" not in json_response
-        or "entry" not in json_response["data"]
-    ):
+    if api_response.entry is None:
         logger.error(
             f"No valid schedule data in API response "
             f"for schedule intervals for route {route.name}",
@@ -844,25 +1710,15 @@ def calculate_schedule_interval(json_response: Any, route: Route) -> None:
         return
 
     # Check if we exceeded the query limit
-    if json_response["data"].get("limitExceeded", "false") == "true":
+    if api_response.limit_exceeded:
         logger.warning(
             f"Query limit is exceeded when updating "
             f"schedule intervals for route {route.name}",
         )
 
     # Get routeId
-    route_id: str
-    if (
-        "routeIds" in json_response["data"]["entry"]
-        and len(json_response["data"]["entry"]["routeIds"]) > 0
-    ):
-        route_id = json_response["data"]["entry"].get("routeIds", [])[0]
-    elif (
-        "routes" in json_response["data"]["references"]
-        and len(json_response["data"]["references"]["routes"]) > 0
-    ):
-        route_id = next(json_response["data"]["references"]["routes"].keys())
-    else:
+    route_id = api_response.route_id
+    if route_id is None:
         logger.warning(
             f"No route IDs found or the list is empty when updating "
             f"schedule intervals for route {route.name}",
@@ -877,53 +1733,13 @@ def calculate_schedule_interval(json_response: Any, route: Route) -> None:
         )
         return
 
-    # Get stopTimes from TransitArrivalsAndDepartures
-    stop_times = json_response["data"]["entry"].get("stopTimes", [])
-    if len(stop_times) < 2:
-        logger.debug(
-            f"Not enough schedule data found when updating "
-            f"schedule intervals for route {route.name}",
-        )
-        return
-
-    # Variable to store the necessary data from the first two relevant stops
-    stop_id: str = stop_times[0].get("stopId", "")
-    stop_headsign: str = stop_times[0].get("stopHeadsign", "")
-    field: str
-
-    if stop_times[0].get("departureTime") is not None:
-        field = "departureTime"
-    else:
-        field = "arrivalTime"
-    last_time: int = stop_times[0].get(field, 0)
-
-    deltas: list[int] = []
-
     # Iterate through the TransitScheduleStopTimes
     # in the TransitArrivalsAndDepartures
-    for stop_time in stop_times[1:]:  # skip the first item
-        # Check if the stopId and stopHeadsign are the same as the first one
-        if (
-            stop_time.get("stopId") != stop_id
-            or stop_time.get("stopHeadsign") != stop_headsign
-        ):
-            continue
-
-        current_time: int = stop_time.get(field, 0)
-        delta: int = current_time - last_time
-        deltas.append(delta)
-        last_time = current_time
-
-    avg = sum(deltas) / len(deltas) / 60 if deltas else -1
+    interval = ScheduleInterval()
+    for stop_time in api_response.iter_stop_times():
+        interval.add(stop_time)
 
-    # Store result
-    with route.lock:
-        route.schedule_interval = avg
-
-    logger.debug(
-        f"Recalculated departure delay for route {route.name}, schedule interval:  "
-        f"{avg:.1f} min, delay: {calculate_departure_delay(route)} sec",
-    )
+    interval.store(route)
 
 
 def calculate_departure_delay(route: Route) -> int:
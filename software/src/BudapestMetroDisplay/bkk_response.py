@@ -0,0 +1,385 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import json
+import logging
+from random import randint
+from typing import TYPE_CHECKING, Any
+
+import requests
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from BudapestMetroDisplay.model import Route, StopId
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from the network in streaming mode
+STREAM_CHUNK_SIZE: int = 16384
+# ijson prefix of the stop times in the arrivals-and-departures-for-stop response
+STOP_TIMES_PREFIX: str = "data.entry.stopTimes"
+_STOP_TIME_ITEM_PREFIX: str = f"{STOP_TIMES_PREFIX}.item"
+
+
+def streaming_available() -> bool:
+    """Return whether the ijson package is available for the streaming mode."""
+    return ijson is not None
+
+
+def decode_json(content: bytes) -> Any:
+    """Decode a JSON document, using orjson when it is available.
+
+    :param content: The raw body of the API response
+    :return: The decoded JSON document
+    :raises requests.exceptions.JSONDecodeError: If the content is not valid JSON
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+        raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+    except ValueError as e:
+        # Invalid UTF-8 content
+        raise requests.exceptions.JSONDecodeError(str(e), "", 0) from e
+
+
+class ApiResponse:
+    """Decoded BKK OpenData API response.
+
+    The response body is decoded only once, and the processing functions
+    (schedule interval, schedule and alert processing) share this object.
+    """
+
+    __slots__ = ("data", "entry", "raw", "references")
+
+    def __init__(self, raw: Any) -> None:
+        """Wrap an already decoded API response.
+
+        :param raw: JSON return data from the BKK OpenData API
+        """
+        self.raw: Any = raw
+
+        data = raw.get("data") if isinstance(raw, dict) else None
+        self.data: dict[str, Any] = data if isinstance(data, dict) else {}
+        # The entry is None when the response doesn't contain one
+        self.entry: dict[str, Any] | None = self.data.get("entry")
+        self.references: dict[str, Any] = self.data.get("references") or {}
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> ApiResponse:
+        """Decode the body of an HTTP response.
+
+        :param response: The HTTP response from the API server
+        :return: The decoded API response
+        """
+        return cls.from_content(response.content)
+
+    @classmethod
+    def from_content(cls, content: bytes) -> ApiResponse:
+        """Decode the raw body of an HTTP response.
+
+        :param content: The raw body of the API response
+        :return: The decoded API response
+        """
+        return cls(decode_json(content))
+
+    @property
+    def limit_exceeded(self) -> bool:
+        """Whether the API server truncated the response because of the limit."""
+        return self.data.get("limitExceeded", "false") in {"true", True}
+
+    @property
+    def route_id(self) -> str | None:
+        """The routeId of the response, None if it is not available."""
+        if self.entry is not None and len(self.entry.get("routeIds", [])) > 0:
+            return str(self.entry["routeIds"][0])
+        routes = self.references.get("routes") or {}
+        if len(routes) > 0:
+            return str(next(iter(routes)))
+        return None
+
+    @property
+    def stop_times(self) -> list[Any]:
+        """The TransitScheduleStopTimes of the entry."""
+        if self.entry is None:
+            return []
+        return self.entry.get("stopTimes", [])  # type: ignore[no-any-return]
+
+    @property
+    def alerts(self) -> dict[str, Any] | None:
+        """The TransitAlerts in the references, None if they are not included."""
+        return self.references.get("alerts")
+
+    def iter_stop_times(self) -> Iterator[Any]:
+        """Iterate through the TransitScheduleStopTimes of the entry."""
+        return iter(self.stop_times)
+
+    def close(self) -> None:
+        """Release the resources of the response."""
+
+
+class StreamingApiResponse(ApiResponse):
+    """Incrementally parsed arrivals-and-departures-for-stop API response.
+
+    Only the start of the document is parsed up front, until the stop times.
+    The stop times are parsed one by one while they are iterated,
+    and they are not kept in memory. The rest of the document
+    (e.g. the alerts in the references) is only parsed when it is needed.
+
+    If the entry doesn't contain the routeIds before the stop times,
+    the stop times are buffered to be able to look up the route in the references.
+    """
+
+    __slots__ = ("_buffer", "_builder", "_coro", "_events", "_parser", "_streaming")
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        """Start parsing a response body.
+
+        :param chunks: The response body in chunks, e.g. response.iter_content()
+        """
+        if ijson is None:
+            msg = "The ijson package is required for streaming API responses"
+            raise RuntimeError(msg)
+
+        self._events: list[tuple[str, str, Any]] = ijson.sendable_list()
+        self._coro = ijson.parse_coro(self._events, use_float=True)
+        self._parser: Iterator[tuple[str, str, Any]] = self._parse(chunks)
+        # Builds the document without the stop times
+        self._builder = ijson.ObjectBuilder()
+        self._buffer: list[Any] | None = None
+        # Whether the parser is inside the stop times array
+        self._streaming: bool = False
+
+        super().__init__({})
+        self._read_document(until=(STOP_TIMES_PREFIX, "start_array"))
+
+    def _parse(self, chunks: Iterable[bytes]) -> Iterator[tuple[str, str, Any]]:
+        """Yield the ijson events of the response body."""
+        try:
+            for chunk in chunks:
+                self._coro.send(chunk)
+                yield from self._events
+                del self._events[:]
+            self._coro.close()
+            yield from self._events
+            del self._events[:]
+        except ijson.JSONError as e:
+            raise requests.exceptions.JSONDecodeError(str(e), "", 0) from e
+
+    def _read_document(self, until: tuple[str, str] | None = None) -> None:
+        """Parse the document, skipping the stop times, until the given event.
+
+        :param until: (prefix, event) to stop after, parses the whole document if None
+        """
+        for prefix, event, value in self._parser:
+            if prefix == _STOP_TIME_ITEM_PREFIX or prefix.startswith(
+                f"{_STOP_TIME_ITEM_PREFIX}.",
+            ):
+                continue
+
+            self._builder.event(event, value)
+            if prefix == STOP_TIMES_PREFIX:
+                self._streaming = event == "start_array"
+            if (prefix, event) == until:
+                break
+
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Update the parts of the document that have been parsed since."""
+        ApiResponse.__init__(self, getattr(self._builder, "value", {}))
+
+    def _read_stop_times(self) -> Iterator[Any]:
+        """Parse and yield the stop times one by one."""
+        builder: Any = None
+        depth: int = 0
+
+        for prefix, event, value in self._parser:
+            if prefix == STOP_TIMES_PREFIX and event == "end_array":
+                self._builder.event(event, value)
+                self._streaming = False
+                return
+
+            if builder is None:
+                builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+
+            if event in {"start_map", "start_array"}:
+                depth += 1
+            elif event in {"end_map", "end_array"}:
+                depth -= 1
+
+            if depth == 0:
+                yield builder.value
+                builder = None
+
+    @property
+    def route_id(self) -> str | None:
+        """The routeId of the response, None if it is not available."""
+        route_id = super().route_id
+        if route_id is None and self._streaming:
+            # The routeIds were not in the entry before the stop times,
+            # keep the stop times and look for the route in the references
+            self._buffer = list(self._read_stop_times())
+            self._read_document()
+            route_id = super().route_id
+        return route_id
+
+    @property
+    def stop_times(self) -> list[Any]:
+        """The TransitScheduleStopTimes of the entry (reads all of them)."""
+        return list(self.iter_stop_times())
+
+    @property
+    def alerts(self) -> dict[str, Any] | None:
+        """The TransitAlerts in the references, None if they are not included."""
+        self._read_document()
+        return super().alerts
+
+    def iter_stop_times(self) -> Iterator[Any]:
+        """Parse and iterate through the TransitScheduleStopTimes of the entry."""
+        if self._buffer is not None:
+            yield from self._buffer
+        elif self._streaming:
+            yield from self._read_stop_times()
+            # Parse the rest of the entry after the stop times
+            self._read_document(until=("data.entry", "end_map"))
+
+    def close(self) -> None:
+        """Parse the rest of the response, so the connection can be reused."""
+        self._read_document()
+
+
+class StopTimeRecord:
+    """A decoded TransitScheduleStopTime, with only the data we need."""
+
+    __slots__ = ("arrival", "dwell", "predicted", "sid", "trip_id")
+
+    def __init__(
+        self,
+        sid: StopId,
+        trip_id: str,
+        arrival: int,
+        dwell: int,
+        *,
+        predicted: bool,
+    ) -> None:
+        """Create a record.
+
+        :param sid: The StopId the vehicle arrives to
+        :param trip_id: tripId from the BKK OpenData API
+        :param arrival: Timestamp of the arrival
+        :param dwell: Time in seconds between the arrival and the departure
+        :param predicted: Whether the times are realtime predictions
+        """
+        self.sid: StopId = sid
+        self.trip_id: str = trip_id
+        self.arrival: int = arrival
+        self.dwell: int = dwell
+        self.predicted: bool = predicted
+
+
+def decode_stop_times(
+    stop_times: Iterable[Any],
+    route: Route,
+    default_stop_id: str | None,
+    departure_delay: int,
+) -> Iterator[StopTimeRecord]:
+    """Decode the TransitScheduleStopTimes of the Route we are interested in.
+
+    The realtime predictions are used if they are available and certain,
+    otherwise the scheduled times. If the arrival and the departure times differ,
+    the difference is used as the time the vehicle spends at the stop,
+    otherwise the departure delay of the Route.
+
+    :param stop_times: TransitScheduleStopTimes from the BKK OpenData API
+    :param route: The Route that the schedule data belongs to
+    :param default_stop_id: The stopId of the entry, for stop times without one
+    :param departure_delay: The departure delay of the Route in seconds
+    :return: The decoded stop times with valid time data, one by one
+    """
+    for stop_time in stop_times:
+        # Get stopId when the response contains schedules for multiple stops
+        stop_id = stop_time.get("stopId", default_stop_id)
+
+        # Check if we are interested in the provided stopId
+        sid = route.get_stop_id(stop_id) if stop_id is not None else None
+        if sid is None:
+            logger.debug(
+                f"Got update for stop ID {stop_id}, route {route.name}, "
+                f"but we don't need that, skipping",
+            )
+            continue
+
+        # Get the predicted or scheduled arrival and departure times
+        predicted: bool = not stop_time.get("uncertain", False)
+        arrival: int | None = None
+        departure: int | None = None
+        if predicted:
+            arrival = stop_time.get("predictedArrivalTime")
+            departure = stop_time.get("predictedDepartureTime")
+        if arrival is None and departure is None:
+            predicted = False
+            arrival = stop_time.get("arrivalTime")
+            departure = stop_time.get("departureTime")
+
+        base_time = departure if departure is not None else arrival
+
+        if arrival is not None and departure is not None and arrival != departure:
+            # Arrival time is different from the departure,
+            # let's use the difference between them for the departure delay
+            yield StopTimeRecord(
+                sid,
+                stop_time.get("tripId"),
+                arrival + randint(-3, 3),
+                departure - arrival,
+                predicted=predicted,
+            )
+        elif base_time is not None:
+            # Only one of them is available, or they are the same,
+            # use predefined delay for departure delay
+            yield StopTimeRecord(
+                sid,
+                stop_time.get("tripId"),
+                base_time - departure_delay + randint(-3, 3),
+                departure_delay,
+                predicted=predicted,
+            )
+        else:
+            logger.debug(
+                f"No valid arrival/departure time found "
+                f"when updating stop {stop_id}, route {route.name}",
+            )
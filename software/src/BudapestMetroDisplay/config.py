@@ -23,9 +23,10 @@ import logging
 import sys
 from ipaddress import IPv4Address, IPv6Address
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import (
+    BaseModel,
     DirectoryPath,
     Field,
     IPvAnyAddress,
@@ -58,6 +59,32 @@ class LEDConfig(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="LED_", frozen=True)
 
 
+class SACNOutputConfig(BaseModel):
+    """Class to store the settings of one sACN output (a range of LEDs)."""
+
+    universe: int = Field(
+        ge=1,
+        lt=64000,
+        description="DMX universe to send out the LEDs of this output",
+    )
+    destination: IPv4Address | IPv6Address | None = Field(
+        default=None,
+        description="The destination IP address for unicast sACN, \
+            the global sACN settings are used if empty",
+    )
+    first_led: int = Field(
+        default=0,
+        ge=0,
+        description="Index of the first LED sent out by this output",
+    )
+    led_count: int = Field(
+        default=170,
+        ge=1,
+        le=170,
+        description="Number of LEDs sent out by this output (max 170 per universe)",
+    )
+
+
 class SACNConfig(BaseSettings):
     """Class to store sACN related settings."""
 
@@ -76,6 +103,27 @@ class SACNConfig(BaseSettings):
         description="DMX universe to send out data with the sACN protocol",
     )
     fps: int = Field(default=60, ge=1, description="FPS limit")
+    adaptive_fps: bool = Field(
+        default=True,
+        description="Whether to lower the frame rate to idle_fps \
+            while no LED is fading",
+    )
+    idle_fps: float = Field(
+        default=1,
+        gt=0,
+        description="Keep-alive frame rate while the LEDs are static, \
+            at least 1 FPS is used so the receivers don't time out",
+    )
+    backend: Literal["sacn", "native"] = Field(
+        default="sacn",
+        description="sacn uses the sACN library with its own sender thread, \
+            native sends the packets directly from the LED renderer",
+    )
+    outputs: list[SACNOutputConfig] = Field(
+        default_factory=list,
+        description="JSON list of outputs to split the LEDs into multiple universes \
+            and devices, by default the LEDs are sent out from the universe setting",
+    )
 
     @field_validator("unicast_ip")
     @classmethod
@@ -126,6 +174,70 @@ class BKKConfig(BaseSettings):
         gt=0,
         description="Update frequency for alerts for non-realtime routes in seconds",
     )
+    api_pool_size: int = Field(
+        default=10,
+        ge=1,
+        description="Number of keep-alive connections kept open to the API server",
+    )
+    api_connect_timeout: float = Field(
+        default=3.05,
+        gt=0,
+        description="Timeout in seconds for connecting to the API server",
+    )
+    api_read_timeout: float = Field(
+        default=5,
+        gt=0,
+        description="Timeout in seconds for reading the response of the API server",
+    )
+    api_streaming: bool = Field(
+        default=False,
+        description="Whether to parse the schedule responses incrementally \
+            (requires the ijson package)",
+    )
+    api_adaptive_polling: bool = Field(
+        default=False,
+        description="Whether to adapt the realtime update frequency of each route \
+            to how much its predictions change",
+    )
+    api_update_realtime_min: int = Field(
+        default=20,
+        gt=0,
+        description="Shortest time between realtime updates in seconds \
+            with adaptive polling",
+    )
+    api_update_realtime_max: int = Field(
+        default=180,
+        gt=0,
+        description="Longest time between realtime updates in seconds \
+            with adaptive polling",
+    )
+    api_response_cache: bool = Field(
+        default=False,
+        description="Whether to skip processing the API responses \
+            which are the same as the previous one",
+    )
+    api_batch_routes: bool = Field(
+        default=False,
+        description="Whether to request the schedules of multiple routes \
+            together in one API request",
+    )
+    api_async: bool = Field(
+        default=False,
+        description="Whether to run the API updates as tasks on an asyncio \
+            event loop instead of a thread pool (requires the aiohttp package)",
+    )
+    api_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum number of API requests in progress at the same time \
+            in async mode",
+    )
+    api_rate_limit: float = Field(
+        default=5,
+        gt=0,
+        description="Maximum number of API requests started per second \
+            to the same host in async mode",
+    )
 
     model_config = SettingsConfigDict(env_prefix="BKK_", frozen=True)
 
@@ -195,6 +307,62 @@ class LogConfig(BaseSettings):
         return values
 
 
+class SnapshotConfig(BaseSettings):
+    """Class to store the settings of the on-disk snapshot of the schedules."""
+
+    used: bool = Field(
+        default=False,
+        description="Whether to save the upcoming arrivals, the schedule intervals \
+            and the alert states to disk, and restore them at startup",
+    )
+    path: Path | None = Field(
+        default=None,
+        description="The directory to store the snapshot, \
+            the data directory next to the log directory if empty",
+    )
+    interval: int = Field(
+        default=60,
+        gt=0,
+        description="Time between the saves of the snapshot in seconds",
+    )
+    max_age: int = Field(
+        default=3600,
+        gt=0,
+        description="Snapshots older than this many seconds are not restored",
+    )
+
+    model_config = SettingsConfigDict(env_prefix="SNAPSHOT_", frozen=True)
+
+
+class GTFSConfig(BaseSettings):
+    """Class to store the settings of the offline GTFS timetable."""
+
+    used: bool = Field(
+        default=False,
+        description="Whether to schedule the arrivals from a GTFS timetable \
+            instead of the regular API updates",
+    )
+    path: Path | None = Field(
+        default=None,
+        description="The path of the BKK GTFS zip file",
+    )
+
+    @field_validator("path")
+    @classmethod
+    def check_path(
+        cls,
+        value: Path | None,
+        info: ValidationInfo,
+    ) -> Path | None:
+        """Check the validity of path if the GTFS timetable is used."""
+        if "used" in info.data and info.data["used"] and value is None:
+            msg = "Path must be filled out when using the GTFS timetable"
+            raise ValueError(msg)
+        return value
+
+    model_config = SettingsConfigDict(env_prefix="GTFS_", frozen=True)
+
+
 class AppConfig(BaseSettings):
     """Class to store application settings."""
 
@@ -204,6 +372,8 @@ class AppConfig(BaseSettings):
         bkk: BKKConfig = BKKConfig()  # type: ignore[call-arg]
         esphome: ESPHomeConfig = ESPHomeConfig()
         log: LogConfig = LogConfig()
+        snapshot: SnapshotConfig = SnapshotConfig()
+        gtfs: GTFSConfig = GTFSConfig()
     except ValidationError:
         logger.exception("Configuration Error: Please check your environment variables")
         sys.exit(1)  # Exit the application with a non-zero status code
@@ -0,0 +1,192 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+
+import logging
+import socket
+import struct
+import time as _t
+from ipaddress import IPv4Address, IPv6Address, ip_address
+
+logger = logging.getLogger(__name__)
+
+E131_PORT: int = 5568
+DMX_SLOTS: int = 512
+PACKET_LENGTH: int = 126 + DMX_SLOTS
+# Unchanged data is sent again after this many seconds
+KEEP_ALIVE_INTERVAL: float = 1.0
+
+# Offsets of the fields that change between packets
+_SEQUENCE_OFFSET: int = 111
+_OPTIONS_OFFSET: int = 112
+_DMX_OFFSET: int = 126
+
+_OPTION_STREAM_TERMINATED: int = 0x40
+
+
+def multicast_address(universe: int) -> str:
+    """Return the E1.31 multicast group address of a universe."""
+    return f"239.255.{universe >> 8}.{universe & 0xFF}"
+
+
+def build_data_packet(
+    cid: bytes,
+    source_name: str,
+    universe: int,
+    priority: int = 100,
+) -> bytearray:
+    """Build an E1.31 (sACN) data packet template with 512 zeroed DMX slots.
+
+    Only the sequence number, the options and the DMX slots change between
+    packets of the same universe, these can be patched in place.
+
+    :param cid: The 16 byte component identifier of the source
+    :param source_name: User-friendly name of the source (max 63 bytes UTF-8)
+    :param universe: The DMX universe (1-63999)
+    :param priority: The priority of the data (0-200)
+    """
+    name: bytes = source_name.encode("UTF-8")
+    if len(cid) != 16:
+        msg = "cid must be 16 bytes long"
+        raise ValueError(msg)
+    if len(name) > 63:
+        msg = "source_name must be less than 64 bytes when UTF-8 encoded"
+        raise ValueError(msg)
+
+    packet = bytearray(PACKET_LENGTH)
+    struct.pack_into(
+        "!HH12sHI16s",
+        packet,
+        0,
+        0x0010,  # Preamble size
+        0x0000,  # Post-amble size
+        b"ASC-E1.17\x00\x00\x00",  # ACN packet identifier
+        0x7000 | (PACKET_LENGTH - 16),  # Root layer flags and length
+        0x00000004,  # VECTOR_ROOT_E131_DATA
+        cid,
+    )
+    struct.pack_into(
+        "!HI64sBHBBH",
+        packet,
+        38,
+        0x7000 | (PACKET_LENGTH - 38),  # Framing layer flags and length
+        0x00000002,  # VECTOR_E131_DATA_PACKET
+        name,  # Zero padded to 64 bytes
+        priority,
+        0,  # Synchronization address
+        0,  # Sequence number
+        0,  # Options
+        universe,
+    )
+    struct.pack_into(
+        "!HBBHHHB",
+        packet,
+        115,
+        0x7000 | (PACKET_LENGTH - 115),  # DMP layer flags and length
+        0x02,  # VECTOR_DMP_SET_PROPERTY
+        0xA1,  # Address type and data type
+        0x0000,  # First property address
+        0x0001,  # Address increment
+        DMX_SLOTS + 1,  # Property value count (start code + slots)
+        0x00,  # DMX start code
+    )
+    return packet
+
+
+class E131Sender:
+    """Minimal E1.31 (sACN) sender for a single universe.
+
+    The packet is preallocated once, and every send only patches the sequence
+    number and the DMX slots in place before handing it to a single UDP socket.
+    It has no thread of its own, the caller (the LED renderer) drives the timing,
+    so it has to call send() or keep_alive() at least every KEEP_ALIVE_INTERVAL.
+    Universe discovery and synchronization packets are not sent.
+    """
+
+    def __init__(
+        self,
+        cid: bytes,
+        source_name: str,
+        universe: int,
+        destination: IPv4Address | IPv6Address | None = None,
+        port: int = E131_PORT,
+    ) -> None:
+        """Create the packet template and the UDP socket.
+
+        :param cid: The 16 byte component identifier of the source
+        :param source_name: User-friendly name of the source
+        :param universe: The DMX universe to send
+        :param destination: The unicast destination, None means multicast
+        :param port: The destination UDP port
+        """
+        self.universe: int = universe
+        self._packet: bytearray = build_data_packet(cid, source_name, universe)
+        self._view: memoryview = memoryview(self._packet)
+        self._sequence: int = 0
+        self._last_send: float = 0.0
+
+        address: IPv4Address | IPv6Address = (
+            ip_address(multicast_address(universe))
+            if destination is None
+            else destination
+        )
+        self.destination: tuple[str, int] = (str(address), port)
+
+        family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+        self._socket: socket.socket = socket.socket(family, socket.SOCK_DGRAM)
+        if destination is None:
+            self._socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 8)
+
+    def send(self, dmx_data: bytes | memoryview) -> None:
+        """Send the DMX slots, the missing slots at the end are left unchanged.
+
+        :param dmx_data: The DMX values (max 512)
+        """
+        length: int = min(len(dmx_data), DMX_SLOTS)
+        self._view[_DMX_OFFSET : _DMX_OFFSET + length] = memoryview(dmx_data)[:length]
+        self._send_packet()
+
+    def keep_alive(self) -> None:
+        """Send the last DMX data again, if the keep-alive interval has elapsed.
+
+        This way the receiver doesn't time out when the DMX data is static.
+        """
+        if _t.perf_counter() - self._last_send >= KEEP_ALIVE_INTERVAL:
+            self._send_packet()
+
+    def close(self) -> None:
+        """Send the stream terminated packets and close the socket."""
+        self._packet[_OPTIONS_OFFSET] |= _OPTION_STREAM_TERMINATED
+        try:
+            for _ in range(3):
+                self._send_packet()
+        finally:
+            self._socket.close()
+
+    def _send_packet(self) -> None:
+        """Patch the sequence number and send the packet."""
+        self._packet[_SEQUENCE_OFFSET] = self._sequence
+        self._sequence = (self._sequence + 1) & 0xFF
+        self._last_send = _t.perf_counter()
+        try:
+            self._socket.sendto(self._packet, self.destination)
+        except OSError as e:
+            logger.warning(f"Failed to send sACN packet to {self.destination[0]}: {e}")
@@ -20,10 +20,7 @@
 #  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 #  OTHER DEALINGS IN THE SOFTWARE.
 
-import asyncio
 import logging
-import threading
-from asyncio import AbstractEventLoop
 
 from aioesphomeapi import (
     APIClient,
@@ -35,20 +32,28 @@ from aioesphomeapi import (
 
 from BudapestMetroDisplay._version import __version__
 from BudapestMetroDisplay.config import settings
+from BudapestMetroDisplay.led_helpers import build_brightness_lut
 
 logger = logging.getLogger(__name__)
 brightness: float = 1.0
+# DMX translation table for the current brightness, see build_brightness_lut
+brightness_lut: bytes = build_brightness_lut(brightness)
 
 client: APIClient
 
 
 def on_state_change(state: EntityState) -> None:
     """Process entity state changes from ESPHome."""
-    global brightness
+    global brightness, brightness_lut
 
     # Check if this is a light entity
     if isinstance(state, LightState):
-        brightness = state.brightness if hasattr(state, "brightness") else 1.0
+        new_brightness = state.brightness if hasattr(state, "brightness") else 1.0
+        if new_brightness == brightness:
+            return
+
+        brightness = new_brightness
+        brightness_lut = build_brightness_lut(brightness)
         logger.debug(f"ESPHome Light brightness updated to {brightness * 100:.0f}%")
 
 
@@ -98,21 +103,3 @@ async def connect_and_subscribe() -> None:
     )
 
     await reconnect_logic.start()
-
-
-def esphome_background_process(loop: AbstractEventLoop) -> None:
-    """Run the asyncio loop."""
-    asyncio.set_event_loop(loop)
-    loop.run_forever()
-
-
-def start_background_loop() -> AbstractEventLoop:
-    """Start a background thread for asyncio for communicating with the device."""
-    loop = asyncio.new_event_loop()
-    threading.Thread(
-        target=esphome_background_process,
-        args=(loop,),
-        daemon=True,
-        name="ESPHome thread",
-    ).start()
-    return loop
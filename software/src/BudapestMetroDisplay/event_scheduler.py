@@ -0,0 +1,462 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+import heapq
+import itertools
+import logging
+import threading
+import time as _t
+from bisect import bisect_left, insort
+from collections.abc import Callable, Hashable, Iterable, Sequence
+from datetime import datetime
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Rebuild the heap when more than this ratio of its entries are cancelled
+_COMPACT_RATIO: float = 0.5
+# Don't bother rebuilding small heaps
+_COMPACT_MIN_SIZE: int = 1024
+
+
+class ScheduledEvent:
+    """A callback scheduled for a specific time in an EventScheduler.
+
+    The id, args and next_run_time attributes match the ones of an APScheduler Job,
+    so the events can be listed the same way.
+    """
+
+    __slots__ = (
+        "args",
+        "cancelled",
+        "func",
+        "group",
+        "id",
+        "key",
+        "next_run_time",
+        "seq",
+        "when",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        event_id: str,
+        func: Callable[..., Any],
+        run_date: datetime,
+        args: Sequence[Any] = (),
+        *,
+        group: str | None = None,
+        key: Hashable | None = None,
+    ) -> None:
+        """Create an event.
+
+        :param event_id: Unique ID of the event
+        :param func: The function to call at the scheduled time
+        :param run_date: The time to call the function
+        :param args: Positional arguments of the function
+        :param group: Optional group of the event, see EventScheduler.apply_delta
+        :param key: Optional lookup key of the event, see EventScheduler.next_event
+        """
+        self.id: str = event_id
+        self.func: Callable[..., Any] = func
+        self.args: tuple[Any, ...] = tuple(args)
+        self.next_run_time: datetime = run_date
+        self.when: float = run_date.timestamp()
+        self.group: str | None = group
+        self.key: Hashable | None = key
+        self.seq: int = 0  # Set by the scheduler, orders events at the same time
+        self.cancelled: bool = False
+
+    @property
+    def entry(self) -> tuple[float, int, "ScheduledEvent"]:
+        """The sort key of the event in the heap and in the key index."""
+        return self.when, self.seq, self
+
+    def is_same(self, other: "ScheduledEvent") -> bool:
+        """Return whether the other event would run the same call at the same time."""
+        return (
+            self.when == other.when
+            and self.func is other.func
+            and self.key == other.key
+            and len(self.args) == len(other.args)
+            # Compare identity first, the model objects are expensive to compare
+            and all(
+                a is b or a == b for a, b in zip(self.args, other.args, strict=True)
+            )
+        )
+
+
+class GroupUpdate(NamedTuple):
+    """Result of an EventScheduler.apply_delta call."""
+
+    inserted: int
+    moved: int
+    unchanged: int
+    cancelled: int
+
+
+class EventScheduler:
+    """In-process event queue for the vehicle arrival and departure callbacks.
+
+    The events are stored in a heap ordered by their run time, and in a dict
+    by their ID. Adding an event is O(log n), replacing and cancelling an event
+    is O(1): the replaced events stay in the heap, but they are skipped
+    when they are due. A single dispatcher thread runs the due events,
+    and it is only woken up when the soonest event changes.
+
+    The events with a key are also kept in a sorted list per key,
+    so the pending events of a key (e.g. the arrivals of a StopId)
+    can be queried without scanning all events.
+    """
+
+    def __init__(
+        self,
+        name: str = "Event scheduler",
+        misfire_grace_time: float | None = None,
+    ) -> None:
+        """Create a scheduler, which has to be started with start().
+
+        :param name: The name of the dispatcher thread
+        :param misfire_grace_time: Events that are late more than this many seconds
+            are skipped, None means no limit
+        """
+        self.name: str = name
+        self.misfire_grace_time: float | None = misfire_grace_time
+
+        self._heap: list[tuple[float, int, ScheduledEvent]] = []
+        self._events: dict[str, ScheduledEvent] = {}
+        # Pending events by their key, sorted by their run time
+        self._keys: dict[Hashable, list[tuple[float, int, ScheduledEvent]]] = {}
+        self._counter = itertools.count()  # Tie-breaker for events at the same time
+        self._cancelled: int = 0  # Number of cancelled events still in the heap
+        self._condition = threading.Condition()
+        self._running: bool = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the dispatcher thread."""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+        self._thread.start()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop the dispatcher thread, the pending events are not run.
+
+        :param wait: Whether to wait for the dispatcher thread to finish
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def add_event(  # noqa: PLR0913
+        self,
+        event_id: str,
+        func: Callable[..., Any],
+        run_date: datetime,
+        args: Sequence[Any] = (),
+        *,
+        group: str | None = None,
+        key: Hashable | None = None,
+    ) -> ScheduledEvent:
+        """Schedule an event, replacing the existing event with the same ID.
+
+        :param event_id: Unique ID of the event
+        :param func: The function to call at the scheduled time
+        :param run_date: The time to call the function
+        :param args: Positional arguments of the function
+        :param group: Optional group of the event, see apply_delta
+        :param key: Optional lookup key of the event, see next_event
+        :return: The scheduled event
+        """
+        event = ScheduledEvent(event_id, func, run_date, args, group=group, key=key)
+
+        with self._condition:
+            self._push(event)
+
+            # Only wake up the dispatcher if this is the soonest event now
+            if self._heap[0][2] is event:
+                self._condition.notify()
+
+        return event
+
+    def apply_delta(
+        self,
+        group: str,
+        events: Iterable[ScheduledEvent],
+        removed: Iterable[str] = (),
+    ) -> GroupUpdate:
+        """Apply the changes of the events of a group.
+
+        The pending events of the group which are not passed are kept,
+        so the caller only has to pass the new and moved events,
+        and the IDs of the events to cancel, in one transaction.
+
+        :param group: The group of the events, e.g. a route ID
+        :param events: The new and moved events, their group is set to the group
+        :param removed: The IDs of the events of the group to cancel
+        :return: The number of inserted, moved, unchanged and cancelled events
+        """
+        new_events = list(events)
+        for event in new_events:
+            event.group = group
+        cancelled = 0
+
+        with self._condition:
+            soonest = self._heap[0][2] if self._heap else None
+            inserted, moved, unchanged = self._upsert(new_events)
+
+            for event_id in removed:
+                existing = self._events.get(event_id)
+                if existing is not None and existing.group == group:
+                    self._remove(existing)
+                    cancelled += 1
+
+            self._notify_if_sooner(soonest)
+
+        return GroupUpdate(inserted, moved, unchanged, cancelled)
+
+    def remove_event(self, event_id: str) -> bool:
+        """Cancel a scheduled event.
+
+        :param event_id: The ID of the event
+        :return: True if the event was found and cancelled
+        """
+        with self._condition:
+            event = self._events.get(event_id)
+            if event is None:
+                return False
+            self._remove(event)
+            return True
+
+    def get_event(self, event_id: str) -> ScheduledEvent | None:
+        """Return the pending event with the ID, None if it doesn't exist."""
+        with self._condition:
+            return self._events.get(event_id)
+
+    def next_event(self, key: Hashable) -> ScheduledEvent | None:
+        """Return the soonest pending event with the key, None if there are none."""
+        with self._condition:
+            entries = self._keys.get(key)
+            return entries[0][2] if entries else None
+
+    def get_events(self, key: Hashable) -> list[ScheduledEvent]:
+        """Return the pending events with the key, sorted by their run time."""
+        with self._condition:
+            return [entry[2] for entry in self._keys.get(key, ())]
+
+    def count_events(self, key: Hashable) -> int:
+        """Return the number of pending events with the key."""
+        with self._condition:
+            return len(self._keys.get(key, ()))
+
+    def get_jobs(self) -> list[ScheduledEvent]:
+        """Return the pending events, sorted by their run time."""
+        with self._condition:
+            events = list(self._events.values())
+        return sorted(events, key=lambda e: e.when)
+
+    def next_run_time(self) -> float | None:
+        """Return the timestamp of the soonest pending event, None if there are none."""
+        with self._condition:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: float) -> int:
+        """Run the events which are due at a time, in the calling thread.
+
+        It drives the scheduler with a virtual clock, e.g. for replays,
+        so the dispatcher thread must not be running. The events added
+        by the run events are also run if they are due.
+
+        :param now: The current timestamp of the virtual clock
+        :return: The number of events run
+        """
+        count = 0
+        while True:
+            with self._condition:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0][0] > now:
+                    return count
+                event = heapq.heappop(self._heap)[2]
+                del self._events[event.id]
+                self._unlink(event)
+
+            self._call(event)
+            count += 1
+
+    def __len__(self) -> int:
+        """Return the number of pending events."""
+        return len(self._events)
+
+    def _push(self, event: ScheduledEvent) -> None:
+        """Add an event, replacing the one with the same ID.
+
+        Must be called with the lock held.
+        """
+        existing = self._events.get(event.id)
+        if existing is not None:
+            self._remove(existing)
+
+        event.seq = next(self._counter)
+        self._events[event.id] = event
+        if event.key is not None:
+            insort(self._keys.setdefault(event.key, []), event.entry)
+        heapq.heappush(self._heap, event.entry)
+
+    def _upsert(self, events: Iterable[ScheduledEvent]) -> tuple[int, int, int]:
+        """Add or move the events which differ from the pending ones.
+
+        Must be called with the lock held.
+
+        :return: The number of inserted, moved and unchanged events
+        """
+        inserted = moved = unchanged = 0
+        for event in events:
+            existing = self._events.get(event.id)
+            if existing is None:
+                inserted += 1
+            elif existing.is_same(event):
+                unchanged += 1
+                continue
+            else:
+                moved += 1
+            self._push(event)
+        return inserted, moved, unchanged
+
+    def _notify_if_sooner(self, soonest: ScheduledEvent | None) -> None:
+        """Wake up the dispatcher if the soonest event changed.
+
+        Must be called with the lock held.
+        """
+        if self._heap and self._heap[0][2] is not soonest:
+            self._condition.notify()
+
+    def _remove(self, event: ScheduledEvent) -> None:
+        """Remove a pending event from the indexes and cancel it.
+
+        Must be called with the lock held.
+        """
+        del self._events[event.id]
+        self._unlink(event)
+        self._cancel(event)
+
+    def _unlink(self, event: ScheduledEvent) -> None:
+        """Remove an event from the key index.
+
+        Must be called with the lock held.
+        """
+        if event.key is not None:
+            entries = self._keys.get(event.key)
+            if entries is not None:
+                i = bisect_left(entries, event.entry)
+                if i < len(entries) and entries[i][2] is event:
+                    del entries[i]
+                if not entries:
+                    del self._keys[event.key]
+
+    def _cancel(self, event: ScheduledEvent) -> None:
+        """Mark an event cancelled, must be called with the lock held."""
+        if event.cancelled:
+            return
+
+        event.cancelled = True
+        self._cancelled += 1
+
+        if (
+            len(self._heap) >= _COMPACT_MIN_SIZE
+            and self._cancelled > len(self._heap) * _COMPACT_RATIO
+        ):
+            # Drop the cancelled events from the heap
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def _pop_due(self) -> list[ScheduledEvent] | None:
+        """Wait for the due events and remove them from the queue.
+
+        :return: The due events, None if the scheduler was shut down
+        """
+        with self._condition:
+            while self._running:
+                self._drop_cancelled()
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                timeout = self._heap[0][0] - _t.time()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+
+                now = _t.time()
+                due: list[ScheduledEvent] = []
+                while self._heap and self._heap[0][0] <= now:
+                    event = heapq.heappop(self._heap)[2]
+                    if event.cancelled:
+                        self._cancelled -= 1
+                        continue
+                    del self._events[event.id]
+                    self._unlink(event)
+                    due.append(event)
+                return due
+
+        return None
+
+    def _drop_cancelled(self) -> None:
+        """Skip the cancelled events at the top of the heap.
+
+        Must be called with the lock held.
+        """
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def _run(self) -> None:
+        """Run the due events until the scheduler is shut down."""
+        while (due := self._pop_due()) is not None:
+            for event in due:
+                lateness = _t.time() - event.when
+                if (
+                    self.misfire_grace_time is not None
+                    and lateness > self.misfire_grace_time
+                ):
+                    logger.warning(
+                        f"Event {event.id} was missed by {lateness:.1f} seconds",
+                    )
+                    continue
+
+                self._call(event)
+
+    @staticmethod
+    def _call(event: ScheduledEvent) -> None:
+        """Run the function of an event, logging its errors."""
+        try:
+            event.func(*event.args)
+        except Exception:
+            logger.exception(f"Error when running event {event.id}")
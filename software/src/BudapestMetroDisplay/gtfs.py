@@ -0,0 +1,455 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import zipfile
+from datetime import date, datetime, time, timedelta
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from BudapestMetroDisplay.bkk_response import ApiResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from BudapestMetroDisplay.model import Network, Route
+
+logger = logging.getLogger(__name__)
+
+# The IDs of the BKK OpenData API are the GTFS IDs with the agency prefix
+ID_PREFIX: str = "BKK_"
+# Increase it when the arrays change, older caches are ingested again
+CACHE_VERSION: int = 1
+# Keep the active services of this many days
+_SERVICE_CACHE_SIZE: int = 8
+
+
+def parse_gtfs_time(value: str) -> int | None:
+    """Parse a GTFS time (HH:MM:SS, can be over 24:00:00) to seconds, None if empty."""
+    if not value:
+        return None
+    hours, minutes, seconds = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def parse_gtfs_date(value: str) -> int:
+    """Parse a GTFS date (YYYYMMDD) to an integer which keeps the order."""
+    return int(value)
+
+
+def date_key(day: date) -> int:
+    """Return the integer of a date in the format of parse_gtfs_date."""
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def service_day_start(day: date) -> float:
+    """Return the timestamp the GTFS times of a service day are measured from.
+
+    It is noon minus 12 hours, which is midnight except on the days
+    of the daylight saving time changes.
+    """
+    return datetime.combine(day, time(12)).timestamp() - 12 * 3600
+
+
+def read_csv(archive: zipfile.ZipFile, name: str) -> Iterator[dict[str, str]]:
+    """Read the rows of a GTFS file, an empty iterator if it is missing."""
+    if name not in archive.namelist():
+        return iter(())
+    return csv.DictReader(
+        io.TextIOWrapper(archive.open(name), encoding="utf-8-sig", newline=""),
+    )
+
+
+def network_stop_keys(network: Network) -> list[tuple[str, str]]:
+    """Return the route IDs and stop IDs of the StopIds of a Network, sorted."""
+    return sorted(
+        (route.route_id, sid.stop_id)
+        for route in network.routes
+        for sid in route.get_stop_ids()
+    )
+
+
+class Timetable:
+    """The scheduled stop times of the StopIds of a Network from a GTFS feed.
+
+    The stop times of every StopId are stored in numpy arrays sorted by their
+    arrival time within the service day, one slice per StopId,
+    so the arrivals of a time range are found with a binary search.
+    The calendar of the services decides which trips run on a day.
+    """
+
+    # The arrays which are saved to and loaded from the cache
+    ARRAYS: tuple[str, ...] = (
+        "key_routes",
+        "key_stops",
+        "offsets",
+        "arrivals",
+        "departures",
+        "trips",
+        "trip_ids",
+        "trip_services",
+        "trip_headsigns",
+        "headsigns",
+        "service_ids",
+        "service_start",
+        "service_end",
+        "service_days",
+        "exception_dates",
+        "exception_services",
+        "exception_added",
+    )
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        """Create a timetable from its arrays, see ARRAYS."""
+        # The route ID and stop ID of each StopId, and the start of its stop times
+        self.key_routes: np.ndarray = arrays["key_routes"]
+        self.key_stops: np.ndarray = arrays["key_stops"]
+        self.offsets: np.ndarray = arrays["offsets"]
+        # The stop times, sorted by arrival within each StopId, in seconds
+        # from the start of the service day, and the index of their trip
+        self.arrivals: np.ndarray = arrays["arrivals"]
+        self.departures: np.ndarray = arrays["departures"]
+        self.trips: np.ndarray = arrays["trips"]
+        # The trips and their services and headsigns
+        self.trip_ids: np.ndarray = arrays["trip_ids"]
+        self.trip_services: np.ndarray = arrays["trip_services"]
+        self.trip_headsigns: np.ndarray = arrays["trip_headsigns"]
+        self.headsigns: np.ndarray = arrays["headsigns"]
+        # The calendar of the services, the weekdays are a bitmask from Monday
+        self.service_ids: np.ndarray = arrays["service_ids"]
+        self.service_start: np.ndarray = arrays["service_start"]
+        self.service_end: np.ndarray = arrays["service_end"]
+        self.service_days: np.ndarray = arrays["service_days"]
+        # The services added or removed on specific dates
+        self.exception_dates: np.ndarray = arrays["exception_dates"]
+        self.exception_services: np.ndarray = arrays["exception_services"]
+        self.exception_added: np.ndarray = arrays["exception_added"]
+
+        # The slice of the stop times by route ID and stop ID
+        self._keys: dict[tuple[str, str], int] = {
+            (str(route_id), str(stop_id)): index
+            for index, (route_id, stop_id) in enumerate(
+                zip(self.key_routes, self.key_stops, strict=True),
+            )
+        }
+        self._routes: set[str] = {str(route_id) for route_id in self.key_routes}
+        # The last day with a service in the calendar of the feed
+        self._last_day: int = max(
+            int(self.service_end.max(initial=0)),
+            int(self.exception_dates.max(initial=0)),
+        )
+        self._services: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        """Return the number of stored stop times."""
+        return len(self.arrivals)
+
+    @classmethod
+    def from_gtfs(cls, path: Path, network: Network) -> Timetable:
+        """Ingest the stop times of the StopIds of a Network from a GTFS zip.
+
+        :param path: The path of the GTFS zip file
+        :param network: Only the stop times of the StopIds of this Network are kept
+        :return: The timetable
+        """
+        stop_keys = set(network_stop_keys(network))
+        route_ids = {route_id for route_id, _ in stop_keys}
+
+        with zipfile.ZipFile(path) as archive:
+            service_index: dict[str, int] = {}
+            service_start: list[int] = []
+            service_end: list[int] = []
+            service_days: list[int] = []
+
+            def service(service_id: str) -> int:
+                index = service_index.get(service_id)
+                if index is None:
+                    index = service_index[service_id] = len(service_index)
+                    # Only the exceptions of calendar_dates.txt enable the service
+                    service_start.append(0)
+                    service_end.append(0)
+                    service_days.append(0)
+                return index
+
+            weekdays = (
+                "monday",
+                "tuesday",
+                "wednesday",
+                "thursday",
+                "friday",
+                "saturday",
+                "sunday",
+            )
+            for row in read_csv(archive, "calendar.txt"):
+                index = service(row["service_id"])
+                service_start[index] = parse_gtfs_date(row["start_date"])
+                service_end[index] = parse_gtfs_date(row["end_date"])
+                service_days[index] = sum(
+                    1 << day for day, name in enumerate(weekdays) if row[name] == "1"
+                )
+
+            exception_dates: list[int] = []
+            exception_services: list[int] = []
+            exception_added: list[bool] = []
+            for row in read_csv(archive, "calendar_dates.txt"):
+                exception_dates.append(parse_gtfs_date(row["date"]))
+                exception_services.append(service(row["service_id"]))
+                exception_added.append(row["exception_type"] == "1")
+
+            # The trips of the routes of the Network
+            trip_index: dict[str, int] = {}
+            trip_routes: list[str] = []
+            trip_ids: list[str] = []
+            trip_services: list[int] = []
+            trip_headsigns: list[int] = []
+            headsign_index: dict[str, int] = {}
+            for row in read_csv(archive, "trips.txt"):
+                route_id = ID_PREFIX + row["route_id"]
+                if route_id not in route_ids:
+                    continue
+                trip_index[row["trip_id"]] = len(trip_ids)
+                trip_routes.append(route_id)
+                trip_ids.append(ID_PREFIX + row["trip_id"])
+                trip_services.append(service(row["service_id"]))
+                headsign = row.get("trip_headsign", "")
+                trip_headsigns.append(
+                    headsign_index.setdefault(headsign, len(headsign_index)),
+                )
+
+            # The stop times of these trips at the StopIds of the Network
+            stop_times: dict[tuple[str, str], list[tuple[int, int, int]]] = {}
+            for row in read_csv(archive, "stop_times.txt"):
+                trip = trip_index.get(row["trip_id"])
+                if trip is None:
+                    continue
+                key = (trip_routes[trip], ID_PREFIX + row["stop_id"])
+                if key not in stop_keys:
+                    continue
+                arrival = parse_gtfs_time(row.get("arrival_time", ""))
+                departure = parse_gtfs_time(row.get("departure_time", ""))
+                if arrival is None and departure is None:
+                    continue
+                stop_times.setdefault(key, []).append(
+                    (
+                        arrival if arrival is not None else departure,  # type: ignore[arg-type]
+                        departure if departure is not None else arrival,  # type: ignore[arg-type]
+                        trip,
+                    ),
+                )
+
+        keys = sorted(stop_times)
+        rows = [row for key in keys for row in sorted(stop_times[key])]
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(stop_times[key]) for key in keys])
+        table = np.array(rows, dtype=np.int32).reshape(-1, 3)
+
+        return cls(
+            {
+                "key_routes": np.array([key[0] for key in keys], dtype=str),
+                "key_stops": np.array([key[1] for key in keys], dtype=str),
+                "offsets": offsets,
+                "arrivals": table[:, 0].copy(),
+                "departures": table[:, 1].copy(),
+                "trips": table[:, 2].copy(),
+                "trip_ids": np.array(trip_ids, dtype=str),
+                "trip_services": np.array(trip_services, dtype=np.int32),
+                "trip_headsigns": np.array(trip_headsigns, dtype=np.int32),
+                "headsigns": np.array(list(headsign_index), dtype=str),
+                "service_ids": np.array(list(service_index), dtype=str),
+                "service_start": np.array(service_start, dtype=np.int32),
+                "service_end": np.array(service_end, dtype=np.int32),
+                "service_days": np.array(service_days, dtype=np.uint8),
+                "exception_dates": np.array(exception_dates, dtype=np.int32),
+                "exception_services": np.array(exception_services, dtype=np.int32),
+                "exception_added": np.array(exception_added, dtype=bool),
+            },
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> Timetable:
+        """Load a timetable saved with save."""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({name: arrays[name] for name in cls.ARRAYS})
+
+    def save(self, path: Path, **metadata: Any) -> None:
+        """Save the arrays of the timetable, with extra metadata arrays."""
+        arrays: dict[str, Any] = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update({name: np.asarray(value) for name, value in metadata.items()})
+        np.savez_compressed(path, **arrays)
+
+    def covers(self, route: Route) -> bool:
+        """Return whether the timetable has stop times for a Route."""
+        return route.route_id in self._routes
+
+    def is_valid(self, day: date) -> bool:
+        """Return whether the calendar of the feed reaches a day."""
+        return date_key(day) <= self._last_day
+
+    def active_services(self, day: date) -> np.ndarray:
+        """Return whether each service runs on a day, by service index."""
+        key = date_key(day)
+        active = self._services.get(key)
+        if active is not None:
+            return active
+
+        active = (
+            (self.service_start <= key)
+            & (self.service_end >= key)
+            & ((self.service_days >> day.weekday()) & 1).astype(bool)
+        )
+        exceptions = self.exception_dates == key
+        active[self.exception_services[exceptions]] = self.exception_added[exceptions]
+
+        if len(self._services) >= _SERVICE_CACHE_SIZE:
+            self._services.clear()
+        self._services[key] = active
+        return active
+
+    def stop_times(
+        self,
+        route: Route,
+        start: datetime,
+        end: datetime,
+    ) -> list[dict[str, Any]]:
+        """Return the scheduled stop times of a Route in a time range.
+
+        :param route: The Route to get the stop times for
+        :param start: The start of the time range
+        :param end: The end of the time range
+        :return: TransitScheduleStopTimes in the format of the BKK OpenData API,
+            sorted by their time
+        """
+        start_ts = start.timestamp()
+        end_ts = end.timestamp()
+        stop_times: list[dict[str, Any]] = []
+
+        # The trips of the previous service day can run after midnight
+        day = start.date() - timedelta(days=1)
+        while day <= end.date():
+            base = service_day_start(day)
+            active = self.active_services(day)
+            for sid in route.get_stop_ids():
+                index = self._keys.get((route.route_id, sid.stop_id))
+                if index is None:
+                    continue
+                first, last = self.offsets[index], self.offsets[index + 1]
+                arrivals = self.arrivals[first:last]
+                lo = first + np.searchsorted(arrivals, start_ts - base, "left")
+                hi = first + np.searchsorted(arrivals, end_ts - base, "right")
+                for i in range(lo, hi):
+                    trip = self.trips[i]
+                    if not active[self.trip_services[trip]]:
+                        continue
+                    stop_times.append(
+                        {
+                            "stopId": sid.stop_id,
+                            "tripId": str(self.trip_ids[trip]),
+                            "stopHeadsign": str(
+                                self.headsigns[self.trip_headsigns[trip]],
+                            ),
+                            "arrivalTime": int(base + self.arrivals[i]),
+                            "departureTime": int(base + self.departures[i]),
+                        },
+                    )
+            day += timedelta(days=1)
+
+        stop_times.sort(key=lambda stop_time: stop_time["departureTime"])
+        return stop_times
+
+    def schedule_response(
+        self,
+        route: Route,
+        start: datetime,
+        end: datetime,
+    ) -> ApiResponse:
+        """Return the scheduled stop times of a Route like an API response.
+
+        The response has the same shape as an arrivals-and-departures-for-stop
+        response, so it can be processed the same way.
+
+        :param route: The Route to get the stop times for
+        :param start: The start of the time range
+        :param end: The end of the time range
+        :return: The stop times as a decoded API response
+        """
+        return ApiResponse(
+            {
+                "data": {
+                    "entry": {
+                        "routeIds": [route.route_id],
+                        "stopTimes": self.stop_times(route, start, end),
+                    },
+                    "references": {},
+                },
+            },
+        )
+
+
+def load_timetable(path: Path, network: Network) -> Timetable:
+    """Load the timetable of a Network from a GTFS zip file.
+
+    The ingested timetable is cached next to the zip file, and the cache
+    is used until the zip file or the StopIds of the Network change.
+
+    :param path: The path of the GTFS zip file
+    :param network: Only the stop times of the StopIds of this Network are kept
+    :return: The timetable
+    """
+    cache_path = path.with_suffix(".npz")
+    stat = path.stat()
+    source = np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    stop_keys = np.array(
+        ["\t".join(key) for key in network_stop_keys(network)],
+        dtype=str,
+    )
+
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as arrays:
+                valid = np.array_equal(arrays["source"], source) and np.array_equal(
+                    arrays["stop_keys"],
+                    stop_keys,
+                )
+            if valid:
+                timetable = Timetable.load(cache_path)
+                logger.info(
+                    f"Loaded {len(timetable)} scheduled stop times "
+                    f"from the timetable cache {cache_path}",
+                )
+                return timetable
+        except (OSError, ValueError, KeyError):
+            logger.warning(f"Invalid timetable cache {cache_path}, ingesting again")
+
+    logger.info(f"Ingesting the GTFS timetable from {path}, it can take a while")
+    timetable = Timetable.from_gtfs(path, network)
+    logger.info(f"Ingested {len(timetable)} scheduled stop times from {path}")
+
+    try:
+        timetable.save(cache_path, source=source, stop_keys=stop_keys)
+    except OSError:
+        logger.exception(f"Unable to save the timetable cache to {cache_path}")
+    return timetable
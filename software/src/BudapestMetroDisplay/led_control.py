@@ -25,26 +25,110 @@ import threading
 import time as _t
 import uuid
 from collections.abc import Callable
-from math import ceil
+from ipaddress import IPv4Address, IPv6Address
 
+from pydantic import BaseModel, ConfigDict, Field
 from sacn import sACNsender
 
 from BudapestMetroDisplay._version import __version__
-from BudapestMetroDisplay.config import settings
+from BudapestMetroDisplay.config import SACNOutputConfig, settings
+from BudapestMetroDisplay.e131 import KEEP_ALIVE_INTERVAL, E131Sender
 from BudapestMetroDisplay.model import LedStrip
 from BudapestMetroDisplay.network import led_strip
 
+if settings.esphome.used:
+    from BudapestMetroDisplay import esphome
+
 logger = logging.getLogger(__name__)
 
+# Component identifier of the sACN source
+SACN_CID: bytes = uuid.uuid5(
+    uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "BudapestMetroDisplay",
+).bytes
+
+# Max number of RGB LEDs in one DMX universe
+LEDS_PER_UNIVERSE: int = 170
+# Interval of the output timing reports in seconds
+STATS_INTERVAL: float = 60
+
 # sACN sender interface
-sender: sACNsender
+sender: sACNsender | None = None
+# Built-in E1.31 senders, used instead of the sACN library when the
+# native backend is selected
+native_senders: list[E131Sender] = []
+
+# The brightness lookup table used for the previous frame
+_last_lut: bytes | None = None
+_last_stats_report: float = 0.0
+
+
+class OutputStats(BaseModel):
+    """Frame timing of an sACN output since the last report."""
+
+    frames: int = 0  # Number of frames handed to the sender
+    total_time: float = 0.0  # Total time spent sending the frames in seconds
+    max_time: float = 0.0  # Longest time spent sending a frame in seconds
+
+    def record(self, duration: float) -> None:
+        """Record a sent frame and the time spent sending it."""
+        self.frames += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+
+    def reset(self) -> None:
+        """Start a new reporting interval."""
+        self.frames = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class SACNOutput(BaseModel):
+    """A range of the LED strip, sent out to a universe and destination.
+
+    start and end are byte offsets in the DMX payload of the LED strip.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    universe: int
+    destination: str  # For logging, the IP address or "multicast"
+    start: int
+    end: int
+    send: Callable[[bytes], None]  # Hands the DMX data to the sender
+    keep_alive: Callable[[], None] | None = None  # For senders without a thread
+
+    last_payload: bytes = b""  # Last sent data, before brightness compensation
+    stats: OutputStats = Field(default_factory=OutputStats)
+
+
+# The outputs the LED strip is split into
+outputs: list[SACNOutput] = []
+
+
+def resolve_outputs(led_count: int) -> list[SACNOutputConfig]:
+    """Return the output settings for a strip of led_count LEDs.
+
+    If settings.sacn.outputs is empty, the strip is split into consecutive
+    universes starting from settings.sacn.universe.
+    """
+    if settings.sacn.outputs:
+        return list(settings.sacn.outputs)
+
+    return [
+        SACNOutputConfig(
+            universe=settings.sacn.universe + i,
+            first_led=first_led,
+            led_count=min(LEDS_PER_UNIVERSE, led_count - first_led),
+        )
+        for i, first_led in enumerate(range(0, max(led_count, 1), LEDS_PER_UNIVERSE))
+    ]
 
 
 def start_renderer(stop_event: threading.Event | None = None) -> None:
     """Start the rendering loop in a separate thread."""
     # Set the LEDs to their initial target color.
-    for led in led_strip.leds:
-        led.color = led.target_color
+    led_strip.show_target_colors()
 
     # Start the renderer in a separate thread.
     thread = threading.Thread(
@@ -63,9 +147,9 @@ def start_renderer(stop_event: threading.Event | None = None) -> None:
 def run_renderer(
     strip: LedStrip,
     set_dmx: Callable[
-        [tuple[int, ...]],
+        [memoryview],
         None,
-    ],  # Callback that sends the DMX tuple to your sACN sender
+    ],  # Callback that sends the DMX payload to your sACN sender
     stop_event: threading.Event
     | None = None,  # Optional cooperative stop flag for clean shutdown
 ) -> None:
@@ -73,13 +157,19 @@ def run_renderer(
 
     Each frame (at settings.sacn.fps):
       1) Step the animations (updates LED.r/g/b to their in-between colors)
-      2) Pack LEDs into a DMX tuple (strip.to_tuple) and send via set_dmx(...)
+      2) Send the DMX view of the frame buffer (strip.payload) via set_dmx(...)
       3) Sleep just enough to maintain the target frame rate (frame pacing)
+
+    With settings.sacn.adaptive_fps, while the strip is idle (no fades running and
+    no target color changes) the loop drops to settings.sacn.idle_fps,
+    and wakes up instantly when an LED is marked dirty.
     """
     logger.info("LED renderer thread started")
 
     # Convert FPS to a frame duration in seconds (guard against 0 or negative).
     frame: float = 1.0 / max(1, int(settings.sacn.fps))
+    # Keep-alive frame duration while the strip is static.
+    idle_frame: float = idle_frame_time(settings.sacn.idle_fps)
 
     # Anchor a monotonic "next frame" timestamp; using monotonic avoids time jumps.
     next_tick: float = _t.perf_counter()
@@ -93,11 +183,17 @@ def run_renderer(
         # 1) Advance all animations to NOW (writes LED.r/g/b with the mid-fade color)
         strip.step()
 
-        # 2) Pack the current LED colors into the exact DMX ordering and send it
-        payload: tuple[int, ...] = strip.to_tuple()
-        set_dmx(payload)  # You implement this to push into your sACN sender
+        # 2) Send the frame buffer, which is already in the exact DMX ordering
+        set_dmx(strip.payload)  # You implement this to push into your sACN sender
+
+        # 3a) Nothing is changing, wait for a target change or the keep-alive frame
+        if settings.sacn.adaptive_fps and strip.is_idle:
+            strip.wait_for_change(idle_frame)
+            # Re-anchor, so the next fades start with a fresh frame schedule
+            next_tick = _t.perf_counter()
+            continue
 
-        # 3) Frame pacing to hit the requested FPS (simple fixed-step scheduler)
+        # 3b) Frame pacing to hit the requested FPS (simple fixed-step scheduler)
         next_tick += frame  # Schedule the ideal time of the next frame
         sleep_for = (
             next_tick - _t.perf_counter()
@@ -110,59 +206,179 @@ def run_renderer(
             next_tick = _t.perf_counter()
 
 
+def idle_frame_time(idle_fps: float) -> float:
+    """Return the frame duration in seconds while the strip is static.
+
+    The native sender only sends its keep-alive packets from the render loop,
+    so the idle frames are never further apart than its keep-alive interval,
+    otherwise the receivers would time out (2.5 seconds) and blank the LEDs.
+
+    :param idle_fps: The configured keep-alive frame rate
+    """
+    return min(1.0 / idle_fps, KEEP_ALIVE_INTERVAL)
+
+
+def _output_destination(
+    output: SACNOutputConfig,
+) -> IPv4Address | IPv6Address | None:
+    """Return the unicast destination of an output, None means multicast."""
+    if output.destination is not None:
+        return output.destination
+    return None if settings.sacn.multicast else settings.sacn.unicast_ip
+
+
 def activate_sacn() -> None:
-    """Start the sACN sender."""
-    global sender
+    """Start the sACN sender(s) for every output."""
+    global sender, _last_lut, _last_stats_report
+    _last_lut = None
+    _last_stats_report = _t.perf_counter()
+
+    outputs.clear()
+    source_name: str = f"BudapestMetroDisplay {__version__}"
+
+    if settings.sacn.backend == "native":
+        for output in resolve_outputs(len(led_strip.payload) // 3):
+            native_sender = E131Sender(
+                cid=SACN_CID,
+                source_name=source_name,
+                universe=output.universe,
+                destination=_output_destination(output),
+            )
+            native_senders.append(native_sender)
+            _add_output(output, native_sender.send, native_sender.keep_alive)
+        _log_outputs("native")
+        return
+
     sender = sACNsender(
-        source_name=f"BudapestMetroDisplay {__version__}",
-        cid=tuple(
-            uuid.uuid5(
-                uuid.UUID("12345678-1234-5678-1234-567812345678"),
-                "BudapestMetroDisplay",
-            ).bytes,
-        ),
+        source_name=source_name,
+        cid=tuple(SACN_CID),
         fps=settings.sacn.fps,
     )
     sender.start()
 
-    sender.activate_output(settings.sacn.universe)
-    sender[settings.sacn.universe].multicast = settings.sacn.multicast
-    if not settings.sacn.multicast:
-        sender[settings.sacn.universe].destination = str(settings.sacn.unicast_ip)
+    universes: set[int] = set()
+    for output in resolve_outputs(len(led_strip.payload) // 3):
+        if output.universe in universes:
+            logger.error(
+                f"Universe {output.universe} is used by multiple sACN outputs, "
+                f"use the native backend to send it to multiple devices",
+            )
+            continue
+        universes.add(output.universe)
+
+        destination = _output_destination(output)
+        sender.activate_output(output.universe)
+        sender[output.universe].multicast = destination is None
+        if destination is not None:
+            sender[output.universe].destination = str(destination)
 
-    logger.info(
-        f"sACN settings: "
-        f"{'multicast' if sender[settings.sacn.universe].multicast else 'unicast'}, "
-        f"destination ip: {sender[settings.sacn.universe].destination}",
+        _add_output(output, _sacn_output_setter(sender, output.universe))
+    _log_outputs("sacn")
+
+
+def _sacn_output_setter(
+    sacn_sender: sACNsender,
+    universe: int,
+) -> Callable[[bytes], None]:
+    """Return a function which sets the DMX data of a universe of the sACN sender."""
+
+    def send(dmx_data: bytes) -> None:
+        sacn_sender[universe].dmx_data = dmx_data
+
+    return send
+
+
+def _add_output(
+    output: SACNOutputConfig,
+    send: Callable[[bytes], None],
+    keep_alive: Callable[[], None] | None = None,
+) -> None:
+    """Register an output of the LED strip."""
+    destination = _output_destination(output)
+    outputs.append(
+        SACNOutput(
+            universe=output.universe,
+            destination="multicast" if destination is None else str(destination),
+            start=output.first_led * 3,
+            end=(output.first_led + output.led_count) * 3,
+            send=send,
+            keep_alive=keep_alive,
+        ),
     )
 
 
+def _log_outputs(backend: str) -> None:
+    """Log the active sACN outputs."""
+    for output in outputs:
+        logger.info(
+            f"sACN settings: {backend} backend, universe {output.universe}, "
+            f"LEDs {output.start // 3}-{output.end // 3 - 1}, "
+            f"destination ip: {output.destination}",
+        )
+
+
 def deactivate_sacn() -> None:
     """Stop the sACN sender."""
     if sender is not None:
         sender.stop()
+    for native_sender in native_senders:
+        native_sender.close()
+    native_senders.clear()
+
 
+def update_sacn(payload: memoryview) -> None:
+    """Hand the latest LED values to the sACN outputs.
 
-def update_sacn(payload: tuple[int, ...]) -> None:
-    """Update the internal tuple of the sACN to the latest values.
+    The payload is split into the ranges of the outputs, which are sent
+    in one pass.
 
-    Ensure each value is at least 28 when multiplied by esphome.brightness.
+    Ensure each value is at least 28 when multiplied by esphome.brightness,
+    using the lookup table that is rebuilt when the brightness changes.
+
+    Ranges identical to the previously sent one are not handed to the sender,
+    the sACN library already repeats the last frame as a keep-alive.
+    The native sender has no thread of its own, so the renderer's idle frames
+    drive its keep-alive.
     """
-    if sender is not None and sender[settings.sacn.universe].dmx_data is not None:
-        if settings.esphome.used:
-            from BudapestMetroDisplay.esphome import brightness
-
-            # Create a new list with modified values
-            modified_payload: list[int] = [
-                (
-                    ceil(28 / brightness)
-                    if value * brightness < 28 and value != 0
-                    else value
-                )
-                for value in payload
-            ]
-
-            # Convert the modified list to a tuple and assign it to dmx_data
-            sender[settings.sacn.universe].dmx_data = tuple(modified_payload)
-        else:
-            sender[settings.sacn.universe].dmx_data = payload
+    global _last_lut
+
+    lut: bytes | None = esphome.brightness_lut if settings.esphome.used else None
+    lut_changed: bool = lut is not _last_lut
+    _last_lut = lut
+
+    for output in outputs:
+        segment: memoryview = payload[output.start : output.end]
+
+        # Nothing changed since the previous frame
+        if not lut_changed and segment == output.last_payload:
+            if output.keep_alive is not None:
+                output.keep_alive()
+            continue
+
+        start_time: float = _t.perf_counter()
+        raw_data: bytes = segment.tobytes()
+        output.send(raw_data if lut is None else raw_data.translate(lut))
+        output.last_payload = raw_data
+        output.stats.record(_t.perf_counter() - start_time)
+
+    report_output_stats()
+
+
+def report_output_stats(*, force: bool = False) -> None:
+    """Log the frame timing of every output once every STATS_INTERVAL seconds."""
+    global _last_stats_report
+
+    now: float = _t.perf_counter()
+    if not force and now - _last_stats_report < STATS_INTERVAL:
+        return
+    _last_stats_report = now
+
+    for output in outputs:
+        stats: OutputStats = output.stats
+        avg: float = stats.total_time / stats.frames if stats.frames else 0.0
+        logger.debug(
+            f"sACN output universe {output.universe} ({output.destination}): "
+            f"{stats.frames} frames, "
+            f"avg {avg * 1000:.3f} ms, max {stats.max_time * 1000:.3f} ms",
+        )
+        stats.reset()
@@ -20,8 +20,15 @@
 #  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 #  OTHER DEALINGS IN THE SOFTWARE.
 
+from math import ceil
+
+import numpy as np
+
 RGB = tuple[int, int, int]
 
+# The lowest DMX value (~11%) at which the LEDs of the display still turn on
+BRIGHTNESS_FLOOR: int = 28
+
 #  Color helper functions
 
 
@@ -49,6 +56,27 @@ def _rgb_scale(rgb: RGB, factor: float) -> RGB:
     )
 
 
+def build_brightness_lut(brightness: float, floor: int = BRIGHTNESS_FLOOR) -> bytes:
+    """Build a 256-entry DMX translation table for a global brightness.
+
+    Every non-zero value which would fall below 'floor' when multiplied by
+    'brightness' is raised to the smallest value that reaches it.
+    The result can be applied to a payload with bytes.translate().
+
+    :param brightness: The global brightness of the display (0..1)
+    :param floor: The minimum visible DMX value at full brightness
+    """
+    if brightness <= 0:
+        # Display is off, there is no visible minimum
+        return bytes(range(256))
+
+    minimum: int = _clamp8(ceil(floor / brightness))
+    return bytes(
+        minimum if value * brightness < floor and value != 0 else value
+        for value in range(256)
+    )
+
+
 #  Easing - interpolation
 
 
@@ -62,3 +90,8 @@ def ease_in_out_quad(t: float) -> float:
     return (
         2 * t * t if t < 0.5 else 1 - ((-2 * t + 2) ** 2) / 2
     )  # standard in/out quad curve
+
+
+def ease_in_out_quad_array(t: np.ndarray) -> np.ndarray:
+    """Quadratic ease for an array of progress values, see ease_in_out_quad."""
+    return np.where(t < 0.5, 2 * t * t, 1 - ((-2 * t + 2) ** 2) / 2)
@@ -24,37 +24,66 @@ import argparse
 import asyncio
 import logging
 import signal
+import sqlite3
 import sys
 import threading
 import time
+import zipfile
 from asyncio import AbstractEventLoop
-
-from BudapestMetroDisplay import bkk_opendata, led_control, log, webserver
+from pathlib import Path
+
+from BudapestMetroDisplay import (
+    bkk_opendata,
+    gtfs,
+    led_control,
+    log,
+    snapshot,
+    webserver,
+)
 from BudapestMetroDisplay._version import __version__
+from BudapestMetroDisplay.async_loop import start_background_loop
 from BudapestMetroDisplay.config import settings
 from BudapestMetroDisplay.network import network
+from BudapestMetroDisplay.recording import Recorder
 
 if settings.esphome.used:
-    from BudapestMetroDisplay.esphome import (
-        connect_and_subscribe,
-        start_background_loop,
-    )
+    from BudapestMetroDisplay.esphome import connect_and_subscribe
 
 logger = logging.getLogger(__name__)
 
 parser = None
-loop: AbstractEventLoop
+loop: AbstractEventLoop | None = None
 stop_renderer_event: threading.Event = threading.Event()
+stop_snapshot_event: threading.Event = threading.Event()
+snapshot_file: Path | None = None
 
 
 def handle_exit_signal(_signum, _frame) -> None:  # noqa: ANN001
     """Handle signals for a clean exit."""
     logger.info("Signal received, stopping threads...")
 
+    if snapshot_file is not None:
+        stop_snapshot_event.set()
+        try:
+            snapshot.save_snapshot(snapshot_file, network)
+        except (sqlite3.Error, OSError):
+            logger.exception(f"Unable to save the snapshot to {snapshot_file}")
+        logger.debug("Snapshot saved")
+
+    if bkk_opendata.recorder is not None:
+        bkk_opendata.recorder.close()
+        logger.debug(
+            f"Recorded {bkk_opendata.recorder.count} API responses "
+            f"to {bkk_opendata.recorder.path}",
+        )
+
     bkk_opendata.departure_scheduler.shutdown()
     logger.debug("Departure scheduler shut down")
 
-    bkk_opendata.api_update_scheduler.shutdown(wait=False)
+    if bkk_opendata.api_fetcher is not None:
+        bkk_opendata.api_fetcher.shutdown()
+    else:
+        bkk_opendata.api_update_scheduler.shutdown(wait=False)
     logger.debug("API Update scheduler shut down")
 
     stop_renderer_event.set()
@@ -63,9 +92,9 @@ def handle_exit_signal(_signum, _frame) -> None:  # noqa: ANN001
     led_control.deactivate_sacn()
     logger.debug("sACN update thread shut down")
 
-    if settings.esphome.used:
-        loop.stop()
-        logger.debug("ESPHome update thread shut down")
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+        logger.debug("Asyncio thread shut down")
 
     logger.info("Cleanup complete. Exiting...")
     sys.exit(0)
@@ -76,11 +105,7 @@ sys.excepthook = log.log_exception
 
 
 def main() -> None:  # noqa: D103
-    global parser, loop
-
-    if settings.esphome.used:
-        loop = start_background_loop()
-        loop.call_soon_threadsafe(asyncio.create_task, connect_and_subscribe())
+    global parser, loop, snapshot_file
 
     # Set up argument parser
     parser = argparse.ArgumentParser(
@@ -96,6 +121,12 @@ def main() -> None:  # noqa: D103
         action="store_true",
         help="Enable trace mode for verbose output.",
     )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="PATH",
+        help="Record the API responses to a gzip file for the replay module.",
+    )
     args = parser.parse_args()
 
     # Set up logging
@@ -106,16 +137,67 @@ def main() -> None:  # noqa: D103
     signal.signal(signal.SIGINT, handle_exit_signal)
     signal.signal(signal.SIGTERM, handle_exit_signal)
 
+    if args.record is not None:
+        bkk_opendata.recorder = Recorder(args.record)
+        logger.info(f"Recording the API responses to {args.record}")
+
+    # The ESPHome connection and the async API updates share one event loop
+    if settings.esphome.used or bkk_opendata.api_fetcher is not None:
+        event_loop = start_background_loop()
+        loop = event_loop
+
+        if settings.esphome.used:
+            event_loop.call_soon_threadsafe(
+                asyncio.create_task,
+                connect_and_subscribe(),
+            )
+        if bkk_opendata.api_fetcher is not None:
+            bkk_opendata.api_fetcher.start(event_loop)
+
+    # Schedule the regular arrivals from the offline timetable
+    if settings.gtfs.used and settings.gtfs.path is not None:
+        try:
+            bkk_opendata.timetable = gtfs.load_timetable(settings.gtfs.path, network)
+        except (OSError, zipfile.BadZipFile, KeyError, ValueError):
+            logger.exception(
+                "Unable to load the GTFS timetable, using the regular API updates",
+            )
+
+    # Show the schedules known before the restart until the first updates arrive
+    if settings.snapshot.used:
+        try:
+            snapshot_file = snapshot.snapshot_path()
+            snapshot.restore_snapshot(
+                snapshot_file,
+                network,
+                settings.snapshot.max_age,
+            )
+        except (sqlite3.Error, OSError):
+            logger.exception("Unable to restore the snapshot")
+        if snapshot_file is not None:
+            snapshot.start_snapshot_writer(snapshot_file, network, stop_snapshot_event)
+
+    # Group the routes whose schedules are requested together
+    batches = {
+        "REGULAR": bkk_opendata.plan_query_batches(network.routes, "REGULAR"),
+        "REALTIME": bkk_opendata.plan_query_batches(
+            [route for route in network.routes if route.type == "railway"],
+            "REALTIME",
+        ),
+    }
+
     for i, route in enumerate(network.routes):
         # Schedule the updates from each other by settings.bkk.api_update_interval
         delay = i * settings.bkk.api_update_interval
 
-        # Create schedules for updating the departure data
-        bkk_opendata.create_schedule_updates(route, "REGULAR", delay)
-        if route.type == "railway":
-            # Create schedules for updating the realtime data
-            bkk_opendata.create_schedule_updates(route, "REALTIME", delay)
-        else:
+        # Create schedules for updating the departure data (REGULAR)
+        # and the realtime data (REALTIME) with the first route of each batch
+        for schedule_type, schedule_batches in batches.items():
+            for batch in schedule_batches:
+                if batch.routes[0] is route:
+                    bkk_opendata.create_schedule_updates(batch, schedule_type, delay)
+
+        if route.type != "railway":
             # Create schedules for updating the alarm data for non-realtime stops
             bkk_opendata.create_alert_updates(route, delay)
 
@@ -4,9 +4,10 @@ from __future__ import annotations
 import logging
 import time as _t
 from dataclasses import field
-from threading import Lock
+from threading import Event, Lock
 from typing import Any
 
+import numpy as np
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 from BudapestMetroDisplay.config import settings
@@ -15,17 +16,20 @@ from BudapestMetroDisplay.led_helpers import (
     _rgb_clamp,
     _rgb_max,
     _rgb_scale,
-    ease_in_out_quad,
+    ease_in_out_quad_array,
 )
 
 RGB = tuple[int, int, int]
 logger = logging.getLogger(__name__)
 
+# StopId fields which affect the target color of the LED of its Stop
+_STOP_ID_LED_FIELDS: frozenset[str] = frozenset({"in_service", "vehicle_present"})
+
 
 class LED(BaseModel):
     """Physical RGB LED.
 
-    - (r,g,b) is the *current* output color.
+    - (r,g,b) is the *current* output color, a view into the LedStrip frame buffer.
     - default_override pins a default color for this LED (if None -> computed).
     - 'stops' back-ref lets the LED compute its default from attached Stops' Routes.
     """
@@ -33,22 +37,77 @@ class LED(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     index: int
-    r: int = 0
-    g: int = 0
-    b: int = 0
     stops: list[Stop] = field(default_factory=list)  # back-references from Stops
     color_override: RGB | None = None
 
+    _strip: LedStrip | None = PrivateAttr(default=None)  # set by the LedStrip
+    # Current (r, g, b) output color, rebound to a row of the LedStrip frame buffer
+    _rgb: np.ndarray = PrivateAttr(
+        default_factory=lambda: np.zeros(3, dtype=np.uint8),
+    )
+
+    def __eq__(self, other: object) -> bool:
+        """Compare LEDs by identity, as each one is a view of a physical LED."""
+        return self is other
+
+    __hash__ = object.__hash__
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute and mark the LED dirty if its override changed."""
+        super().__setattr__(name, value)
+        if name == "color_override":
+            self.mark_dirty()
+
+    def mark_dirty(self) -> None:
+        """Notify the LedStrip that the target color of this LED must be recomputed."""
+        if self._strip is not None:
+            self._strip.mark_dirty(self.index)
+
+    def attach(self, frame: np.ndarray) -> None:
+        """Move the color of the LED into its row of a LedStrip frame buffer."""
+        frame[self.index] = self._rgb
+        self._rgb = frame[self.index]
+
+    @property
+    def r(self) -> int:
+        """Get the red channel of the LED."""
+        return int(self._rgb[0])
+
+    @r.setter
+    def r(self, value: int) -> None:
+        """Set the red channel of the LED (auto-clamped to 0..255)."""
+        self._rgb[0] = _clamp8(value)
+
+    @property
+    def g(self) -> int:
+        """Get the green channel of the LED."""
+        return int(self._rgb[1])
+
+    @g.setter
+    def g(self, value: int) -> None:
+        """Set the green channel of the LED (auto-clamped to 0..255)."""
+        self._rgb[1] = _clamp8(value)
+
+    @property
+    def b(self) -> int:
+        """Get the blue channel of the LED."""
+        return int(self._rgb[2])
+
+    @b.setter
+    def b(self, value: int) -> None:
+        """Set the blue channel of the LED (auto-clamped to 0..255)."""
+        self._rgb[2] = _clamp8(value)
+
     @property
     def color(self) -> RGB:
         """Get the LED color as an RGB tuple."""
-        return self.r, self.g, self.b
+        r, g, b = self._rgb.tolist()
+        return r, g, b
 
     @color.setter
     def color(self, value: RGB) -> None:
         """Set the LED color from an (r, g, b) tuple (auto-clamped to 0..255)."""
-        r, g, b = _rgb_clamp(value)
-        self.r, self.g, self.b = r, g, b
+        self._rgb[:] = _rgb_clamp(value)
 
     @property
     def default_color(self) -> RGB:
@@ -111,77 +170,135 @@ class LED(BaseModel):
 
 
 class LedStrip(BaseModel):
-    """An LED Strip that holds LEDs to make them easier to handle."""
+    """An LED Strip that holds LEDs to make them easier to handle.
+
+    The current colors of the LEDs are stored in one preallocated uint8 frame
+    buffer with one (r, g, b) row per LED index, which is also the DMX payload.
+    """
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     leds: list[LED] = Field(default_factory=list)
 
-    # Active animations for LEDs that are currently transitioning colors.
-    anims: dict[int, Animation] = Field(default_factory=dict)
     previous_target_color: dict[int, RGB] = Field(default_factory=dict)
 
-    def to_tuple(self) -> tuple[int, ...]:
-        """Pack current LED colors to sACN/DMX order.
+    # Indices of LEDs whose target color has to be recomputed on the next frame.
+    _dirty: set[int] = PrivateAttr(default_factory=set)
+    _dirty_lock: Lock = PrivateAttr(default_factory=Lock)
+    # Set when an LED is marked dirty, so an idle renderer can wake up instantly.
+    _wake: Event = PrivateAttr(default_factory=Event)
+    _leds_by_index: dict[int, LED] = PrivateAttr(default_factory=dict)
+
+    # Frame buffer (one row per LED index) and its flat DMX view
+    _frame: np.ndarray = PrivateAttr()
+    _payload: memoryview = PrivateAttr()
+    # Fades of the LEDs that are currently transitioning colors.
+    _anims: AnimationEngine = PrivateAttr()
+
+    def model_post_init(self, __context: Any, /) -> None:
+        """Link LedStrip <-> LED and mark every LED dirty for the first frame."""
+        size: int = max((led.index for led in self.leds), default=-1) + 1
+        self._frame = np.zeros((size, 3), dtype=np.uint8)
+        self._payload = self._frame.reshape(-1).data
+        self._anims = AnimationEngine(size=size)
+
+        for led in self.leds:
+            led._strip = self  # noqa: SLF001
+            led.attach(self._frame)
+            self._leds_by_index[led.index] = led
+        self.mark_all_dirty()
+
+    def mark_dirty(self, index: int) -> None:
+        """Mark the LED with the given index for target color recomputation."""
+        with self._dirty_lock:
+            self._dirty.add(index)
+            self._wake.set()
+
+    def mark_all_dirty(self) -> None:
+        """Mark every LED of the strip for target color recomputation."""
+        with self._dirty_lock:
+            self._dirty.update(self._leds_by_index)
+            self._wake.set()
+
+    def pop_dirty(self) -> list[LED]:
+        """Return the dirty LEDs and clear the dirty set."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+            self._wake.clear()
+        return [self._leds_by_index[idx] for idx in sorted(dirty)]
+
+    @property
+    def is_idle(self) -> bool:
+        """Return True if no LED is fading and no LED is waiting to be recomputed."""
+        with self._dirty_lock:
+            return not self._anims.is_running() and not self._dirty
 
-        (led1_r, led1_g, led1_b, led2_r, led2_g, led2_b, ...)
-        Ordered by ascending LED.index for stable output.
+    def wait_for_change(self, timeout: float) -> bool:
+        """Block until an LED is marked dirty or the timeout elapses.
+
+        :param timeout: The maximum time to wait in seconds
+        :return: True if an LED was marked dirty, False on timeout
         """
-        out: list[int] = []
-        for led in sorted(self.leds, key=lambda i: i.index):
-            out.extend((led.r, led.g, led.b))
-        return tuple(out)
+        return self._wake.wait(timeout)
 
-    def step(self) -> None:
-        """Advance all animations to the current time and remove which are finished."""
-        # Grab the timestamp once per frame for consistent stepping.
-        now: float = _t.perf_counter()
+    @property
+    def payload(self) -> memoryview:
+        """Return the current LED colors in sACN/DMX order, without copying.
+
+        (led0_r, led0_g, led0_b, led1_r, led1_g, led1_b, ...)
+        The DMX address of an LED is determined by its LED.index.
+        The view is updated in place by every frame.
+        """
+        return self._payload
+
+    @property
+    def anims(self) -> AnimationEngine:
+        """Return the animation engine driving the fades of the LEDs."""
+        return self._anims
 
-        # Check if any LEDs have its target color changed
+    def show_target_colors(self) -> None:
+        """Set every LED to its target color at once, without fading."""
         for led in self.leds:
+            led.color = led.target_color
+
+    def to_tuple(self) -> tuple[int, ...]:
+        """Pack current LED colors to sACN/DMX order as a tuple."""
+        return tuple(self._payload)
+
+    def step(self, now: float | None = None) -> None:
+        """Advance all animations to the current time and remove which are finished.
+
+        Only the LEDs marked dirty since the previous frame have their
+        target color recomputed, idle frames only drive the running animations.
+
+        :param now: Timestamp of the frame (monotonic perf_counter by default,
+            a virtual clock when replaying recorded API traffic)
+        """
+        # Grab the timestamp once per frame for consistent stepping.
+        if now is None:
+            now = _t.perf_counter()
+
+        # Check if any of the dirty LEDs have its target color changed
+        for led in self.pop_dirty():
             target_color: RGB = led.target_color
 
-            anim: Animation | None = self.anims.get(led.index)
-            if anim is not None:
-                # Target color changed, start a new animation.
-                if target_color != anim.end:
-                    # If mid-fade, sample the current color.
-                    start_color: RGB = anim.sample(now)
-
-                    self.anims[led.index] = Animation(
-                        led=led,
-                        start=start_color,  # starting color (sampled if mid-fade)
-                        end=target_color,  # new target color
-                        t0=now,  # start timestamp
-                    )
+            if self._anims.is_running(led.index):
+                # Target color changed, start a new animation
+                # from the current (possibly mid-fade) color.
+                if target_color != self._anims.end_color(led.index):
+                    self._anims.start(led.index, target_color, now, self._frame)
             elif (
                 self.previous_target_color.get(led.index) is not None
                 and target_color != self.previous_target_color[led.index]
             ):
                 # Animation does not exist, but the target color has changed
                 # since the previous frame.
-                self.anims[led.index] = Animation(
-                    led=led,
-                    start=led.color,  # starting color
-                    end=target_color,  # new target color
-                    t0=now,  # start timestamp
-                )
+                self._anims.start(led.index, target_color, now, self._frame)
 
             self.previous_target_color[led.index] = target_color
 
-        # Collect indices that finish this frame to remove after iteration.
-        finished: list[int] = []
-
-        now = _t.perf_counter()
-
-        # Drive each animation: set the LED.r/g/b to the correct mid-fade color.
-        for idx, anim in self.anims.items():
-            if anim.step(now):  # step returns True if finished
-                finished.append(idx)
-
-        # Drop finished animations
-        for idx in finished:
-            self.anims.pop(idx, None)
+        # Drive every running animation in one pass (writes the frame buffer)
+        self._anims.step(now, self._frame)
 
 
 # ========= transit domain =========
@@ -195,10 +312,25 @@ class Network(BaseModel):
 
     routes: list[Route] = Field(default_factory=list)
 
+    # Index of the StopIds of all Routes by their API ID
+    _stop_id_index: dict[str, StopId] = PrivateAttr(default_factory=dict)
+
     def add_route(self, route: Route) -> None:
         """Add a Route to the Network."""
         if route not in self.routes:
             self.routes.append(route)
+            route.network = self
+
+    def index_stop_id(self, stop_id: StopId) -> None:
+        """Add a StopId to the lookup index of the Network."""
+        self._stop_id_index.setdefault(stop_id.stop_id, stop_id)
+
+    def get_stop_id(self, stop_id: str) -> StopId | None:
+        """Return the StopId object in this Network that matches stop_id.
+
+        Returns None if not found.
+        """
+        return self._stop_id_index.get(stop_id)
 
 
 class Route(BaseModel):
@@ -223,32 +355,55 @@ class Route(BaseModel):
     stops: list[Stop] = Field(default_factory=list)
 
     _lock: Lock = PrivateAttr(default_factory=Lock)
+    _network: Network | None = PrivateAttr(default=None)  # set by the Network
+    # Index of the StopIds of the Route by their API ID
+    _stop_id_index: dict[str, StopId] = PrivateAttr(default_factory=dict)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute and mark the LEDs of the Route dirty on color change."""
+        super().__setattr__(name, value)
+        if name == "color":
+            for stop in self.stops:
+                stop.led.mark_dirty()
 
     @property
     def lock(self) -> Lock:
         """Return the lock object for this Route."""
         return self._lock
 
+    @property
+    def network(self) -> Network | None:
+        """The Network that this Route is part of."""
+        return self._network
+
+    @network.setter
+    def network(self, network: Network) -> None:
+        """Link Route -> Network and add the StopIds to the Network index."""
+        self._network = network
+        for sid in self.get_stop_ids():
+            network.index_stop_id(sid)
+
     def add_stop(self, stop: Stop) -> None:
         """Link Route <-> Stop."""
         with self._lock:
             if stop not in self.stops:
                 self.stops.append(stop)  # Add Stop to the Route
+        for sid in stop.stop_ids:
+            self.index_stop_id(sid)
+
+    def index_stop_id(self, stop_id: StopId) -> None:
+        """Add a StopId to the lookup index of the Route (and its Network)."""
+        with self._lock:
+            self._stop_id_index[stop_id.stop_id] = stop_id
+        if self._network is not None:
+            self._network.index_stop_id(stop_id)
 
     def get_stop_id(self, stop_id: str) -> StopId | None:
         """Return the StopId object in this Route that matches stop_id.
 
         Returns None if not found.
         """
-        return next(
-            (
-                sid
-                for stop in self.stops
-                for sid in stop.stop_ids
-                if sid.stop_id == stop_id
-            ),
-            None,
-        )
+        return self._stop_id_index.get(stop_id)
 
     def get_stop_ids(self) -> list[StopId]:
         """Return all Stop IDs of the Route."""
@@ -289,6 +444,7 @@ class Stop(BaseModel):
         """Link Stop <-> LED."""
         if self not in self.led.stops:
             self.led.stops.append(self)
+            self.led.mark_dirty()
 
     @property
     def color(self) -> RGB:
@@ -320,10 +476,11 @@ class Stop(BaseModel):
             return any(si.vehicle_present for si in self.stop_ids)
 
     def add_stop_id(self, stop_id: StopId) -> None:
-        """Add a StopId to the Stop."""
+        """Add a StopId to the Stop, and to the lookup index of its Route."""
         with self._lock:
             if stop_id not in self.stop_ids:
                 self.stop_ids.append(stop_id)
+        self.route.index_stop_id(stop_id)
 
 
 class StopId(BaseModel):
@@ -344,70 +501,111 @@ class StopId(BaseModel):
     def after_init(self) -> StopId:
         """Add StopId to its Stop during init."""
         self.stop.add_stop_id(self)
+        self.stop.led.mark_dirty()
         return self
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute and mark the LED of the Stop dirty on state change.
 
-class Animation(BaseModel):
-    """Represents one animation that drives a LED from a start to an end color.
-
-    Fields:
-      - led   : the LED instance to mutate each frame
-      - start : starting RGB at the moment the animation began
-      - end   : target RGB we want to reach
-      - t0    : start time (monotonic perf_counter) to compute progress
-      - dur   : total duration in seconds (0 means snap instantly)
-    """
-
-    # Allow non-Pydantic types (callables, LED objects) inside this model.
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
-    led: LED  # LED object to update
-    start: RGB  # Starting color
-    end: RGB  # Target color
-    t0: float  # Time when animation started (seconds, monotonic)
-    dur: float = settings.led.fade_time  # Duration in seconds (>= 0)
-
-    def sample(self, now: float) -> RGB:
-        """Compute the interpolated color for the time 'now'.
-
-        Returns the color we should display at 'now'.
+        Only in_service and vehicle_present affect the LED color, and the LED is
+        only marked when the value actually changes.
         """
-        # Snap instantly if the duration is zero (or negative for safety).
-        if self.dur <= 0:
-            return _rgb_clamp(self.end)
+        changed: bool = name in _STOP_ID_LED_FIELDS and getattr(self, name) != value
+        super().__setattr__(name, value)
+        if changed:
+            self.stop.led.mark_dirty()
 
-        # Compute normalized progress u in [0,1].
-        u: float = (now - self.t0) / self.dur
 
-        # If not yet started, stay at the start color.
-        if u <= 0.0:
-            return _rgb_clamp(self.start)
+class AnimationEngine(BaseModel):
+    """Batched fade animations for the LEDs of a LedStrip.
 
-        # If finished (or overshot), use the end color.
-        if u >= 1.0:
-            return _rgb_clamp(self.end)
+    Each LED index has one slot in parallel arrays:
+      - start  : starting RGB at the moment the animation began
+      - end    : target RGB we want to reach
+      - t0     : start time (monotonic perf_counter) to compute progress
+      - dur    : total duration in seconds (0 means snap instantly)
+      - active : whether the LED is currently fading
 
-        # Apply easing to the linear progress to get a smoother curve.
-        k: float = ease_in_out_quad(u)
+    All running fades are evaluated in one NumPy pass per frame.
+    """
 
-        # Interpolate each channel separately using the eased progress.
-        r = int(self.start[0] + (self.end[0] - self.start[0]) * k)
-        g = int(self.start[1] + (self.end[1] - self.start[1]) * k)
-        b = int(self.start[2] + (self.end[2] - self.start[2]) * k)
+    model_config = ConfigDict(arbitrary_types_allowed=True)
 
-        # Clamp to ensure valid DMX/sACN byte values and return.
-        return _clamp8(r), _clamp8(g), _clamp8(b)
+    size: int  # Number of LED slots (frame buffer rows)
 
-    def step(self, now: float) -> bool:
-        """Advance the LED to the color corresponding to time 'now'.
+    _start: np.ndarray = PrivateAttr()
+    _end: np.ndarray = PrivateAttr()
+    _t0: np.ndarray = PrivateAttr()
+    _dur: np.ndarray = PrivateAttr()
+    _active: np.ndarray = PrivateAttr()
 
-        Returns True when the animation is finished.
+    def model_post_init(self, __context: Any, /) -> None:
+        """Allocate the parallel arrays for every LED slot."""
+        self._start = np.zeros((self.size, 3), dtype=np.float64)
+        self._end = np.zeros((self.size, 3), dtype=np.uint8)
+        self._t0 = np.zeros(self.size, dtype=np.float64)
+        self._dur = np.zeros(self.size, dtype=np.float64)
+        self._active = np.zeros(self.size, dtype=np.bool_)
+
+    def is_running(self, index: int | None = None) -> bool:
+        """Return whether the LED (or any LED if index is None) is fading."""
+        if index is None:
+            return bool(self._active.any())
+        return bool(self._active[index])
+
+    def end_color(self, index: int) -> RGB:
+        """Return the target color of the animation of the LED."""
+        r, g, b = self._end[index].tolist()
+        return r, g, b
+
+    def start(
+        self,
+        index: int,
+        end: RGB,
+        now: float,
+        frame: np.ndarray,
+        dur: float | None = None,
+    ) -> None:
+        """Start fading the LED from its current color in the frame to 'end'.
+
+        :param index: The LED index (frame buffer row)
+        :param end: The target color
+        :param now: Start timestamp (monotonic perf_counter)
+        :param frame: The frame buffer holding the current colors
+        :param dur: Duration in seconds, settings.led.fade_time if None
         """
-        # Compute the color for 'now' (does not mutate LED yet).
-        r, g, b = self.sample(now)
+        self._start[index] = frame[index]
+        self._end[index] = _rgb_clamp(end)
+        self._t0[index] = now
+        self._dur[index] = settings.led.fade_time if dur is None else dur
+        self._active[index] = True
 
-        # Write the computed color onto the actual LED object (stateful side effect).
-        self.led.r, self.led.g, self.led.b = r, g, b
+    def step(self, now: float, frame: np.ndarray) -> None:
+        """Write the colors of all running fades for the time 'now' into the frame.
 
-        # Tell the caller whether we're done (for pruning finished animations).
-        return (self.dur <= 0) or (now - self.t0 >= self.dur)
+        Fades which reached their end color are deactivated.
+        """
+        idx: np.ndarray = np.flatnonzero(self._active)
+        if idx.size == 0:
+            return
+
+        # Compute normalized progress u in [0,1], zero duration snaps instantly.
+        dur: np.ndarray = self._dur[idx]
+        elapsed: np.ndarray = now - self._t0[idx]
+        u: np.ndarray = np.ones_like(dur)
+        np.divide(elapsed, dur, out=u, where=dur > 0)
+        np.clip(u, 0.0, 1.0, out=u)
+
+        # Apply easing, then interpolate every channel with the eased progress.
+        k: np.ndarray = ease_in_out_quad_array(u)[:, np.newaxis]
+        start: np.ndarray = self._start[idx]
+        end: np.ndarray = self._end[idx]
+        color: np.ndarray = start + (end - start) * k
+
+        # Finished fades land exactly on their end color.
+        done: np.ndarray = u >= 1.0
+        color[done] = end[done]
+        frame[idx] = np.clip(color, 0, 255).astype(np.uint8)
+
+        # Completion mask drops the finished fades.
+        self._active[idx[done]] = False
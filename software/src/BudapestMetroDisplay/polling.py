@@ -0,0 +1,160 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import logging
+import threading
+from statistics import median
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# Predictions moving less than this many seconds between polls are stable
+STABLE_DRIFT: float = 15
+# Predictions moving more than this many seconds between polls are changing
+HOT_DRIFT: float = 60
+# Multipliers of the interval for stable and changing data
+STRETCH_FACTOR: float = 1.5
+SHRINK_FACTOR: float = 0.5
+
+
+class RouteCadence:
+    """The observed state of the updates of a route."""
+
+    __slots__ = ("arrivals", "drift", "interval")
+
+    def __init__(self, interval: float) -> None:
+        """Start with the configured interval and no observed predictions."""
+        self.interval: float = interval
+        self.arrivals: dict[str, int] = {}
+        self.drift: float | None = None
+
+
+class AdaptiveCadence:
+    """Adapt the update interval of each route to how its data changes.
+
+    After every update, the predicted arrivals are compared with the ones
+    of the previous update. If the predictions are stable, the interval
+    is stretched, if they move a lot, it is shrunk, otherwise it returns
+    to the base interval. If the next arrival is farther away than
+    the interval, the update waits until shortly before it.
+    The interval is kept between the minimum and the maximum.
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+    ) -> None:
+        """Create the cadence of the routes.
+
+        :param base_interval: The configured update interval in seconds
+        :param min_interval: The shortest update interval in seconds
+        :param max_interval: The longest update interval in seconds
+        """
+        self.base_interval: float = base_interval
+        self.min_interval: float = min(min_interval, base_interval)
+        self.max_interval: float = max(max_interval, base_interval)
+        self._routes: dict[str, RouteCadence] = {}
+        self._lock = threading.Lock()
+
+    def interval(self, route_id: str) -> float:
+        """Return the current update interval of a route in seconds."""
+        with self._lock:
+            cadence = self._routes.get(route_id)
+            return cadence.interval if cadence is not None else self.base_interval
+
+    def observe(
+        self,
+        route_id: str,
+        predictions: Mapping[str, int],
+        soonest_arrival: float | None,
+        now: float,
+    ) -> float:
+        """Adapt the update interval of a route to the data of an update.
+
+        :param route_id: The ID of the updated route
+        :param predictions: Timestamps of the predicted arrivals by their ID
+        :param soonest_arrival: Timestamp of the next arrival of the route,
+            None if there are no upcoming arrivals
+        :param now: The current timestamp
+        :return: The new update interval of the route in seconds
+        """
+        with self._lock:
+            cadence = self._routes.get(route_id)
+            if cadence is None:
+                cadence = self._routes[route_id] = RouteCadence(self.base_interval)
+
+            # How much the predictions moved since the previous update
+            moves = [
+                abs(arrival - cadence.arrivals[arrival_id])
+                for arrival_id, arrival in predictions.items()
+                if arrival_id in cadence.arrivals
+            ]
+            cadence.drift = median(moves) if moves else None
+            cadence.arrivals = dict(predictions)
+
+            interval = cadence.interval
+            if cadence.drift is None:
+                interval = self.base_interval
+            elif cadence.drift <= STABLE_DRIFT:
+                interval *= STRETCH_FACTOR
+            elif cadence.drift >= HOT_DRIFT:
+                interval *= SHRINK_FACTOR
+            else:
+                interval = (interval + self.base_interval) / 2
+
+            # Nothing to refresh until shortly before the next arrival
+            if soonest_arrival is None:
+                interval = self.max_interval
+            else:
+                interval = max(interval, soonest_arrival - now - self.min_interval)
+
+            cadence.interval = min(max(interval, self.min_interval), self.max_interval)
+            return cadence.interval
+
+    def repeat(self, route_id: str, now: float) -> float:
+        """Adapt the update interval of a route to an update with the same data.
+
+        :param route_id: The ID of the updated route
+        :param now: The current timestamp
+        :return: The new update interval of the route in seconds
+        """
+        with self._lock:
+            cadence = self._routes.get(route_id)
+            predictions = dict(cadence.arrivals) if cadence is not None else {}
+
+        soonest_arrival = min(
+            (arrival for arrival in predictions.values() if arrival > now),
+            default=None,
+        )
+        return self.observe(route_id, predictions, soonest_arrival, now)
+
+    def drift(self, route_id: str) -> float | None:
+        """Return the median movement of the predictions of a route in seconds."""
+        with self._lock:
+            cadence = self._routes.get(route_id)
+            return cadence.drift if cadence is not None else None
@@ -0,0 +1,183 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+from urllib.parse import quote_plus
+
+from BudapestMetroDisplay.bkk_response import ApiResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from BudapestMetroDisplay.model import Route
+
+logger = logging.getLogger(__name__)
+
+# Keep the request URLs below the length that every server and proxy accepts
+MAX_URL_LENGTH: int = 2000
+# Maximum number of stop times requested in one request
+MAX_QUERY_LIMIT: int = 1000
+
+
+class QueryBatch:
+    """Routes whose schedules are requested together in one API request.
+
+    The arrivals-and-departures-for-stop method accepts many stopIds,
+    so the stops of multiple routes can be queried at once,
+    and the stop times are split back to the routes afterwards.
+    """
+
+    __slots__ = ("limit", "name", "routes")
+
+    def __init__(self, routes: Iterable[Route], limit: int) -> None:
+        """Create a batch.
+
+        :param routes: The routes of the batch
+        :param limit: The maximum number of stop times requested for the batch
+        """
+        self.routes: list[Route] = list(routes)
+        self.name: str = "+".join(route.name for route in self.routes)
+        self.limit: int = limit
+
+    @property
+    def is_single(self) -> bool:
+        """Whether the batch contains only one route."""
+        return len(self.routes) == 1
+
+    @property
+    def stop_ids(self) -> list[str]:
+        """The stopIds of the routes, without duplicates."""
+        return list(
+            dict.fromkeys(
+                sid.stop_id for route in self.routes for sid in route.get_stop_ids()
+            ),
+        )
+
+
+def stop_ids_length(stop_ids: Iterable[str]) -> int:
+    """Return the length the stopIds add to the query string of a request."""
+    return sum(len("&stopId=") + len(quote_plus(stop_id)) for stop_id in stop_ids)
+
+
+def plan_batches(
+    routes: Iterable[Route],
+    route_limit: int,
+    base_length: int,
+    *,
+    max_url_length: int = MAX_URL_LENGTH,
+    max_limit: int = MAX_QUERY_LIMIT,
+) -> list[QueryBatch]:
+    """Group the routes into as few requests as the URL length and the limit allow.
+
+    The routes are added in order to the current batch while they fit,
+    and a route is never split between batches. A route which doesn't fit
+    into a request on its own gets a batch of its own.
+
+    :param routes: The routes to query
+    :param route_limit: The number of stop times requested for one route
+    :param base_length: The length of the request URL without the stopIds
+    :param max_url_length: The maximum length of a request URL
+    :param max_limit: The maximum number of stop times requested at once
+    :return: The batches, with the routes in their original order
+    """
+    batches: list[QueryBatch] = []
+    current: list[Route] = []
+    current_stop_ids: dict[str, None] = {}
+
+    for route in routes:
+        stop_ids = dict.fromkeys(sid.stop_id for sid in route.get_stop_ids())
+        merged = current_stop_ids | stop_ids
+
+        if current and (
+            base_length + stop_ids_length(merged) > max_url_length
+            or (len(current) + 1) * route_limit > max_limit
+        ):
+            batches.append(QueryBatch(current, len(current) * route_limit))
+            current, merged = [], stop_ids
+
+        current.append(route)
+        current_stop_ids = merged
+
+    if current:
+        batches.append(QueryBatch(current, len(current) * route_limit))
+
+    return batches
+
+
+def split_by_route(
+    api_response: ApiResponse,
+    routes: Iterable[Route],
+) -> dict[str, ApiResponse]:
+    """Split a response of a batch into one response per route.
+
+    The route of a stop time is looked up from its trip in the references,
+    or from its stopId if the trip is not included. The stop times of trips
+    of other routes are dropped. Each response contains
+    the stop times of its route only, and everything else of the original
+    response, e.g. the alerts.
+
+    :param api_response: Decoded response for the stops of the routes
+    :param routes: The routes of the batch
+    :return: The responses by route ID
+    """
+    routes = list(routes)
+    entry = api_response.entry
+    if entry is None:
+        return {route.route_id: api_response for route in routes}
+
+    trips: dict[str, Any] = api_response.references.get("trips") or {}
+    response_route_ids: set[str] = set(entry.get("routeIds", []))
+    response_route_ids.update(api_response.references.get("routes") or {})
+
+    stop_times: dict[str, list[Any]] = {route.route_id: [] for route in routes}
+    default_stop_id: str | None = entry.get("stopId")
+
+    for stop_time in api_response.iter_stop_times():
+        trip = trips.get(stop_time.get("tripId"))
+        trip_route_id = trip.get("routeId") if trip is not None else None
+        if trip_route_id is not None:
+            # The route of the trip is known, a stop time of another route
+            # on a shared stop doesn't belong to the batch
+            if trip_route_id in stop_times:
+                stop_times[trip_route_id].append(stop_time)
+            continue
+
+        # The trip is not in the references, use every route with this stop
+        stop_id = stop_time.get("stopId", default_stop_id)
+        for route in routes:
+            if stop_id is not None and route.get_stop_id(stop_id) is not None:
+                stop_times[route.route_id].append(stop_time)
+
+    responses: dict[str, ApiResponse] = {}
+    for route_id, route_stop_times in stop_times.items():
+        route_entry = dict(entry)
+        route_entry["stopTimes"] = route_stop_times
+        route_entry["routeIds"] = (
+            [route_id] if route_stop_times or route_id in response_route_ids else []
+        )
+        data = dict(api_response.data)
+        data["entry"] = route_entry
+        responses[route_id] = ApiResponse({**api_response.raw, "data": data})
+
+    return responses
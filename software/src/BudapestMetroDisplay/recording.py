@@ -0,0 +1,143 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+"""Recording of the raw BKK OpenData API responses, see the replay module."""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import logging
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# The types of the recorded responses, REGULAR and REALTIME are schedules
+RECORD_TYPES: frozenset[str] = frozenset({"REGULAR", "REALTIME", "ALERTS"})
+
+
+class RecordedResponse(NamedTuple):
+    """A raw API response with the time it was received."""
+
+    time: float  # Timestamp of the response
+    type: str  # REGULAR, REALTIME or ALERTS
+    routes: tuple[str, ...]  # Route IDs the request was made for
+    content: bytes  # The body of the response
+
+
+class Recorder:
+    """Append the raw API responses to a gzip compressed JSON lines file.
+
+    Every response is one line, so a recording cut short by a crash
+    can still be replayed up to its last complete line. The bodies are
+    stored as text, or base64 encoded if they are not valid UTF-8.
+    It is safe to call record from multiple threads, and it never raises,
+    so the recording can't break the API updates.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Open the recording file, an existing file is overwritten.
+
+        :param path: The path of the recording file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")  # noqa: SIM115
+        self.count: int = 0
+
+    def record(
+        self,
+        time: float,
+        record_type: str,
+        routes: Iterable[str],
+        content: bytes,
+    ) -> None:
+        """Append a response to the recording.
+
+        :param time: Timestamp of the response
+        :param record_type: REGULAR, REALTIME or ALERTS
+        :param routes: Route IDs the request was made for
+        :param content: The body of the response
+        """
+        data: dict[str, object] = {
+            "time": time,
+            "type": record_type,
+            "routes": list(routes),
+        }
+        try:
+            data["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            data["body64"] = base64.b64encode(content).decode("ascii")
+        line = json.dumps(data, ensure_ascii=False)
+
+        with self._lock:
+            if self._file.closed:
+                return
+            try:
+                self._file.write(line + "\n")
+                self._file.flush()
+            except OSError as e:
+                logger.warning(f"Unable to record an API response to {self.path}: {e}")
+                return
+            self.count += 1
+
+    def close(self) -> None:
+        """Close the recording file, later responses are not recorded."""
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(path: Path) -> Iterator[RecordedResponse]:
+    """Read the responses of a recording in the order they were received.
+
+    :param path: The path of the recording file
+    :return: The recorded responses, an incomplete last line is skipped
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            for line in file:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # The recording was cut short while writing this line
+                    return
+                if data["type"] not in RECORD_TYPES:
+                    msg = f"Unknown response type in the recording: {data['type']}"
+                    raise ValueError(msg)
+                yield RecordedResponse(
+                    float(data["time"]),
+                    data["type"],
+                    tuple(data["routes"]),
+                    (
+                        data["body"].encode("utf-8")
+                        if "body" in data
+                        else base64.b64decode(data["body64"])
+                    ),
+                )
+        except EOFError:
+            # The compressed stream of an interrupted recording has no end marker
+            return
@@ -0,0 +1,300 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+"""Replay of recorded API traffic against a virtual clock.
+
+The responses recorded with ``--record`` are processed in the order
+they were received, while the vehicle arrivals and departures and the
+LED fades run on a virtual clock instead of waiting for the wall clock,
+so a whole day of traffic is replayed in seconds. The LED frames only
+depend on the recording and the seed of the random jitter, so the
+digest of the frames can be compared between runs::
+
+    python -m BudapestMetroDisplay.replay traffic.jsonl.gz --frames frames.bin
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import random
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple
+
+from BudapestMetroDisplay import bkk_opendata, clock
+from BudapestMetroDisplay.bkk_response import ApiResponse
+from BudapestMetroDisplay.config import settings
+from BudapestMetroDisplay.log import add_logging_level
+from BudapestMetroDisplay.network import led_strip, network
+from BudapestMetroDisplay.query_planner import QueryBatch
+from BudapestMetroDisplay.recording import RecordedResponse, read_recording
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from BudapestMetroDisplay.model import LedStrip, Network, Route
+
+logger = logging.getLogger(__name__)
+
+# Timestamp of a frame in the frames file, followed by the DMX payload
+FRAME_HEADER = struct.Struct("<d")
+# Size of the DMX payload at the start of the frames file
+FILE_HEADER = struct.Struct("<I")
+
+
+class ReplayResult(NamedTuple):
+    """Summary of a replay."""
+
+    responses: int  # Number of replayed responses
+    events: int  # Number of arrival and departure events run
+    frames: int  # Number of LED frames which changed the payload
+    duration: float  # Seconds of virtual time replayed
+    elapsed: float  # Seconds of wall time the replay took
+    digest: str  # BLAKE2b digest of the changed frames
+
+
+class Replay:
+    """Drive the schedule processing and the LED renderer with a virtual clock.
+
+    While no LED is fading, the clock jumps to the next event of the
+    departure scheduler, during the fades it advances by one frame
+    at the configured frame rate. Only the frames which changed the
+    LED colors are written and hashed.
+    """
+
+    def __init__(
+        self,
+        strip: LedStrip,
+        network: Network,
+        fps: float,
+        frames: BinaryIO | None = None,
+    ) -> None:
+        """Create a replay, the clock starts at the first replayed response.
+
+        :param strip: The LED strip rendered on the virtual clock
+        :param network: The routes the responses belong to
+        :param fps: Frame rate of the virtual renderer while the LEDs are fading
+        :param frames: Binary file to write the changed frames to
+        """
+        self.strip = strip
+        self.network = network
+        self.frame_time: float = 1 / fps
+        self.frames = frames
+        self.now: float | None = None
+
+        self.responses: int = 0
+        self.events: int = 0
+        self.frame_count: int = 0
+        self._start: float | None = None
+        self._last_payload: bytes | None = None
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._routes: dict[str, Route] = {
+            route.route_id: route for route in network.routes
+        }
+
+        if self.frames is not None:
+            self.frames.write(FILE_HEADER.pack(len(strip.payload)))
+
+        # Start from the initial target colors, like the live renderer
+        strip.show_target_colors()
+
+    def clock_now(self) -> datetime:
+        """Return the current time of the virtual clock, see clock.set_clock."""
+        if self.now is None:
+            msg = "The replay has not started yet"
+            raise RuntimeError(msg)
+        return datetime.fromtimestamp(self.now)
+
+    def apply(self, response: RecordedResponse) -> None:
+        """Advance the clock to a response and process it.
+
+        :param response: The recorded response
+        """
+        if self.now is None:
+            self.now = self._start = response.time
+        else:
+            self.advance(response.time)
+
+        api_response = ApiResponse.from_content(response.content)
+        routes = [self._routes[route_id] for route_id in response.routes]
+        if response.type == "ALERTS":
+            bkk_opendata.process_alerts(api_response, routes[0], is_alert_only=True)
+        else:
+            bkk_opendata.process_batch_data(
+                api_response,
+                QueryBatch(
+                    routes,
+                    bkk_opendata.API_SCHEDULE_PARAMETERS[response.type]["limit"],
+                ),
+                response.type,
+            )
+        self.responses += 1
+
+    def advance(self, until: float) -> None:
+        """Run the events and render the frames up to a time.
+
+        :param until: Timestamp to advance the clock to,
+            infinity runs until every pending event is done
+        """
+        if self.now is None:
+            return
+
+        while self.now < until:
+            if self.strip.is_idle:
+                next_run_time = bkk_opendata.departure_scheduler.next_run_time()
+                if next_run_time is None or next_run_time > until:
+                    if until != float("inf"):
+                        self.now = until
+                    return
+                self.now = max(self.now, next_run_time)
+            else:
+                self.now = min(self.now + self.frame_time, until)
+
+            self.events += bkk_opendata.departure_scheduler.run_due(self.now)
+            self.render()
+
+    def render(self) -> None:
+        """Render a frame at the current time, and store it if it changed."""
+        self.strip.step(self.now)
+
+        payload = bytes(self.strip.payload)
+        if payload == self._last_payload:
+            return
+        self._last_payload = payload
+
+        frame = FRAME_HEADER.pack(self.now) + payload
+        self._digest.update(frame)
+        if self.frames is not None:
+            self.frames.write(frame)
+        self.frame_count += 1
+
+    def result(self, elapsed: float) -> ReplayResult:
+        """Return the summary of the replay.
+
+        :param elapsed: Seconds of wall time the replay took
+        """
+        return ReplayResult(
+            self.responses,
+            self.events,
+            self.frame_count,
+            0.0 if self.now is None or self._start is None else self.now - self._start,
+            elapsed,
+            self._digest.hexdigest(),
+        )
+
+
+def replay(
+    responses: Iterable[RecordedResponse],
+    *,
+    fps: float = settings.sacn.fps,
+    seed: int = 0,
+    frames: BinaryIO | None = None,
+) -> ReplayResult:
+    """Replay recorded responses on the LED strip of the network module.
+
+    The departure scheduler is driven by the replay, so it is shut down
+    first, and the API updates are stopped, so the replay can only run
+    once in a process.
+
+    :param responses: The recorded responses in the order they were received
+    :param fps: Frame rate of the virtual renderer while the LEDs are fading
+    :param seed: Seed of the random jitter of the arrival times
+    :param frames: Binary file to write the changed frames to
+    :return: The summary of the replay
+    """
+    bkk_opendata.departure_scheduler.shutdown()
+    if bkk_opendata.api_update_scheduler.running:
+        bkk_opendata.api_update_scheduler.shutdown(wait=False)
+    # The schedule updates requested by the alerts are not run
+    bkk_opendata.api_fetcher = None
+    random.seed(seed)
+
+    session = Replay(led_strip, network, fps, frames)
+    clock.set_clock(session.clock_now)
+    start = time.perf_counter()
+    try:
+        for response in responses:
+            session.apply(response)
+        session.advance(float("inf"))
+    finally:
+        clock.set_clock(None)
+
+    return session.result(time.perf_counter() - start)
+
+
+def main() -> None:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description="Replay recorded BKK OpenData API responses.",
+    )
+    parser.add_argument(
+        "recording",
+        type=Path,
+        help="The gzip file recorded with the --record option.",
+    )
+    parser.add_argument(
+        "--frames",
+        type=Path,
+        help="Write the timestamp and DMX payload of the changed frames to a file.",
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=settings.sacn.fps,
+        help="Frame rate of the virtual renderer while the LEDs are fading.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the random jitter of the arrival times.",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug mode for verbose output.",
+    )
+    args = parser.parse_args()
+
+    add_logging_level("TRACE", logging.DEBUG - 5)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+
+    responses = read_recording(args.recording)
+    if args.frames is not None:
+        with args.frames.open("wb") as frames:
+            result = replay(responses, fps=args.fps, seed=args.seed, frames=frames)
+    else:
+        result = replay(responses, fps=args.fps, seed=args.seed)
+
+    sys.stdout.write(
+        f"Replayed {result.responses} responses, {result.events} events "
+        f"and {result.frames} frames of {result.duration:.0f} s "
+        f"in {result.elapsed:.2f} s\n"
+        f"Frame digest: {result.digest}\n",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import time as _t
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Mapping
+
+logger = logging.getLogger(__name__)
+
+# The time of the response changes every time, even if the data is the same
+_CURRENT_TIME = re.compile(rb'"currentTime"\s*:\s*\d+')
+
+
+def content_digest(content: bytes) -> bytes:
+    """Return the hash of an API response body, without its currentTime."""
+    return hashlib.blake2b(
+        _CURRENT_TIME.sub(b"", content, count=1),
+        digest_size=16,
+    ).digest()
+
+
+class CachedResponse:
+    """What we know about the last processed response of a request."""
+
+    __slots__ = ("digest", "etag", "last_modified", "result", "stored_at")
+
+    def __init__(
+        self,
+        etag: str | None,
+        last_modified: str | None,
+        digest: bytes | None,
+        result: Any,
+    ) -> None:
+        """Store the validators, the hash and the processing result of a response."""
+        self.etag: str | None = etag
+        self.last_modified: str | None = last_modified
+        self.digest: bytes | None = digest
+        self.result: Any = result
+        self.stored_at: float = _t.monotonic()
+
+
+class ResponseCache:
+    """Detect the API responses which are the same as the last processed one.
+
+    The ETag and Last-Modified headers of the last processed response
+    are sent back with the next request, so the server can answer with
+    304 Not Modified. If the server doesn't support that, the bodies
+    are compared by their hash instead, ignoring the currentTime field.
+
+    The result of the last processing is kept, so it can be reused
+    for an unchanged response. After max_age seconds the responses are
+    processed again even if they didn't change, because the processing
+    also depends on the current time (e.g. the pending arrivals of a stop).
+    """
+
+    def __init__(self, max_age: float) -> None:
+        """Create an empty cache.
+
+        :param max_age: Process the responses again after this many seconds
+        """
+        self.max_age: float = max_age
+        self._entries: dict[Hashable, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    def conditional_headers(self, key: Hashable) -> dict[str, str]:
+        """Return the headers for a conditional request.
+
+        :param key: The key of the request, e.g. its URL and parameters
+        :return: If-None-Match and If-Modified-Since headers, if they are known
+        """
+        with self._lock:
+            entry = self._get(key)
+
+        headers: dict[str, str] = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def lookup(
+        self,
+        key: Hashable,
+        status_code: int,
+        content: bytes | None = None,
+    ) -> CachedResponse | None:
+        """Return the cached entry if the response is the same as the last one.
+
+        :param key: The key of the request
+        :param status_code: The HTTP status code of the response
+        :param content: The body of the response, None if it is not available
+            (e.g. it is streamed)
+        :return: The entry of the last processed response, None if the response
+            has to be processed
+        """
+        with self._lock:
+            # Not Modified is the answer to the validators we sent,
+            # so the entry is used even if it has expired since
+            entry = self._get(key, expire=status_code != 304)
+
+        if entry is None:
+            return None
+        if status_code == 304:
+            return entry
+        if content is not None and entry.digest is not None:
+            return entry if content_digest(content) == entry.digest else None
+        return None
+
+    def store(
+        self,
+        key: Hashable,
+        headers: Mapping[str, str],
+        content: bytes | None,
+        result: Any,
+    ) -> None:
+        """Store a processed response.
+
+        :param key: The key of the request
+        :param headers: The headers of the response
+        :param content: The body of the response, None if it is not available
+        :param result: The result of the processing, returned for unchanged responses
+        """
+        entry = CachedResponse(
+            headers.get("ETag"),
+            headers.get("Last-Modified"),
+            content_digest(content) if content is not None else None,
+            result,
+        )
+        with self._lock:
+            self._entries[key] = entry
+
+    def _get(self, key: Hashable, *, expire: bool = True) -> CachedResponse | None:
+        """Return the entry of a request if it isn't expired, with the lock held."""
+        entry = self._entries.get(key)
+        if (
+            expire
+            and entry is not None
+            and _t.monotonic() - entry.stored_at > self.max_age
+        ):
+            del self._entries[key]
+            return None
+        return entry
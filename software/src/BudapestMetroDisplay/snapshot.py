@@ -0,0 +1,227 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from BudapestMetroDisplay import bkk_opendata, clock
+from BudapestMetroDisplay.config import settings
+
+if TYPE_CHECKING:
+    from BudapestMetroDisplay.model import Network, StopId
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE: str = "snapshot.sqlite3"
+# Increase it when the tables change, older snapshots are not restored
+SCHEMA_VERSION: int = 1
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS routes (
+    route_id TEXT PRIMARY KEY,
+    schedule_interval REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stop_ids (
+    route_id TEXT NOT NULL,
+    stop_id TEXT NOT NULL,
+    in_service INTEGER NOT NULL,
+    PRIMARY KEY (route_id, stop_id)
+);
+CREATE TABLE IF NOT EXISTS arrivals (
+    route_id TEXT NOT NULL,
+    stop_id TEXT NOT NULL,
+    trip_id TEXT NOT NULL,
+    arrival REAL NOT NULL,
+    dwell INTEGER NOT NULL
+);
+"""
+
+
+def snapshot_path() -> Path:
+    """Return the path of the snapshot file, and create its directory."""
+    directory = settings.snapshot.path
+    if directory is None:
+        directory = Path(settings.log.path).resolve().parent / "data"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / SNAPSHOT_FILE
+
+
+def save_snapshot(path: Path, network: Network) -> int:
+    """Save the state of the schedules to the snapshot file.
+
+    The upcoming arrivals are taken from the departure scheduler,
+    the schedule intervals from the Routes, and the alert states
+    from the in_service flag of the StopIds.
+    The previous snapshot is replaced in one transaction.
+
+    :param path: The path of the snapshot file
+    :param network: The Network the schedules belong to
+    :return: The number of saved arrivals
+    """
+    arrivals = [
+        (event.group, event.key, event.args[1], event.when, event.args[3])
+        for event in bkk_opendata.departure_scheduler.get_jobs()
+        if event.func is bkk_opendata.vehicle_arrival and event.group is not None
+    ]
+    routes: list[tuple[str, float]] = []
+    stop_ids: list[tuple[str, str, bool]] = []
+    for route in network.routes:
+        with route.lock:
+            routes.append((route.route_id, route.schedule_interval))
+        stop_ids.extend(
+            (route.route_id, sid.stop_id, sid.in_service)
+            for sid in route.get_stop_ids()
+        )
+
+    with closing(sqlite3.connect(path)) as connection, connection:
+        connection.executescript(_SCHEMA)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for table in ("meta", "routes", "stop_ids", "arrivals"):
+            connection.execute(f"DELETE FROM {table}")
+        connection.execute(
+            "INSERT INTO meta VALUES ('saved_at', ?)",
+            (clock.now().timestamp(),),
+        )
+        connection.executemany("INSERT INTO routes VALUES (?, ?)", routes)
+        connection.executemany("INSERT INTO stop_ids VALUES (?, ?, ?)", stop_ids)
+        connection.executemany(
+            "INSERT INTO arrivals VALUES (?, ?, ?, ?, ?)",
+            arrivals,
+        )
+
+    logger.debug(f"Saved {len(arrivals)} arrivals to the snapshot at {path}")
+    return len(arrivals)
+
+
+def restore_snapshot(path: Path, network: Network, max_age: float) -> int:
+    """Restore the state of the schedules from the snapshot file.
+
+    The arrivals which are already in the past are skipped,
+    the API updates catch up with the changes since the snapshot.
+
+    :param path: The path of the snapshot file
+    :param network: The Network the schedules belong to
+    :param max_age: Snapshots older than this many seconds are not restored
+    :return: The number of restored arrivals, 0 if there is no valid snapshot
+    """
+    if not path.exists():
+        logger.info("No snapshot found, starting with empty schedules")
+        return 0
+
+    with closing(sqlite3.connect(path)) as connection:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            logger.warning(f"Unknown snapshot version {version}, skipping")
+            return 0
+
+        saved_at = connection.execute(
+            "SELECT value FROM meta WHERE key = 'saved_at'",
+        ).fetchone()
+        if saved_at is None or clock.now().timestamp() - saved_at[0] > max_age:
+            logger.info("The snapshot is too old, starting with empty schedules")
+            return 0
+
+        routes = {route.route_id: route for route in network.routes}
+
+        for route_id, schedule_interval in connection.execute(
+            "SELECT route_id, schedule_interval FROM routes",
+        ):
+            route = routes.get(route_id)
+            if route is not None:
+                with route.lock:
+                    route.schedule_interval = schedule_interval
+
+        for route_id, stop_id, in_service in connection.execute(
+            "SELECT route_id, stop_id, in_service FROM stop_ids",
+        ):
+            route = routes.get(route_id)
+            sid = route.get_stop_id(stop_id) if route is not None else None
+            if sid is not None:
+                with sid.stop.lock:
+                    sid.in_service = bool(in_service)
+
+        arrivals: dict[str, list[tuple[StopId, str, float, int]]] = {}
+        for route_id, stop_id, trip_id, arrival, dwell in connection.execute(
+            "SELECT route_id, stop_id, trip_id, arrival, dwell FROM arrivals",
+        ):
+            route = routes.get(route_id)
+            sid = route.get_stop_id(stop_id) if route is not None else None
+            if sid is not None:
+                arrivals.setdefault(route_id, []).append(
+                    (sid, trip_id, arrival, dwell),
+                )
+
+    count = sum(
+        bkk_opendata.restore_arrivals(routes[route_id], route_arrivals)
+        for route_id, route_arrivals in arrivals.items()
+    )
+    logger.info(f"Restored {count} upcoming arrivals from the snapshot")
+    return count
+
+
+def run_snapshot_writer(
+    path: Path,
+    network: Network,
+    interval: float,
+    stop_event: threading.Event,
+) -> None:
+    """Save the snapshot periodically until the stop event is set.
+
+    :param path: The path of the snapshot file
+    :param network: The Network the schedules belong to
+    :param interval: Time between the saves in seconds
+    :param stop_event: Stops the loop when set
+    """
+    while not stop_event.wait(interval):
+        try:
+            save_snapshot(path, network)
+        except (sqlite3.Error, OSError):
+            logger.exception(f"Unable to save the snapshot to {path}")
+
+
+def start_snapshot_writer(
+    path: Path,
+    network: Network,
+    stop_event: threading.Event,
+) -> None:
+    """Start saving the snapshot periodically in a separate thread."""
+    thread = threading.Thread(
+        target=run_snapshot_writer,
+        kwargs={
+            "path": path,
+            "network": network,
+            "interval": settings.snapshot.interval,
+            "stop_event": stop_event,
+        },
+        daemon=True,
+        name="Snapshot thread",
+    )
+    thread.start()
@@ -31,6 +31,9 @@ from BudapestMetroDisplay.network import network
 if TYPE_CHECKING:
     from apscheduler.job import Job
 
+    from BudapestMetroDisplay.api_fetcher import PollJob
+    from BudapestMetroDisplay.event_scheduler import ScheduledEvent
+
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -46,7 +49,7 @@ def get_schedules(route_id: str | None) -> str:
     """
     from BudapestMetroDisplay.bkk_opendata import departure_scheduler
 
-    jobs: list[Job] = departure_scheduler.get_jobs()
+    jobs: list[ScheduledEvent] = departure_scheduler.get_jobs()
     job_list = []
     for job in jobs:
         if route_id is None or job.args[0].stop.route.route_id == route_id:
@@ -68,9 +71,9 @@ def get_schedules(route_id: str | None) -> str:
 @app.route("/jobs", methods=["GET"])
 def get_jobs() -> str:
     """Return an HTML page with the API update schedules."""
-    from BudapestMetroDisplay.bkk_opendata import api_update_scheduler
+    from BudapestMetroDisplay.bkk_opendata import get_api_update_jobs
 
-    jobs: list[Job] = api_update_scheduler.get_jobs()
+    jobs: list[Job | PollJob] = get_api_update_jobs()
 
     return render_template("jobs.html", jobs=jobs)
 
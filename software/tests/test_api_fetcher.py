@@ -0,0 +1,84 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from BudapestMetroDisplay.api_fetcher import (
+    AsyncFetcher,
+    HostRateLimiter,
+    async_available,
+    query_items,
+)
+from BudapestMetroDisplay.async_loop import start_background_loop
+
+
+def test_query_items_repeats_list_values() -> None:
+    assert query_items({"stopId": ["A", "B"], "limit": 10}) == [
+        ("stopId", "A"),
+        ("stopId", "B"),
+        ("limit", "10"),
+    ]
+
+
+def test_rate_limiter_spaces_out_requests_per_host() -> None:
+    async def run() -> list[float]:
+        limiter = HostRateLimiter(rate=20)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        times: list[float] = []
+        for host in ("a", "a", "a", "b"):
+            await limiter.acquire(host)
+            times.append(loop.time() - start)
+        return times
+
+    times = asyncio.run(run())
+    assert times[1] >= 0.04
+    assert times[2] >= 0.09
+    # Another host is not limited by the first one
+    assert times[3] - times[2] < 0.04
+
+
+@pytest.mark.skipif(not async_available(), reason="aiohttp is not installed")
+def test_fetcher_runs_replaced_job_once() -> None:
+    loop = start_background_loop()
+    fetcher = AsyncFetcher(max_concurrency=2, rate_limit=10, timeout=(1, 1))
+    fetcher.start(loop)
+    calls: list[int] = []
+    done = threading.Event()
+
+    async def job(value: int) -> None:
+        calls.append(value)
+        done.set()
+
+    now = datetime.now()
+    fetcher.add_job("x", job, now + timedelta(seconds=0.05), (1,))
+    fetcher.add_job("x", job, now + timedelta(seconds=0.1), (2,))
+
+    assert done.wait(2)
+    fetcher.shutdown()
+    loop.call_soon_threadsafe(loop.stop)
+    assert calls == [2]
+    assert fetcher.get_jobs() == []
@@ -0,0 +1,91 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from BudapestMetroDisplay.arrival_table import AppliedArrival, ArrivalTable
+
+NOW: float = 1_700_000_000
+
+
+def test_small_moves_are_already_applied() -> None:
+    table = ArrivalTable(threshold=10)
+    table.apply({"a": AppliedArrival(NOW + 60, 20)}, [], NOW)
+
+    assert table.is_applied("a", NOW + 66, 20)
+    assert not table.is_applied("a", NOW + 75, 20)
+    assert not table.is_applied("a", NOW + 60, 30)
+    assert not table.is_applied("b", NOW + 60, 20)
+
+
+def test_missing_arrivals_within_the_window() -> None:
+    table = ArrivalTable()
+    table.apply(
+        {
+            "seen": AppliedArrival(NOW + 60, 20),
+            "gone": AppliedArrival(NOW + 120, 20),
+            "later": AppliedArrival(NOW + 3600, 20),
+        },
+        [],
+        NOW,
+    )
+
+    assert table.missing({"seen"}, NOW + 600) == ["gone"]
+
+
+def test_arrival_departing_after_the_window_is_not_missing() -> None:
+    table = ArrivalTable()
+    table.apply({"edge": AppliedArrival(NOW + 590, 20)}, [], NOW)
+
+    assert table.missing((), NOW + 600) == []
+    assert table.missing((), NOW + 610) == ["edge"]
+
+
+def test_predicted_arrivals_can_be_kept() -> None:
+    table = ArrivalTable()
+    table.apply(
+        {
+            "scheduled": AppliedArrival(NOW + 60, 20),
+            "predicted": AppliedArrival(NOW + 120, 20, predicted=True),
+        },
+        [],
+        NOW,
+    )
+
+    assert table.is_predicted("predicted")
+    assert not table.is_predicted("scheduled")
+    assert table.missing((), NOW + 600, keep_predicted=True) == ["scheduled"]
+    assert table.missing((), NOW + 600) == ["scheduled", "predicted"]
+
+
+def test_apply_drops_removed_and_due_arrivals() -> None:
+    table = ArrivalTable()
+    table.apply(
+        {"due": AppliedArrival(NOW + 10, 20), "gone": AppliedArrival(NOW + 60, 20)},
+        [],
+        NOW,
+    )
+    table.apply({"new": AppliedArrival(NOW + 90, 20)}, ["gone"], NOW + 30)
+
+    assert len(table) == 1
+    assert table.is_applied("new", NOW + 90, 20)
+
+    table.clear()
+    assert len(table) == 0
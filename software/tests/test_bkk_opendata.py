@@ -0,0 +1,280 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from BudapestMetroDisplay.bkk_response import ApiResponse
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from BudapestMetroDisplay.model import Route
+
+
+@pytest.fixture
+def route() -> Iterator[Route]:
+    # The module reads the configuration, import it only when the tests run
+    from BudapestMetroDisplay.bkk_opendata import arrival_tables, departure_scheduler
+    from BudapestMetroDisplay.model import LED, Route, Stop, StopId
+
+    route = Route(name="H5", route_id="BKK_H5", type="railway")
+    for index, stop_id in enumerate(["BKK_09019", "BKK_09020"]):
+        stop = Stop(name=stop_id, led=LED(index=index), route=route)
+        StopId(stop_id=stop_id, stop=stop)
+    yield route
+
+    for event in departure_scheduler.get_jobs():
+        if event.group == route.route_id:
+            departure_scheduler.remove_event(event.id)
+    arrival_tables.pop(route.route_id, None)
+
+
+@pytest.fixture
+def trace_level() -> None:
+    # The custom log level is only added when the application sets up logging
+    from BudapestMetroDisplay.log import add_logging_level
+
+    if not hasattr(logging, "TRACE"):
+        add_logging_level("TRACE", logging.DEBUG - 5)
+
+
+def alert_response(*stop_ids: str) -> ApiResponse:
+    return ApiResponse(
+        {
+            "data": {
+                "entry": {},
+                "references": {
+                    "alerts": {
+                        "A1": {
+                            "id": "A1",
+                            "start": 0,
+                            "routes": [
+                                {
+                                    "routeId": "BKK_H5",
+                                    "effectType": "NO_SERVICE",
+                                    "stopIds": list(stop_ids),
+                                },
+                            ],
+                        },
+                    },
+                },
+            },
+        },
+    )
+
+
+def schedule_response(*stop_times: tuple[str, str, float]) -> ApiResponse:
+    return ApiResponse(
+        {
+            "data": {
+                "entry": {
+                    "routeIds": ["BKK_H5"],
+                    "stopTimes": [
+                        {
+                            "stopId": stop_id,
+                            "tripId": trip_id,
+                            "arrivalTime": int(arrival),
+                            "departureTime": int(arrival) + 30,
+                        }
+                        for stop_id, trip_id, arrival in stop_times
+                    ],
+                },
+                "references": {},
+            },
+        },
+    )
+
+
+@pytest.mark.usefixtures("trace_level")
+def test_schedule_updates_apply_only_the_changes(route: Route) -> None:
+    from BudapestMetroDisplay.bkk_opendata import (
+        departure_scheduler,
+        process_schedule,
+    )
+
+    now = datetime.now().timestamp()
+    window = timedelta(hours=1)
+    process_schedule(
+        schedule_response(
+            ("BKK_09019", "T1", now + 300),
+            ("BKK_09019", "T2", now + 900),
+            ("BKK_09020", "T3", now + 600),
+        ),
+        route,
+        window=window,
+    )
+    first = {event.id: event for event in departure_scheduler.get_jobs()}
+    assert len(first) == 3
+
+    # T1 moves within the threshold, T2 moves, T3 disappears, T4 is new
+    process_schedule(
+        schedule_response(
+            ("BKK_09019", "T1", now + 302),
+            ("BKK_09019", "T2", now + 1200),
+            ("BKK_09020", "T4", now + 700),
+        ),
+        route,
+        window=window,
+    )
+    second = {event.id: event for event in departure_scheduler.get_jobs()}
+
+    assert sorted(second) == [
+        "BKK_09019+T1_arrival",
+        "BKK_09019+T2_arrival",
+        "BKK_09020+T4_arrival",
+    ]
+    assert second["BKK_09019+T1_arrival"] is first["BKK_09019+T1_arrival"]
+    assert second["BKK_09019+T2_arrival"].when > now + 1100
+
+
+@pytest.mark.usefixtures("trace_level")
+def test_has_pending_arrival(route: Route) -> None:
+    from BudapestMetroDisplay.bkk_opendata import (
+        has_pending_arrival,
+        process_schedule,
+    )
+
+    sid = route.get_stop_id("BKK_09019")
+    assert sid is not None
+    assert not has_pending_arrival(sid)
+
+    process_schedule(
+        schedule_response(("BKK_09019", "T1", datetime.now().timestamp() + 300)),
+        route,
+        window=timedelta(hours=1),
+    )
+    assert has_pending_arrival(sid)
+
+
+@pytest.mark.usefixtures("trace_level")
+def test_alert_is_ignored_for_stop_with_live_schedule(route: Route) -> None:
+    from BudapestMetroDisplay.bkk_opendata import process_alerts, process_schedule
+
+    scheduled = route.get_stop_id("BKK_09019")
+    unscheduled = route.get_stop_id("BKK_09020")
+    assert scheduled is not None
+    assert unscheduled is not None
+
+    # Only one of the stops has an upcoming arrival
+    process_schedule(
+        schedule_response(("BKK_09019", "T1", datetime.now().timestamp() + 300)),
+        route,
+        window=timedelta(hours=1),
+    )
+
+    process_alerts(alert_response("BKK_09019", "BKK_09020"), route)
+
+    assert scheduled.in_service
+    assert not unscheduled.in_service
+
+
+def test_async_update_is_processed_outside_the_event_loop(
+    route: Route,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from BudapestMetroDisplay import bkk_opendata
+    from BudapestMetroDisplay.api_fetcher import FetchResult
+    from BudapestMetroDisplay.query_planner import QueryBatch
+
+    threads: list[threading.Thread] = []
+    jobs: list[datetime] = []
+    next_update = datetime.now() + timedelta(minutes=1)
+
+    async def get(*_args: Any) -> FetchResult:
+        return FetchResult(200, b"{}", {})
+
+    def process_batch_update(*_args: Any) -> datetime:
+        threads.append(threading.current_thread())
+        return next_update
+
+    monkeypatch.setattr(bkk_opendata, "api_fetcher", SimpleNamespace(get=get))
+    monkeypatch.setattr(bkk_opendata, "process_batch_update", process_batch_update)
+    monkeypatch.setattr(
+        bkk_opendata,
+        "add_schedule_update_job",
+        lambda _batch, _schedule_type, job_time: jobs.append(job_time),
+    )
+
+    asyncio.run(
+        bkk_opendata.fetch_schedule_for_batch_async(
+            QueryBatch([route], 100),
+            "REALTIME",
+        ),
+    )
+
+    assert jobs == [next_update]
+    assert threads
+    assert threads[0] is not threading.main_thread()
+
+
+def test_night_update_time_follows_the_clock() -> None:
+    from BudapestMetroDisplay import clock
+    from BudapestMetroDisplay.bkk_opendata import next_schedule_update_time
+
+    clock.set_clock(lambda: datetime(2024, 1, 1, 1, 0))
+    try:
+        assert next_schedule_update_time("REALTIME") == datetime(2024, 1, 1, 4, 0)
+    finally:
+        clock.set_clock(None)
+
+
+@pytest.mark.usefixtures("trace_level")
+def test_unchanged_alerts_follow_the_pending_arrivals(
+    route: Route,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from BudapestMetroDisplay import bkk_opendata
+    from BudapestMetroDisplay.api_fetcher import FetchResult
+    from BudapestMetroDisplay.response_cache import ResponseCache
+
+    monkeypatch.setattr(bkk_opendata, "response_cache", ResponseCache(max_age=600))
+    monkeypatch.setattr(bkk_opendata, "create_schedule_updates", lambda *_: None)
+    sid = route.get_stop_id("BKK_09019")
+    assert sid is not None
+    response = FetchResult(
+        200,
+        json.dumps(alert_response("BKK_09019").raw).encode(),
+        {},
+    )
+
+    bkk_opendata.process_schedule(
+        schedule_response(("BKK_09019", "T1", datetime.now().timestamp() + 300)),
+        route,
+        window=timedelta(hours=1),
+    )
+    bkk_opendata.process_alert_content(route, "alerts", response)
+    assert sid.in_service
+
+    # The last vehicle departed, the same alert applies to the stop now
+    bkk_opendata.departure_scheduler.remove_event("BKK_09019+T1_arrival")
+    bkk_opendata.process_alert_content(route, "alerts", response)
+    assert not sid.in_service
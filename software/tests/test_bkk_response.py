@@ -0,0 +1,206 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import pytest
+import requests
+
+from BudapestMetroDisplay.bkk_response import (
+    ApiResponse,
+    StreamingApiResponse,
+    decode_json,
+    decode_stop_times,
+)
+
+if TYPE_CHECKING:
+    from BudapestMetroDisplay.model import Route
+
+RESPONSE = (
+    b'{"currentTime": 1700000000000, "data": {"limitExceeded": false, '
+    b'"entry": {"routeIds": ["BKK_5100"], "stopTimes": ['
+    b'{"stopId": "BKK_F00001", "arrivalTime": 1700000100}]}, '
+    b'"references": {"routes": {"BKK_5100": {}}, "alerts": {}}}}'
+)
+
+STREAMED_RESPONSE = (
+    b'{"data": {"entry": {"stopId": "BKK_F00001", "stopTimes": ['
+    b'{"tripId": "T1", "arrivalTime": 1700000100, "uncertain": false}, '
+    b'{"tripId": "T2", "arrivalTime": 1700000200, "delays": [1, 2]}], '
+    b'"alertIds": ["A1"]}, '
+    b'"references": {"routes": {"BKK_5100": {}}, '
+    b'"alerts": {"A1": {"id": "A1", "start": 1.5}}}}}'
+)
+
+
+def chunked(content: bytes, size: int = 7) -> list[bytes]:
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+def test_decode_json() -> None:
+    assert decode_json(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_decode_json_invalid_raises_requests_error() -> None:
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        decode_json(b'{"a": ')
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        decode_json(b"\xff\xfe")
+
+
+def test_api_response_fields() -> None:
+    api_response = ApiResponse(decode_json(RESPONSE))
+
+    assert api_response.entry is not None
+    assert api_response.route_id == "BKK_5100"
+    assert not api_response.limit_exceeded
+    assert api_response.stop_times[0]["stopId"] == "BKK_F00001"
+    assert api_response.alerts == {}
+
+
+def test_api_response_route_id_from_references() -> None:
+    api_response = ApiResponse(
+        {"data": {"entry": {}, "references": {"routes": {"BKK_5200": {}}}}},
+    )
+
+    assert api_response.route_id == "BKK_5200"
+
+
+def test_api_response_invalid() -> None:
+    api_response = ApiResponse(None)
+
+    assert api_response.entry is None
+    assert api_response.route_id is None
+    assert api_response.stop_times == []
+    assert api_response.alerts is None
+
+
+def test_streaming_response_yields_stop_times() -> None:
+    pytest.importorskip("ijson")
+    api_response = StreamingApiResponse(chunked(STREAMED_RESPONSE))
+
+    assert api_response.entry is not None
+    assert api_response.entry["stopId"] == "BKK_F00001"
+    # The rest of the document after the stop times is not parsed yet
+    assert "alertIds" not in api_response.entry
+    assert api_response.references == {}
+
+    trip_ids = [st["tripId"] for st in api_response.iter_stop_times()]
+    assert trip_ids == ["T1", "T2"]
+    # The rest of the entry is parsed after the stop times
+    assert api_response.entry["alertIds"] == ["A1"]
+    assert api_response.alerts == {"A1": {"id": "A1", "start": 1.5}}
+
+
+def test_streaming_response_buffers_stop_times_for_route_id() -> None:
+    pytest.importorskip("ijson")
+    api_response = StreamingApiResponse(chunked(STREAMED_RESPONSE))
+
+    # The route is only available from the references after the stop times
+    assert api_response.route_id == "BKK_5100"
+    assert [st["tripId"] for st in api_response.iter_stop_times()] == ["T1", "T2"]
+
+
+def test_streaming_response_invalid_raises_requests_error() -> None:
+    pytest.importorskip("ijson")
+    api_response = StreamingApiResponse(chunked(STREAMED_RESPONSE[:60]))
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        list(api_response.iter_stop_times())
+
+
+@pytest.fixture
+def route() -> Route:
+    # The model reads the configuration, import it only when the tests run
+    from BudapestMetroDisplay.model import LED, Route, Stop, StopId
+
+    route = Route(name="H5", route_id="BKK_H5", type="railway")
+    stop = Stop(name="Batthyány tér", led=LED(index=0), route=route)
+    StopId(stop_id="BKK_09019", stop=stop)
+    return route
+
+
+@pytest.mark.parametrize(
+    ("stop_time", "arrival", "dwell", "predicted"),
+    [
+        # Predicted arrival and departure
+        (
+            {"predictedArrivalTime": 1000, "predictedDepartureTime": 1030},
+            1000,
+            30,
+            True,
+        ),
+        # Same predicted arrival and departure
+        ({"predictedArrivalTime": 1000, "predictedDepartureTime": 1000}, 980, 20, True),
+        # Only predicted arrival or departure
+        ({"predictedArrivalTime": 1000}, 980, 20, True),
+        ({"predictedDepartureTime": 1000}, 980, 20, True),
+        # Uncertain predictions fall back to the scheduled times
+        (
+            {
+                "predictedArrivalTime": 2000,
+                "uncertain": True,
+                "arrivalTime": 1000,
+                "departureTime": 1045,
+            },
+            1000,
+            45,
+            False,
+        ),
+        # Scheduled times
+        ({"arrivalTime": 1000, "departureTime": 1000}, 980, 20, False),
+        ({"arrivalTime": 1000}, 980, 20, False),
+        ({"departureTime": 1000}, 980, 20, False),
+    ],
+)
+def test_decode_stop_times(
+    route: Route,
+    stop_time: dict[str, Any],
+    arrival: int,
+    dwell: int,
+    *,
+    predicted: bool,
+) -> None:
+    records = list(
+        decode_stop_times([{"tripId": "T1", **stop_time}], route, "BKK_09019", 20),
+    )
+
+    assert len(records) == 1
+    assert records[0].sid is route.get_stop_id("BKK_09019")
+    assert records[0].trip_id == "T1"
+    assert abs(records[0].arrival - arrival) <= 3  # Random jitter
+    assert records[0].dwell == dwell
+    assert records[0].predicted == predicted
+
+
+def test_decode_stop_times_skips_unknown_stops_and_missing_times(route: Route) -> None:
+    stop_times = [
+        {"tripId": "T1", "stopId": "BKK_99999", "arrivalTime": 1000},
+        {"tripId": "T2", "stopId": "BKK_09019"},
+        {"tripId": "T3", "arrivalTime": 1000},
+    ]
+
+    records = list(decode_stop_times(stop_times, route, "BKK_09019", 20))
+
+    assert [record.trip_id for record in records] == ["T3"]
@@ -245,6 +245,29 @@ def test_bkk_config_api_update_alerts_out_of_bounds() -> None:
         BKKConfig(api_key="123e4567-e89b-12d3-a456-426614174000", api_update_alerts=-5)
 
 
+def test_bkk_config_api_pool_size_positive() -> None:
+    config = BKKConfig(
+        api_key="123e4567-e89b-12d3-a456-426614174000",
+        api_pool_size=4,
+    )
+    assert config.api_pool_size == 4
+
+
+def test_bkk_config_api_pool_size_out_of_bounds() -> None:
+    with pytest.raises(ValidationError):
+        BKKConfig(api_key="123e4567-e89b-12d3-a456-426614174000", api_pool_size=0)
+
+
+def test_bkk_config_api_timeouts_out_of_bounds() -> None:
+    with pytest.raises(ValidationError):
+        BKKConfig(api_key="123e4567-e89b-12d3-a456-426614174000", api_read_timeout=0)
+    with pytest.raises(ValidationError):
+        BKKConfig(
+            api_key="123e4567-e89b-12d3-a456-426614174000",
+            api_connect_timeout=-1,
+        )
+
+
 def test_esphome_config_used_requires_ip() -> None:
     with pytest.raises(ValidationError):
         ESPHomeConfig(used=True, device_ip=None, api_key=None)
@@ -0,0 +1,83 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+
+# ruff: noqa: D103, S101
+
+import os
+import socket
+from ipaddress import IPv4Address
+
+# Mock environment variables before importing the module
+os.environ["BKK_API_KEY"] = "test_api_key"
+
+from sacn.messages.data_packet import DataPacket
+
+from BudapestMetroDisplay.e131 import E131Sender, build_data_packet, multicast_address
+
+CID = bytes(range(16))
+SOURCE_NAME = "BudapestMetroDisplay test"
+
+
+def test_packet_template_matches_sacn() -> None:
+    packet = build_data_packet(CID, SOURCE_NAME, universe=300)
+    expected = DataPacket(cid=tuple(CID), sourceName=SOURCE_NAME, universe=300)
+
+    assert bytes(packet) == bytes(expected.getBytes())
+
+
+def test_multicast_address() -> None:
+    assert multicast_address(1) == "239.255.0.1"
+    assert multicast_address(300) == "239.255.1.44"
+
+
+def test_sender_output_matches_sacn_over_udp() -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.settimeout(2)
+        port = listener.getsockname()[1]
+
+        sender = E131Sender(
+            cid=CID,
+            source_name=SOURCE_NAME,
+            universe=2,
+            destination=IPv4Address("127.0.0.1"),
+            port=port,
+        )
+        frames = [bytes((255, 0, 0, 0, 128, 0)), bytes((1, 2, 3))]
+        for frame in frames:
+            sender.send(frame)
+        received = [listener.recvfrom(1024)[0] for _ in frames]
+        sender.close()
+        terminated = listener.recvfrom(1024)[0]
+
+    expected = DataPacket(cid=tuple(CID), sourceName=SOURCE_NAME, universe=2)
+    expected.dmxData = frames[0]
+    assert received[0] == bytes(expected.getBytes())
+
+    # Only the given slots are updated, the rest keeps the previous frame
+    expected.sequence_increase()
+    expected.dmxData = (1, 2, 3, 0, 128, 0)
+    assert received[1] == bytes(expected.getBytes())
+
+    expected.sequence_increase()
+    expected.option_StreamTerminated = True
+    assert terminated == bytes(expected.getBytes())
@@ -0,0 +1,220 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+
+import threading
+from datetime import datetime, timedelta
+
+from BudapestMetroDisplay.event_scheduler import EventScheduler, ScheduledEvent
+
+
+def noop(*_args: object) -> None:
+    pass
+
+
+def test_events_run_in_order() -> None:
+    scheduler = EventScheduler()
+    calls: list[str] = []
+    done = threading.Event()
+    now = datetime.now()
+
+    scheduler.add_event("b", calls.append, now + timedelta(seconds=0.1), ("b",))
+    scheduler.add_event("a", calls.append, now + timedelta(seconds=0.05), ("a",))
+    scheduler.add_event("c", done.set, now + timedelta(seconds=0.15))
+    scheduler.start()
+
+    assert done.wait(2)
+    scheduler.shutdown()
+    assert calls == ["a", "b"]
+    assert len(scheduler) == 0
+
+
+def test_event_with_same_id_is_replaced() -> None:
+    scheduler = EventScheduler()
+    calls: list[int] = []
+    done = threading.Event()
+    now = datetime.now()
+
+    scheduler.add_event("x", calls.append, now + timedelta(seconds=0.05), (1,))
+    scheduler.add_event("x", calls.append, now + timedelta(seconds=0.1), (2,))
+    scheduler.add_event("done", done.set, now + timedelta(seconds=0.15))
+    assert len(scheduler) == 2
+    scheduler.start()
+
+    assert done.wait(2)
+    scheduler.shutdown()
+    assert calls == [2]
+
+
+def test_removed_event_is_not_run() -> None:
+    scheduler = EventScheduler()
+    calls: list[int] = []
+    done = threading.Event()
+    now = datetime.now()
+
+    scheduler.add_event("x", calls.append, now + timedelta(seconds=0.05), (1,))
+    scheduler.add_event("done", done.set, now + timedelta(seconds=0.1))
+    assert scheduler.remove_event("x")
+    assert not scheduler.remove_event("x")
+    scheduler.start()
+
+    assert done.wait(2)
+    scheduler.shutdown()
+    assert calls == []
+
+
+def test_missed_event_is_skipped() -> None:
+    scheduler = EventScheduler(misfire_grace_time=15)
+    calls: list[str] = []
+    done = threading.Event()
+    now = datetime.now()
+
+    scheduler.add_event("late", calls.append, now - timedelta(seconds=20), ("late",))
+    scheduler.add_event("ok", calls.append, now - timedelta(seconds=10), ("ok",))
+    scheduler.add_event("done", done.set, now)
+    scheduler.start()
+
+    assert done.wait(2)
+    scheduler.shutdown()
+    assert calls == ["ok"]
+
+
+def test_get_jobs_sorted_by_run_time() -> None:
+    scheduler = EventScheduler()
+    now = datetime.now()
+
+    scheduler.add_event("b", noop, now + timedelta(seconds=20), ("b",))
+    scheduler.add_event("a", noop, now + timedelta(seconds=10), ("a",))
+
+    jobs = scheduler.get_jobs()
+    assert [job.id for job in jobs] == ["a", "b"]
+    assert jobs[0].args == ("a",)
+    assert jobs[0].next_run_time == now + timedelta(seconds=10)
+    assert scheduler.get_event("b") is jobs[1]
+
+
+def test_apply_delta_keeps_the_events_not_passed() -> None:
+    scheduler = EventScheduler()
+    soon = datetime.now() + timedelta(minutes=1)
+
+    scheduler.add_event("kept", noop, soon, ("kept",), group="M1")
+    scheduler.add_event("moved", noop, soon, ("moved",), group="M1")
+    scheduler.add_event("removed", noop, soon, ("removed",), group="M1")
+    scheduler.add_event("other", noop, soon, ("other",), group="M2")
+
+    update = scheduler.apply_delta(
+        "M1",
+        [
+            ScheduledEvent("moved", noop, soon + timedelta(seconds=30), ("moved",)),
+            ScheduledEvent("new", noop, soon, ("new",)),
+        ],
+        ["removed", "other", "unknown"],
+    )
+
+    assert update == (1, 1, 0, 1)
+    assert sorted(job.id for job in scheduler.get_jobs()) == [
+        "kept",
+        "moved",
+        "new",
+        "other",
+    ]
+
+
+def test_events_are_indexed_by_key() -> None:
+    scheduler = EventScheduler()
+    now = datetime.now()
+
+    scheduler.add_event("b", noop, now + timedelta(seconds=20), key="stop")
+    scheduler.add_event("a", noop, now + timedelta(seconds=10), key="stop")
+    scheduler.add_event("other", noop, now + timedelta(seconds=5), key="other")
+    scheduler.add_event("no_key", noop, now + timedelta(seconds=1))
+
+    assert [event.id for event in scheduler.get_events("stop")] == ["a", "b"]
+    assert scheduler.count_events("stop") == 2
+    next_event = scheduler.next_event("stop")
+    assert next_event is not None
+    assert next_event.id == "a"
+    assert scheduler.next_event("missing") is None
+    assert scheduler.count_events("missing") == 0
+
+
+def test_key_index_follows_changes() -> None:
+    scheduler = EventScheduler()
+    now = datetime.now()
+
+    scheduler.add_event("a", noop, now + timedelta(seconds=10), key="stop")
+    scheduler.add_event("b", noop, now + timedelta(seconds=20), key="stop")
+    # Moving an event reorders it in the index
+    scheduler.add_event("a", noop, now + timedelta(seconds=30), key="stop")
+    assert [event.id for event in scheduler.get_events("stop")] == ["b", "a"]
+
+    scheduler.remove_event("b")
+    assert [event.id for event in scheduler.get_events("stop")] == ["a"]
+
+    scheduler.apply_delta(
+        "M1",
+        [ScheduledEvent("c", noop, now + timedelta(seconds=5), key="stop")],
+    )
+    assert [event.id for event in scheduler.get_events("stop")] == ["c", "a"]
+
+    scheduler.remove_event("a")
+    scheduler.remove_event("c")
+    assert scheduler.next_event("stop") is None
+
+
+def test_run_events_leave_the_key_index() -> None:
+    scheduler = EventScheduler()
+    done = threading.Event()
+    now = datetime.now()
+
+    scheduler.add_event("a", noop, now + timedelta(seconds=0.05), ("a",), key="s")
+    scheduler.add_event("done", done.set, now + timedelta(seconds=0.1))
+    scheduler.add_event("b", noop, now + timedelta(minutes=1), ("b",), key="s")
+    scheduler.start()
+
+    assert done.wait(2)
+    scheduler.shutdown()
+    assert [event.id for event in scheduler.get_events("s")] == ["b"]
+
+
+def test_run_due_drives_the_events_with_a_virtual_clock() -> None:
+    scheduler = EventScheduler()
+    calls: list[str] = []
+    start = datetime(2024, 1, 1, 12)
+
+    def arrive(name: str) -> None:
+        calls.append(name)
+        # Events added by a run event are run too if they are due
+        scheduler.add_event(f"{name}-out", calls.append, start, (f"{name}-out",))
+
+    scheduler.add_event("a", arrive, start + timedelta(seconds=10), ("a",))
+    scheduler.add_event("b", calls.append, start + timedelta(seconds=30), ("b",))
+    scheduler.add_event("c", calls.append, start + timedelta(seconds=20), ("c",))
+    scheduler.remove_event("c")
+
+    assert scheduler.next_run_time() == (start + timedelta(seconds=10)).timestamp()
+    assert scheduler.run_due(start.timestamp()) == 0
+    assert scheduler.run_due((start + timedelta(seconds=20)).timestamp()) == 2
+    assert calls == ["a", "a-out"]
+    assert scheduler.next_run_time() == (start + timedelta(seconds=30)).timestamp()
+    assert scheduler.run_due((start + timedelta(seconds=30)).timestamp()) == 1
+    assert scheduler.next_run_time() is None
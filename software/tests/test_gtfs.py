@@ -0,0 +1,278 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from __future__ import annotations
+
+import logging
+import zipfile
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+from BudapestMetroDisplay import gtfs
+from BudapestMetroDisplay.gtfs import Timetable, load_timetable, parse_gtfs_time
+from BudapestMetroDisplay.model import LED, Network, Route, Stop, StopId
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+FEED: dict[str, str] = {
+    "calendar.txt": (
+        "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,"
+        "start_date,end_date\n"
+        "WK,1,1,1,1,1,0,0,20260101,20261231\n"
+    ),
+    "calendar_dates.txt": (
+        "service_id,date,exception_type\nSPECIAL,20261012,1\nWK,20261013,2\n"
+    ),
+    "trips.txt": (
+        "route_id,service_id,trip_id,trip_headsign\n"
+        "H9,WK,T1,Terminus\n"
+        "H9,WK,T2,Terminus\n"
+        "H9,SPECIAL,T3,Terminus\n"
+        "X1,WK,T4,Elsewhere\n"
+    ),
+    "stop_times.txt": (
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+        "T1,08:00:00,08:00:30,09101,1\n"
+        "T1,08:05:00,08:05:00,09102,2\n"
+        "T1,08:10:00,08:10:00,09999,3\n"
+        "T2,25:10:00,25:10:00,09101,1\n"
+        "T3,09:00:00,09:00:00,09101,1\n"
+        "T4,08:00:00,08:00:00,09101,1\n"
+    ),
+}
+
+
+@pytest.fixture
+def network() -> Network:
+    network = Network()
+    route = Route(name="H9", route_id="BKK_H9", type="railway")
+    network.add_route(route)
+    for index, stop_id in enumerate(["BKK_09101", "BKK_09102"]):
+        stop = Stop(name=stop_id, led=LED(index=index), route=route)
+        StopId(stop_id=stop_id, stop=stop)
+    return network
+
+
+@pytest.fixture
+def feed(tmp_path: Path) -> Path:
+    path = tmp_path / "gtfs.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in FEED.items():
+            archive.writestr(name, content)
+    return path
+
+
+def trips(timetable: Timetable, route: Route, start: str, end: str) -> list[str]:
+    return [
+        f"{stop_time['stopId']}+{stop_time['tripId']}"
+        for stop_time in timetable.stop_times(
+            route,
+            datetime.fromisoformat(start),
+            datetime.fromisoformat(end),
+        )
+    ]
+
+
+def test_parse_gtfs_time() -> None:
+    assert parse_gtfs_time("08:05:30") == 8 * 3600 + 5 * 60 + 30
+    assert parse_gtfs_time("25:10:00") == 25 * 3600 + 10 * 60
+    assert parse_gtfs_time("") is None
+
+
+def test_only_the_stop_times_of_the_network_are_kept(
+    network: Network,
+    feed: Path,
+) -> None:
+    timetable = Timetable.from_gtfs(feed, network)
+    route = network.routes[0]
+
+    assert len(timetable) == 4
+    assert timetable.covers(route)
+    assert not timetable.covers(Route(name="X1", route_id="BKK_X1", type="subway"))
+
+    # Monday, the special service also runs
+    assert trips(timetable, route, "2026-10-12T07:00", "2026-10-12T10:00") == [
+        "BKK_09101+BKK_T1",
+        "BKK_09102+BKK_T1",
+        "BKK_09101+BKK_T3",
+    ]
+    # Friday
+    assert trips(timetable, route, "2026-10-16T08:01", "2026-10-16T10:00") == [
+        "BKK_09102+BKK_T1",
+    ]
+    # Saturday
+    assert trips(timetable, route, "2026-10-17T07:00", "2026-10-17T10:00") == []
+
+
+def test_trips_after_midnight_belong_to_the_previous_day(
+    network: Network,
+    feed: Path,
+) -> None:
+    timetable = Timetable.from_gtfs(feed, network)
+    route = network.routes[0]
+
+    # The trip of the Monday service runs even though Tuesday is removed
+    assert trips(timetable, route, "2026-10-13T00:00", "2026-10-13T02:00") == [
+        "BKK_09101+BKK_T2",
+    ]
+    assert trips(timetable, route, "2026-10-13T07:00", "2026-10-13T10:00") == []
+
+
+def test_schedule_response_looks_like_the_api(network: Network, feed: Path) -> None:
+    timetable = Timetable.from_gtfs(feed, network)
+    route = network.routes[0]
+    start = datetime.fromisoformat("2026-10-12T07:00")
+
+    response = timetable.schedule_response(
+        route,
+        start,
+        datetime.fromisoformat("2026-10-12T08:01"),
+    )
+
+    assert response.route_id == "BKK_H9"
+    assert response.stop_times == [
+        {
+            "stopId": "BKK_09101",
+            "tripId": "BKK_T1",
+            "stopHeadsign": "Terminus",
+            "arrivalTime": int(start.timestamp()) + 3600,
+            "departureTime": int(start.timestamp()) + 3630,
+        },
+    ]
+
+
+def test_timetable_is_cached(
+    network: Network,
+    feed: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    first = load_timetable(feed, network)
+    assert feed.with_suffix(".npz").exists()
+
+    def ingest(*_args: object) -> Timetable:
+        pytest.fail("The cached timetable should be used")
+
+    monkeypatch.setattr(gtfs.Timetable, "from_gtfs", ingest)
+    cached = load_timetable(feed, network)
+
+    assert len(cached) == len(first)
+    assert trips(cached, network.routes[0], "2026-10-12T07:00", "2026-10-12T10:00") == [
+        "BKK_09101+BKK_T1",
+        "BKK_09102+BKK_T1",
+        "BKK_09101+BKK_T3",
+    ]
+
+
+def test_feed_is_valid_until_the_end_of_its_calendar(
+    network: Network,
+    feed: Path,
+) -> None:
+    timetable = Timetable.from_gtfs(feed, network)
+
+    assert timetable.is_valid(date(2026, 12, 31))
+    assert not timetable.is_valid(date(2027, 1, 1))
+
+
+@pytest.fixture
+def timetable_route(
+    network: Network,
+    feed: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[Route]:
+    # The modules read the configuration, import them only when the tests run
+    from BudapestMetroDisplay import bkk_opendata, clock
+    from BudapestMetroDisplay.log import add_logging_level
+
+    # The custom log level is only added when the application sets up logging
+    if not hasattr(logging, "TRACE"):
+        add_logging_level("TRACE", logging.DEBUG - 5)
+
+    route = network.routes[0]
+    monkeypatch.setattr(
+        bkk_opendata,
+        "timetable",
+        Timetable.from_gtfs(feed, network),
+    )
+    yield route
+
+    clock.set_clock(None)
+    for event in bkk_opendata.departure_scheduler.get_jobs():
+        if event.group == route.route_id:
+            bkk_opendata.departure_scheduler.remove_event(event.id)
+    bkk_opendata.arrival_tables.pop(route.route_id, None)
+
+
+def test_timetable_falls_back_to_the_api(timetable_route: Route) -> None:
+    from BudapestMetroDisplay import bkk_opendata, clock
+    from BudapestMetroDisplay.query_planner import QueryBatch
+
+    batch = QueryBatch([timetable_route], 100)
+
+    # No weekday service on Saturday
+    clock.set_clock(lambda: datetime(2026, 11, 7, 7, 0))
+    assert bkk_opendata.uses_timetable(batch, "REGULAR")
+    assert bkk_opendata.update_from_timetable(batch) is None
+
+    # The calendar of the feed has ended
+    clock.set_clock(lambda: datetime(2027, 1, 4, 7, 0))
+    assert not bkk_opendata.uses_timetable(batch, "REGULAR")
+
+
+def test_timetable_arrivals_dont_hide_the_alerts(timetable_route: Route) -> None:
+    from BudapestMetroDisplay import bkk_opendata, clock
+    from BudapestMetroDisplay.bkk_response import ApiResponse
+    from BudapestMetroDisplay.query_planner import QueryBatch
+
+    batch = QueryBatch([timetable_route], 100)
+    sid = timetable_route.get_stop_id("BKK_09101")
+    assert sid is not None
+
+    clock.set_clock(lambda: datetime(2026, 11, 2, 7, 0))
+    assert bkk_opendata.update_from_timetable(batch) is not None
+    assert bkk_opendata.departure_scheduler.next_event(sid.stop_id) is not None
+    assert not bkk_opendata.has_pending_arrival(sid)
+
+    alert = {
+        "id": "A1",
+        "start": 0,
+        "routes": [
+            {
+                "routeId": "BKK_H9",
+                "effectType": "NO_SERVICE",
+                "stopIds": ["BKK_09101"],
+            },
+        ],
+    }
+    bkk_opendata.process_alerts(
+        ApiResponse({"data": {"entry": {}, "references": {"alerts": {"A1": alert}}}}),
+        timetable_route,
+    )
+    assert not sid.in_service
+
+    # The timetable doesn't bring the stop back, the API updates the route
+    bkk_opendata.update_from_timetable(batch)
+    assert not sid.in_service
+    assert not bkk_opendata.uses_timetable(batch, "REGULAR")
@@ -20,7 +20,7 @@
 #  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 #  OTHER DEALINGS IN THE SOFTWARE.
 
-# ruff: noqa: D103, ANN001, ANN202
+# ruff: noqa: D103, ANN001, ANN202, S101
 
 import os
 from unittest.mock import MagicMock, patch
@@ -31,6 +31,7 @@ import pytest
 os.environ["BKK_API_KEY"] = "test_api_key"
 
 from BudapestMetroDisplay import led_control
+from BudapestMetroDisplay.led_helpers import build_brightness_lut
 
 
 @pytest.fixture(autouse=True)
@@ -95,3 +96,67 @@ def test_deactivate_sacn() -> None:
 
         # Verify that the stop method was called
         mock_sender.stop.assert_called_once()
+
+
+def test_brightness_lut_raises_dim_values() -> None:
+    lut = build_brightness_lut(0.5)
+    payload = bytes((0, 1, 55, 56, 255))
+
+    assert len(lut) == 256
+    assert payload.translate(lut) == bytes((0, 56, 56, 56, 255))
+
+
+def test_brightness_lut_full_and_no_brightness() -> None:
+    assert build_brightness_lut(1.0)[1:28] == bytes([28] * 27)
+    assert build_brightness_lut(0.0) == bytes(range(256))
+    assert build_brightness_lut(0.05)[1] == 255
+
+
+def make_output(
+    frames: list[bytes],
+    first_led: int,
+    led_count: int,
+) -> led_control.SACNOutput:
+    return led_control.SACNOutput(
+        universe=first_led + 1,
+        destination="multicast",
+        start=first_led * 3,
+        end=(first_led + led_count) * 3,
+        send=frames.append,
+    )
+
+
+def test_update_sacn_skips_unchanged_frames(monkeypatch) -> None:
+    frames1: list[bytes] = []
+    frames2: list[bytes] = []
+    monkeypatch.setattr(
+        "BudapestMetroDisplay.led_control.outputs",
+        [make_output(frames1, 0, 1), make_output(frames2, 1, 1)],
+    )
+
+    frame = bytearray((255, 0, 0, 0, 0, 255))
+    led_control.update_sacn(memoryview(frame))
+    led_control.update_sacn(memoryview(frame))
+    frame[1] = 100
+    led_control.update_sacn(memoryview(frame))
+
+    assert frames1 == [bytes((255, 0, 0)), bytes((255, 100, 0))]
+    assert frames2 == [bytes((0, 0, 255))]
+
+
+def test_resolve_outputs_splits_strip_into_universes() -> None:
+    outputs = led_control.resolve_outputs(400)
+    universe = led_control.settings.sacn.universe
+
+    assert [(o.universe, o.first_led, o.led_count) for o in outputs] == [
+        (universe, 0, 170),
+        (universe + 1, 170, 170),
+        (universe + 2, 340, 60),
+    ]
+
+
+def test_idle_frames_stay_within_the_keep_alive_interval() -> None:
+    assert led_control.idle_frame_time(2) == 0.5
+    assert led_control.idle_frame_time(1) == 1.0
+    # Slower idle rates would let the receivers time out
+    assert led_control.idle_frame_time(0.1) == 1.0
@@ -0,0 +1,175 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+
+# ruff: noqa: D103, S101
+
+import os
+
+# Mock environment variables before importing the module
+os.environ["BKK_API_KEY"] = "test_api_key"
+
+import numpy as np
+
+from BudapestMetroDisplay.model import (
+    LED,
+    AnimationEngine,
+    LedStrip,
+    Network,
+    Route,
+    Stop,
+    StopId,
+)
+
+
+def make_strip() -> tuple[LedStrip, StopId, StopId]:
+    leds = [LED(index=i) for i in range(3)]
+    strip = LedStrip(leds=leds)
+    route = Route(name="M1", route_id="BKK_5100", type="subway", color=(255, 255, 0))
+    stop1 = Stop(name="Vörösmarty tér", led=leds[0], route=route, is_terminus=True)
+    stop2 = Stop(name="Deák Ferenc tér", led=leds[1], route=route)
+    sid1 = StopId(stop_id="BKK_F00965", stop=stop1)
+    sid2 = StopId(stop_id="BKK_F00963", stop=stop2)
+    return strip, sid1, sid2
+
+
+def test_all_leds_dirty_after_init() -> None:
+    strip, _, _ = make_strip()
+    assert [led.index for led in strip.pop_dirty()] == [0, 1, 2]
+    assert strip.pop_dirty() == []
+
+
+def test_stop_id_change_marks_only_its_led_dirty() -> None:
+    strip, sid1, _ = make_strip()
+    strip.pop_dirty()
+
+    with sid1.stop.lock:
+        sid1.vehicle_present = True
+
+    assert [led.index for led in strip.pop_dirty()] == [0]
+
+
+def test_stop_id_same_value_does_not_mark_dirty() -> None:
+    strip, sid1, sid2 = make_strip()
+    strip.pop_dirty()
+
+    with sid1.stop.lock:
+        sid1.in_service = True
+    with sid2.stop.lock:
+        sid2.vehicle_present = False
+
+    assert strip.pop_dirty() == []
+
+
+def test_step_starts_animation_for_dirty_led() -> None:
+    strip, sid1, _ = make_strip()
+    strip.step()
+    assert not strip.anims.is_running()
+
+    with sid1.stop.lock:
+        sid1.vehicle_present = True
+    strip.step()
+
+    assert strip.anims.is_running(0)
+    assert not strip.anims.is_running(1)
+    assert strip.anims.end_color(0) == (255, 255, 0)
+
+
+def test_strip_is_idle_until_marked_dirty() -> None:
+    strip, sid1, _ = make_strip()
+    strip.step()
+    assert strip.is_idle
+    assert not strip.wait_for_change(0)
+
+    with sid1.stop.lock:
+        sid1.vehicle_present = True
+
+    assert not strip.is_idle
+    assert strip.wait_for_change(0)
+
+
+def test_payload_is_a_view_of_led_colors() -> None:
+    leds = [LED(index=i) for i in (1, 0)]
+    leds[0].color = (1, 2, 3)
+    strip = LedStrip(leds=leds)
+    payload = strip.payload
+
+    leds[1].color = (300, -5, 7)
+
+    assert payload.tobytes() == bytes((255, 0, 7, 1, 2, 3))
+    assert strip.to_tuple() == (255, 0, 7, 1, 2, 3)
+    assert leds[0].color == (1, 2, 3)
+    assert leds[1].r == 255
+
+
+def test_animation_engine_steps_all_fades_at_once() -> None:
+    frame = np.zeros((3, 3), dtype=np.uint8)
+    frame[2] = (200, 100, 0)
+    engine = AnimationEngine(size=3)
+
+    engine.start(0, (255, 255, 0), now=0.0, frame=frame, dur=1.0)
+    engine.start(2, (0, 0, 0), now=0.0, frame=frame, dur=2.0)
+
+    engine.step(0.5, frame)
+    assert frame[0].tolist() == [127, 127, 0]
+    assert frame[2].tolist() == [175, 87, 0]
+
+    engine.step(1.0, frame)
+    assert frame[0].tolist() == [255, 255, 0]
+    assert not engine.is_running(0)
+    assert engine.is_running(2)
+
+    engine.step(2.5, frame)
+    assert frame[2].tolist() == [0, 0, 0]
+    assert not engine.is_running()
+
+
+def test_animation_engine_zero_duration_snaps() -> None:
+    frame = np.zeros((1, 3), dtype=np.uint8)
+    engine = AnimationEngine(size=1)
+
+    engine.start(0, (10, 20, 30), now=5.0, frame=frame, dur=0)
+    engine.step(5.0, frame)
+
+    assert frame[0].tolist() == [10, 20, 30]
+    assert not engine.is_running()
+
+
+def test_route_stop_id_index() -> None:
+    _, sid1, sid2 = make_strip()
+    route = sid1.stop.route
+
+    assert route.get_stop_id("BKK_F00965") is sid1
+    assert route.get_stop_id("BKK_F00963") is sid2
+    assert route.get_stop_id("BKK_F99999") is None
+
+
+def test_network_stop_id_index() -> None:
+    _, sid1, _ = make_strip()
+    network = Network()
+    network.add_route(sid1.stop.route)
+    # StopIds added after the Route are also indexed
+    sid3 = StopId(stop_id="BKK_F00997", stop=sid1.stop)
+
+    assert sid1.stop.route.network is network
+    assert network.get_stop_id("BKK_F00965") is sid1
+    assert network.get_stop_id("BKK_F00997") is sid3
+    assert network.get_stop_id("BKK_F99999") is None
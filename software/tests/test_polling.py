@@ -0,0 +1,64 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from BudapestMetroDisplay.polling import AdaptiveCadence
+
+NOW: float = 1_700_000_000
+
+
+def test_first_update_uses_base_interval() -> None:
+    cadence = AdaptiveCadence(60, 20, 180)
+
+    assert cadence.interval("R") == 60
+    assert cadence.observe("R", {"a": int(NOW) + 30}, NOW + 30, NOW) == 60
+    assert cadence.drift("R") is None
+
+
+def test_stable_predictions_stretch_the_interval() -> None:
+    cadence = AdaptiveCadence(60, 20, 180)
+    predictions = {"a": int(NOW) + 30, "b": int(NOW) + 90}
+
+    cadence.observe("R", predictions, NOW + 30, NOW)
+    assert cadence.observe("R", predictions, NOW + 30, NOW) == 90
+    assert cadence.observe("R", predictions, NOW + 30, NOW) == 135
+    assert cadence.observe("R", predictions, NOW + 30, NOW) == 180
+    assert cadence.observe("R", predictions, NOW + 30, NOW) == 180
+    assert cadence.drift("R") == 0
+
+
+def test_moving_predictions_shrink_the_interval() -> None:
+    cadence = AdaptiveCadence(60, 20, 180)
+
+    cadence.observe("R", {"a": int(NOW) + 30}, NOW + 30, NOW)
+    assert cadence.observe("R", {"a": int(NOW) + 150}, NOW + 30, NOW) == 30
+    assert cadence.observe("R", {"a": int(NOW) + 30}, NOW + 30, NOW) == 20
+    # Other routes are not affected
+    assert cadence.interval("S") == 60
+
+
+def test_sparse_arrivals_stretch_the_interval() -> None:
+    cadence = AdaptiveCadence(60, 20, 180)
+
+    # Wait until shortly before the next arrival
+    assert cadence.observe("R", {}, NOW + 140, NOW) == 120
+    # No upcoming arrivals at all
+    assert cadence.observe("S", {}, None, NOW) == 180
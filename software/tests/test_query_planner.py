@@ -0,0 +1,131 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from BudapestMetroDisplay.bkk_response import ApiResponse
+from BudapestMetroDisplay.model import LED, Route, Stop, StopId
+from BudapestMetroDisplay.query_planner import (
+    plan_batches,
+    split_by_route,
+    stop_ids_length,
+)
+
+
+def make_route(name: str, route_id: str, stop_ids: list[str]) -> Route:
+    route = Route(name=name, route_id=route_id, type="subway")
+    for index, stop_id in enumerate(stop_ids):
+        stop = Stop(name=stop_id, led=LED(index=index), route=route)
+        StopId(stop_id=stop_id, stop=stop)
+    return route
+
+
+def test_plan_batches_respects_url_length() -> None:
+    routes = [
+        make_route("A", "R_A", ["A1", "A2"]),
+        make_route("B", "R_B", ["B1", "B2"]),
+        make_route("C", "R_C", ["C1", "C2"]),
+    ]
+    # Room for the stops of two routes
+    max_url_length = 100 + stop_ids_length(["A1", "A2", "B1", "B2"])
+
+    batches = plan_batches(routes, 10, 100, max_url_length=max_url_length)
+
+    assert [batch.name for batch in batches] == ["A+B", "C"]
+    assert batches[0].stop_ids == ["A1", "A2", "B1", "B2"]
+    assert batches[0].limit == 20
+    assert batches[1].limit == 10
+
+
+def test_plan_batches_respects_limit() -> None:
+    routes = [make_route(name, f"R_{name}", [f"{name}1"]) for name in "ABC"]
+
+    batches = plan_batches(routes, 100, 0, max_limit=100)
+
+    assert [batch.name for batch in batches] == ["A", "B", "C"]
+    assert all(batch.is_single for batch in batches)
+
+
+def test_split_by_route_uses_trips_and_stop_ids() -> None:
+    route_a = make_route("A", "R_A", ["A1"])
+    route_b = make_route("B", "R_B", ["B1"])
+    api_response = ApiResponse(
+        {
+            "data": {
+                "limitExceeded": False,
+                "entry": {
+                    "routeIds": ["R_A", "R_B"],
+                    "alertIds": ["X"],
+                    "stopTimes": [
+                        {"stopId": "A1", "tripId": "T1", "arrivalTime": 1},
+                        {"stopId": "B1", "tripId": "T2", "arrivalTime": 2},
+                        # Not in the trip references, found by its stop
+                        {"stopId": "B1", "tripId": "T3", "arrivalTime": 3},
+                    ],
+                },
+                "references": {
+                    "trips": {
+                        "T1": {"id": "T1", "routeId": "R_A"},
+                        "T2": {"id": "T2", "routeId": "R_B"},
+                    },
+                },
+            },
+        },
+    )
+
+    responses = split_by_route(api_response, [route_a, route_b])
+
+    assert responses["R_A"].route_id == "R_A"
+    assert [st["tripId"] for st in responses["R_A"].stop_times] == ["T1"]
+    assert responses["R_B"].route_id == "R_B"
+    assert [st["tripId"] for st in responses["R_B"].stop_times] == ["T2", "T3"]
+    assert responses["R_B"].entry is not None
+    assert responses["R_B"].entry["alertIds"] == ["X"]
+    # The original response is not changed
+    assert len(api_response.stop_times) == 3
+
+
+def test_split_by_route_drops_other_routes_on_shared_stops() -> None:
+    route_a = make_route("A", "R_A", ["S1"])
+    route_b = make_route("B", "R_B", ["S1"])
+    api_response = ApiResponse(
+        {
+            "data": {
+                "entry": {
+                    "stopTimes": [
+                        {"stopId": "S1", "tripId": "T1", "arrivalTime": 1},
+                        # A trip of a route outside the batch on the shared stop
+                        {"stopId": "S1", "tripId": "T2", "arrivalTime": 2},
+                    ],
+                },
+                "references": {
+                    "trips": {
+                        "T1": {"id": "T1", "routeId": "R_A"},
+                        "T2": {"id": "T2", "routeId": "R_OTHER"},
+                    },
+                },
+            },
+        },
+    )
+
+    responses = split_by_route(api_response, [route_a, route_b])
+
+    assert [st["tripId"] for st in responses["R_A"].stop_times] == ["T1"]
+    assert responses["R_B"].stop_times == []
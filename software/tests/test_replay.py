@@ -0,0 +1,156 @@
+#  MIT License
+#
+#  Copyright (c) 2026 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+from BudapestMetroDisplay.recording import Recorder, read_recording
+
+SRC_PATH = Path(__file__).parent.parent / "src"
+
+# Stops of the H5 route in the network module
+H5_STOP_IDS = ["BKK_09159205", "BKK_09100203", "BKK_09084201", "BKK_09118199"]
+
+
+def schedule_body(start: float, shift: int) -> bytes:
+    stop_times = [
+        {
+            "stopId": stop_id,
+            "tripId": f"T{trip}",
+            "arrivalTime": int(start + 120 + 300 * trip + 60 * index + shift),
+            "departureTime": int(start + 150 + 300 * trip + 60 * index + shift),
+        }
+        for trip in range(3)
+        for index, stop_id in enumerate(H5_STOP_IDS)
+    ]
+    return json.dumps(
+        {
+            "data": {
+                "entry": {"routeIds": ["BKK_H5"], "stopTimes": stop_times},
+                "references": {},
+            },
+        },
+    ).encode()
+
+
+def record_traffic(path: Path) -> None:
+    start = 1_700_000_000.0
+    recorder = Recorder(path)
+    for update in range(3):
+        recorder.record(
+            start + 60 * update,
+            "REALTIME",
+            ["BKK_H5"],
+            schedule_body(start, update * 5),
+        )
+    recorder.close()
+
+
+def run_replay(recording: Path, frames: Path, cwd: Path) -> str:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC_PATH),
+        "BKK_API_KEY": "01234567-89ab-cdef-0123-456789abcdef",
+        "SACN_UNICAST_IP": "127.0.0.1",
+    }
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-m",
+            "BudapestMetroDisplay.replay",
+            str(recording),
+            "--frames",
+            str(frames),
+        ],
+        capture_output=True,
+        check=True,
+        cwd=cwd,
+        env=env,
+        text=True,
+        timeout=60,
+    )
+    return result.stdout
+
+
+def test_recording_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "traffic.jsonl.gz"
+    recorder = Recorder(path)
+    recorder.record(1.5, "REGULAR", ["BKK_5100", "BKK_5200"], b'{"data": 1}')
+    recorder.record(2.5, "ALERTS", ["BKK_H5"], '{"text": "á"}'.encode())
+    # A body which is not valid UTF-8 is recorded as it is
+    recorder.record(3.0, "ALERTS", ["BKK_H5"], b"\xff\xfe{}")
+    recorder.close()
+    # Responses arriving after the shutdown are dropped
+    recorder.record(3.5, "ALERTS", ["BKK_H5"], b"{}")
+
+    responses = list(read_recording(path))
+    assert recorder.count == 3
+    assert [(r.time, r.type, r.routes) for r in responses] == [
+        (1.5, "REGULAR", ("BKK_5100", "BKK_5200")),
+        (2.5, "ALERTS", ("BKK_H5",)),
+        (3.0, "ALERTS", ("BKK_H5",)),
+    ]
+    assert responses[1].content == '{"text": "á"}'.encode()
+    assert responses[2].content == b"\xff\xfe{}"
+
+
+def test_interrupted_recording_is_read_up_to_the_last_line(tmp_path: Path) -> None:
+    path = tmp_path / "traffic.jsonl.gz"
+    line = json.dumps({"time": 1, "type": "REALTIME", "routes": ["R"], "body": "{}"})
+    data = gzip.compress(f"{line}\n{line[:10]}".encode())
+    # Cut off the end marker of the compressed stream
+    path.write_bytes(data[:-8])
+
+    assert [r.time for r in read_recording(path)] == [1.0]
+
+
+def test_replay_is_deterministic(tmp_path: Path) -> None:
+    recording = tmp_path / "traffic.jsonl.gz"
+    record_traffic(recording)
+
+    first = run_replay(recording, tmp_path / "first.bin", tmp_path)
+    second = run_replay(recording, tmp_path / "second.bin", tmp_path)
+
+    assert "Replayed 3 responses, 24 events" in first
+    assert first.splitlines()[-1] == second.splitlines()[-1]
+    frames = (tmp_path / "first.bin").read_bytes()
+    assert frames == (tmp_path / "second.bin").read_bytes()
+
+    # Every stop starts at its dimmed color like in the live output,
+    # and no LED goes dark
+    payload_size = struct.unpack_from("<I", frames)[0]
+    frame_size = 8 + payload_size
+    payloads = [
+        frames[offset + 8 : offset + frame_size]
+        for offset in range(4, len(frames), frame_size)
+    ]
+    assert len(payloads) > 1
+    assert payload_size == 63 * 3
+    for payload in payloads:
+        assert all(any(payload[i : i + 3]) for i in range(0, payload_size, 3))
@@ -0,0 +1,98 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from types import SimpleNamespace
+
+import pytest
+
+from BudapestMetroDisplay.polling import AdaptiveCadence
+from BudapestMetroDisplay.response_cache import ResponseCache, content_digest
+
+KEY = ("https://example.com/api", (("routeId", "BKK_5100"),))
+BODY = b'{"currentTime":1700000000000,"data":{"entry":{"stopTimes":[]}}}'
+
+
+def test_digest_ignores_current_time() -> None:
+    later = BODY.replace(b"1700000000000", b"1700000060000")
+    changed = BODY.replace(b"[]", b"[{}]")
+
+    assert content_digest(BODY) == content_digest(later)
+    assert content_digest(BODY) != content_digest(changed)
+
+
+def test_unchanged_body_returns_last_result() -> None:
+    cache = ResponseCache(max_age=600)
+    assert cache.lookup(KEY, 200, BODY) is None
+
+    cache.store(KEY, {}, BODY, {"BKK_5100": 42})
+    entry = cache.lookup(KEY, 200, BODY.replace(b"000000", b"000060"))
+
+    assert entry is not None
+    assert entry.result == {"BKK_5100": 42}
+    assert cache.lookup(KEY, 200, BODY.replace(b"[]", b"[{}]")) is None
+    assert cache.lookup(("other",), 200, BODY) is None
+
+
+def test_validators_are_sent_back() -> None:
+    cache = ResponseCache(max_age=600)
+    assert cache.conditional_headers(KEY) == {}
+
+    cache.store(
+        KEY,
+        {"ETag": '"abc"', "Last-Modified": "Tue, 14 Nov 2023 22:13:20 GMT"},
+        None,
+        None,
+    )
+
+    assert cache.conditional_headers(KEY) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT",
+    }
+    # Streamed responses can only be matched by a Not Modified answer
+    assert cache.lookup(KEY, 200) is None
+    assert cache.lookup(KEY, 304) is not None
+
+
+def test_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(
+        "BudapestMetroDisplay.response_cache._t",
+        SimpleNamespace(monotonic=lambda: now),
+    )
+    cache = ResponseCache(max_age=60)
+    cache.store(KEY, {"ETag": '"abc"'}, BODY, 1)
+
+    now += 61
+
+    # The answer to validators sent before the expiry is still accepted
+    assert cache.lookup(KEY, 304) is not None
+    assert cache.lookup(KEY, 200, BODY) is None
+    assert cache.conditional_headers(KEY) == {}
+
+
+def test_repeated_predictions_stretch_the_interval() -> None:
+    now = 1_700_000_000
+    cadence = AdaptiveCadence(60, 20, 180)
+    cadence.observe("R", {"a": now + 50}, now + 50, now)
+
+    assert cadence.repeat("R", now + 30) == 90
+    assert cadence.drift("R") == 0
@@ -0,0 +1,141 @@
+#  MIT License
+#
+#  Copyright (c) 2024 denes44
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"),
+#  to deal in the Software without restriction, including without limitation
+#  the rights to use, copy, modify, merge, publish, distribute, sublicense,
+#  and/or sell copies of the Software, and to permit persons to whom
+#  the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included
+#  in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#  FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#  AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#  LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+#  ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+#  OTHER DEALINGS IN THE SOFTWARE.
+# ruff: noqa: D103, S101
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from BudapestMetroDisplay.model import Network
+
+
+@pytest.fixture
+def network() -> Iterator[Network]:
+    # The modules read the configuration, import them only when the tests run
+    from BudapestMetroDisplay.bkk_opendata import arrival_tables, departure_scheduler
+    from BudapestMetroDisplay.model import LED, Network, Route, Stop, StopId
+
+    network = Network()
+    route = Route(name="H9", route_id="BKK_H9", type="railway")
+    network.add_route(route)
+    for index, stop_id in enumerate(["BKK_09101", "BKK_09102"]):
+        stop = Stop(name=stop_id, led=LED(index=index), route=route)
+        StopId(stop_id=stop_id, stop=stop)
+    yield network
+
+    for event in departure_scheduler.get_jobs():
+        if event.group == route.route_id:
+            departure_scheduler.remove_event(event.id)
+    arrival_tables.pop(route.route_id, None)
+
+
+def test_snapshot_round_trip(network: Network, tmp_path: Path) -> None:
+    from BudapestMetroDisplay.bkk_opendata import (
+        arrival_table,
+        departure_scheduler,
+        restore_arrivals,
+    )
+    from BudapestMetroDisplay.snapshot import restore_snapshot, save_snapshot
+
+    route = network.routes[0]
+    first = route.get_stop_id("BKK_09101")
+    second = route.get_stop_id("BKK_09102")
+    assert first is not None
+    assert second is not None
+    now = datetime.now().timestamp()
+
+    restore_arrivals(
+        route,
+        [(first, "T1", now + 300, 30), (second, "T2", now + 600, 45)],
+    )
+    route.schedule_interval = 7.5
+    second.in_service = False
+    path = tmp_path / "snapshot.sqlite3"
+    assert save_snapshot(path, network) == 2
+
+    # Simulate a restart
+    for event in departure_scheduler.get_jobs():
+        if event.group == route.route_id:
+            departure_scheduler.remove_event(event.id)
+    arrival_table(route.route_id).clear()
+    route.schedule_interval = -1
+    second.in_service = True
+
+    assert restore_snapshot(path, network, max_age=60) == 2
+    assert route.schedule_interval == 7.5
+    assert not second.in_service
+    event = departure_scheduler.get_event("BKK_09102+T2_arrival")
+    assert event is not None
+    assert event.args == (second, "T2", event.next_run_time, 45)
+    assert arrival_table(route.route_id).is_applied(
+        "BKK_09101+T1_arrival",
+        now + 300,
+        30,
+    )
+
+
+def test_old_or_missing_snapshot_is_not_restored(
+    network: Network,
+    tmp_path: Path,
+) -> None:
+    from BudapestMetroDisplay.snapshot import restore_snapshot, save_snapshot
+
+    path = tmp_path / "snapshot.sqlite3"
+    assert restore_snapshot(path, network, max_age=60) == 0
+
+    network.routes[0].schedule_interval = 7.5
+    save_snapshot(path, network)
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE meta SET value = value - 120")
+    network.routes[0].schedule_interval = -1
+
+    assert restore_snapshot(path, network, max_age=60) == 0
+    assert network.routes[0].schedule_interval == -1
+
+
+def test_snapshot_age_follows_the_clock(network: Network, tmp_path: Path) -> None:
+    from BudapestMetroDisplay import clock
+    from BudapestMetroDisplay.snapshot import restore_snapshot, save_snapshot
+
+    path = tmp_path / "snapshot.sqlite3"
+    route = network.routes[0]
+    route.schedule_interval = 7.5
+    clock.set_clock(lambda: datetime(2024, 1, 1, 12))
+    try:
+        save_snapshot(path, network)
+        route.schedule_interval = -1
+        restore_snapshot(path, network, max_age=60)
+        assert route.schedule_interval == 7.5
+    finally:
+        clock.set_clock(None)
+
+    # The snapshot saved at the virtual time is too old for the wall clock
+    route.schedule_interval = -1
+    restore_snapshot(path, network, max_age=60)
+    assert route.schedule_interval == -1